@@ -0,0 +1,77 @@
+"""
+Size on disk and load time of the test case formats.
+
+    python benchmarks/bench_formats.py --cases 1000000
+
+Writes the same synthetic cases as CSV (export_csv) and as JSON Lines
+(export_jsonl: plain, .gz, and .zst when zstandard is installed). It then
+loads each file back into TestCase objects: the CSV through csv.DictReader
+plus case_from_row, which has to re-parse the flattened steps, and the
+JSONL through read_cases_jsonl. Loaded cases are checked against the
+originals.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import synthetic  # noqa: E402
+from danacvtTestsSpecsGenerator.exporters.csv_exporter import export_csv  # noqa: E402
+from danacvtTestsSpecsGenerator.exporters.jsonl_exporter import export_jsonl  # noqa: E402
+from danacvtTestsSpecsGenerator.models import case_from_row  # noqa: E402
+from danacvtTestsSpecsGenerator.parsers.jsonl_loader import read_cases_jsonl  # noqa: E402
+
+
+def _load_csv(path: str):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [case_from_row(row) for row in csv.DictReader(f)]
+
+
+def _zstd_available() -> bool:
+    try:
+        from compression import zstd  # noqa: F401  (Python 3.14+)
+        return True
+    except ImportError:
+        try:
+            import zstandard  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Test case formats: size and load time.")
+    ap.add_argument("--cases", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    cases = synthetic.make_cases(args.cases)
+    formats = [("csv", "cases.csv", export_csv, _load_csv),
+               ("jsonl", "cases.jsonl", export_jsonl, lambda p: list(read_cases_jsonl(p))),
+               ("jsonl.gz", "cases.jsonl.gz", export_jsonl, lambda p: list(read_cases_jsonl(p)))]
+    if _zstd_available():
+        formats.append(("jsonl.zst", "cases.jsonl.zst", export_jsonl, lambda p: list(read_cases_jsonl(p))))
+
+    print(f"{args.cases:,} cases")
+    print(f"{'format':<10} {'MB':>8} {'write s':>8} {'load s':>8}  lossless")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, file, write, load in formats:
+            path = os.path.join(tmp, file)
+            t0 = time.perf_counter()
+            write(cases, path)
+            t1 = time.perf_counter()
+            loaded = load(path)
+            t2 = time.perf_counter()
+            print(f"{name:<10} {os.path.getsize(path) / 1e6:>8.1f} {t1 - t0:>8.1f} {t2 - t1:>8.1f}  {loaded == cases}")
+            del loaded
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
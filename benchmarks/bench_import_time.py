@@ -0,0 +1,105 @@
+"""
+Import-time benchmark for the CLI's doc-only path.
+
+    python benchmarks/bench_import_time.py --runs 10 --target-ms 100
+
+Each run is a fresh interpreter:
+- `python -X importtime -c "import danacvtTestsSpecsGenerator.cli"`, reporting
+  the cumulative import time of the CLI module (median of --runs) and the
+  slowest modules by self time;
+- a real `.txt` → CSV run, checking that none of the heavy optional
+  dependencies (OpenCV, pytesseract, Pillow, the OpenAI SDK, python-docx,
+  pypandoc) got imported.
+
+Exit status is 1 if the median exceeds --target-ms or a heavy module loaded.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CLI_MODULE = "danacvtTestsSpecsGenerator.cli"
+HEAVY_MODULES = ["pandas", "numpy", "cv2", "pytesseract", "PIL", "openai", "httpx", "docx", "pypandoc", "PyPDF2"]
+DOC_PATH_ALLOWED: set = set()
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+DOC_RUN = """
+import sys
+from danacvtTestsSpecsGenerator import cli
+sys.argv = ["danacvt-gen", "--file", sys.argv[1], "--scope", "Login", "--out", sys.argv[2]]
+cli.main()
+heavy = {heavy!r}
+print("HEAVY:" + ",".join(m for m in heavy if m in sys.modules))
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("DANACVT_LEDGER", "off")
+    return env
+
+
+def importtime_once() -> tuple[float, list[tuple[int, str]]]:
+    """(cumulative µs of the CLI import, [(self µs, module)])."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {CLI_MODULE}"],
+                          capture_output=True, text=True, env=_env(), cwd=ROOT, check=True)
+    total, modules = 0.0, []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cum_us, name = int(m.group(1)), int(m.group(2)), m.group(4)
+        modules.append((self_us, name))
+        if name == CLI_MODULE:
+            total = cum_us
+    return total, modules
+
+
+def heavy_modules_on_doc_path() -> list[str]:
+    with tempfile.TemporaryDirectory(prefix="danacvt-import-") as tmp:
+        doc = Path(tmp) / "spec.txt"
+        doc.write_text("The user shall log in with email and password.\n"
+                       "The system must lock the account after 5 failed attempts.\n", encoding="utf-8")
+        proc = subprocess.run([sys.executable, "-c", DOC_RUN.format(heavy=HEAVY_MODULES), str(doc), str(Path(tmp) / "out.csv")],
+                              capture_output=True, text=True, env=_env(), cwd=tmp, check=True)
+    line = next(l for l in proc.stdout.splitlines() if l.startswith("HEAVY:"))
+    return [m for m in line[len("HEAVY:"):].split(",") if m and m not in DOC_PATH_ALLOWED]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("bench_import_time")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--target-ms", type=float, default=100.0, help="Max median import time of the CLI module")
+    ap.add_argument("--top", type=int, default=10, help="Show the N slowest modules by self time")
+    args = ap.parse_args()
+
+    totals, modules = [], []
+    for _ in range(args.runs):
+        total, modules = importtime_once()
+        totals.append(total / 1000)
+    median = statistics.median(totals)
+    print(f"{CLI_MODULE}: median {median:.1f} ms, min {min(totals):.1f} ms over {args.runs} runs (target {args.target_ms:.0f} ms)")
+    print("Slowest modules by self time (last run):")
+    for self_us, name in sorted(modules, reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:>7.1f} ms  {name}")
+
+    heavy = heavy_modules_on_doc_path()
+    print("Heavy modules loaded on the .txt → CSV path: " + (", ".join(heavy) if heavy else "none"))
+
+    failed = median > args.target_ms or bool(heavy)
+    if failed:
+        print("⚠️ Import-time target missed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Fuzz benchmark for llm.json_extract on megabyte-sized malformed LLM outputs.
+
+    python benchmarks/bench_json_extract.py --size-mb 1 --rounds 20
+
+Each round builds a chatty reply around a large JSON array of test ideas and
+applies random corruptions (smart quotes, trailing commas, prose brackets,
+code fences, truncation, a deeply nested tail). It checks how many ideas are recovered and compares
+timing with the previous regex-based `_safe_json_parse`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from danacvtTestsSpecsGenerator.llm.json_extract import extract_json_values, safe_json_parse  # noqa: E402
+
+
+def _legacy_safe_json_parse(raw: str):
+    """The pre-json_extract implementation, kept here for comparison only."""
+    t = raw.strip()
+    if t.startswith("```"):
+        lines = t.splitlines()[1:]
+        if lines and lines[-1].strip().startswith("```"):
+            lines = lines[:-1]
+        t = "\n".join(lines).strip()
+    t = t.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'").strip()
+    strip_commas = lambda s: re.sub(r",\s*}", "}", re.sub(r",\s*]", "]", s))
+    try:
+        return json.loads(t)
+    except Exception:
+        pass
+    m = re.search(r"(\{.*\}|\[.*\])", t, flags=re.S)
+    if m:
+        try:
+            return json.loads(m.group(1))
+        except Exception:
+            try:
+                return json.loads(strip_commas(m.group(1)))
+            except Exception:
+                pass
+    try:
+        return json.loads(strip_commas(t))
+    except Exception:
+        return []
+
+
+def _idea(i: int) -> dict:
+    return {
+        "title": f"Idea {i}: verify member list paging",
+        "description": "Ensure the list loads the next page when scrolled to the bottom.",
+        "preconditions": ["User logged in", f"{i % 50} members exist"],
+        "steps": ["Open Scene Members", "Scroll to bottom", "Observe loader"],
+        "expected_result": "Next page appended without duplicates.",
+        "type": "functional",
+        "priority": "P2",
+        "tags": ["list", "paging"],
+    }
+
+
+def make_reply(rng: random.Random, size_bytes: int) -> tuple[str, int, str]:
+    """Return (reply_text, ideas_in_payload, corruption_label)."""
+    ideas = []
+    body = ""
+    while len(body) < size_bytes:
+        ideas.extend(_idea(len(ideas) + k) for k in range(200))
+        body = json.dumps(ideas, ensure_ascii=False, indent=1)
+    corruption = rng.choice(["clean", "smart_quotes", "trailing_commas", "prose_brackets", "truncated", "fenced",
+                             "deep_nesting"])
+    if corruption == "smart_quotes":
+        body = re.sub(r'"([^"\n]*)"', lambda m: f"“{m.group(1)}”" if rng.random() < 0.5 else m.group(0), body)
+    elif corruption == "trailing_commas":
+        body = body.replace("\n  ]", ",\n  ]").replace("\n }", ",\n }")
+    elif corruption == "truncated":
+        body = body[: int(len(body) * rng.uniform(0.5, 0.99))]
+    prefix = "Here are the ideas [Screen 1] you asked for {see notes}:\n"
+    suffix = "\nLet me know if you need more [details]."
+    if corruption == "fenced":
+        return f"```json\n{body}\n```", len(ideas), corruption
+    if corruption == "prose_brackets":
+        return prefix + body + suffix + " [unterminated", len(ideas), corruption
+    if corruption == "deep_nesting":
+        # nesting deeper than the decoder's recursion limit must not abort the parse
+        return prefix + body + suffix + " " + "[" * 100_000 + " " + '{"a":' * 50_000, len(ideas), corruption
+    return prefix + body + suffix, len(ideas), corruption
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("bench_json_extract")
+    ap.add_argument("--size-mb", type=float, default=1.0)
+    ap.add_argument("--rounds", type=int, default=12)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--skip-legacy", action="store_true", help="Do not time the old regex parser")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    size = int(args.size_mb * 1024 * 1024)
+    print(f"{'corruption':<16}{'size':>10}{'ideas':>8}{'found':>8}{'new ms':>10}{'legacy ms':>11}{'legacy found':>14}")
+    failures = 0
+    for _ in range(args.rounds):
+        reply, expected, label = make_reply(rng, size)
+        t0 = time.perf_counter()
+        values = extract_json_values(reply)
+        ideas = safe_json_parse(reply, expect=list)
+        new_ms = (time.perf_counter() - t0) * 1000
+        legacy_ms, legacy_found = float("nan"), "-"
+        if not args.skip_legacy:
+            t0 = time.perf_counter()
+            legacy = _legacy_safe_json_parse(reply)
+            legacy_ms = (time.perf_counter() - t0) * 1000
+            legacy_found = str(len(legacy) if isinstance(legacy, list) else 0)
+        found = len(ideas)
+        if label != "truncated" and found != expected or not values:
+            failures += 1
+        print(f"{label:<16}{len(reply):>10}{expected:>8}{found:>8}{new_ms:>10.1f}{legacy_ms:>11.1f}{legacy_found:>14}")
+    print(f"rounds={args.rounds} failures={failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
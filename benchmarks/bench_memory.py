@@ -0,0 +1,110 @@
+"""
+Memory benchmark for generated test cases: bytes per case at 1M cases.
+
+    python benchmarks/bench_memory.py --cases 1000000
+
+Cases are generated per requirement from a synthetic document (as
+generate_test_cases_from_text does) and kept in one list. tracemalloc
+measures what that list holds, strings included. The same cases are then
+measured in the previous layout for comparison: plain dataclasses with a
+per-instance __dict__, list fields and one TestStep object per step per
+case. The legacy objects reuse the generator's string objects, while the
+previous generator also built fresh copies of the scope and requirement
+steps for every case, so the real saving is somewhat larger than reported.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from synthetic import requirement_doc  # noqa: E402
+from danacvtTestsSpecsGenerator.generators.doc_tests import generate_cases_for_requirement  # noqa: E402
+from danacvtTestsSpecsGenerator.models import TestCase  # noqa: E402
+from danacvtTestsSpecsGenerator.parsers.docs_loader import extract_requirements  # noqa: E402
+
+
+@dataclass
+class _LegacyStep:
+    number: int
+    action: str
+    data: Optional[str] = None
+
+
+@dataclass
+class _LegacyCase:
+    """The pre-slots TestCase layout, kept here for comparison only."""
+    id: str
+    title: str
+    description: str
+    preconditions: List[str]
+    steps: List[_LegacyStep]
+    expected_result: str
+    priority: str
+    type: str
+    tags: List[str] = field(default_factory=list)
+    trace_to: Optional[str] = None
+
+
+def _legacy(c: TestCase) -> _LegacyCase:
+    return _LegacyCase(c.id, c.title, c.description, list(c.preconditions),
+                       [_LegacyStep(s.number, s.action, s.data) for s in c.steps],
+                       c.expected_result, c.priority, c.type, list(c.tags), c.trace_to)
+
+
+def generate(n_cases: int, scope: str = "Scene Members") -> Iterator[TestCase]:
+    """n_cases cases from synthetic requirements (about 7 per requirement)."""
+    reqs = extract_requirements(requirement_doc(n_cases // 6 + 1))
+    made = 0
+    while True:
+        for req_id, text in reqs:
+            for c in generate_cases_for_requirement(req_id, text, scope, ["scenes", "members"]):
+                yield c
+                made += 1
+                if made == n_cases:
+                    return
+        reqs = [(f"{rid}-{made}", t) for rid, t in reqs]   # another pass with new IDs if short
+
+
+def measure(build: Callable[[], list]) -> tuple:
+    """(bytes held by build()'s result, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    items = build()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert items
+    del items
+    return held, elapsed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Bytes per generated test case.")
+    ap.add_argument("--cases", type=int, default=1_000_000)
+    args = ap.parse_args()
+    n = args.cases
+    print(f"Python {sys.version.split()[0]}, {n:,} cases")
+
+    rows = [
+        ("slotted (current)", *measure(lambda: list(generate(n)))),
+        ("dataclass + lists (legacy)", *measure(lambda: [_legacy(c) for c in generate(n)])),
+    ]
+    print(f"{'layout':<28} {'MB':>9} {'bytes/case':>11} {'build s':>8}")
+    for name, held, secs in rows:
+        print(f"{name:<28} {held / 1e6:>9.1f} {held / n:>11.0f} {secs:>8.1f}")
+    print(f"saving: {1 - rows[0][1] / rows[1][1]:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
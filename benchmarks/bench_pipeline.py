@@ -0,0 +1,211 @@
+"""
+Benchmark suite for the non-LLM pipeline stages, with stored baselines.
+
+    python benchmarks/bench_pipeline.py                      # quick sizes, compare with baseline
+    python benchmarks/bench_pipeline.py --scale full         # master CSVs up to 1M rows
+    python benchmarks/bench_pipeline.py --only export_csv,merge_csv
+    python benchmarks/bench_pipeline.py --save-baseline      # record this machine's baseline
+
+Covered: extract_requirements, generate_test_cases_from_text, parse_ui_from_ocr,
+export_csv, export_feature, merge_cases_into_csv, merge_ui_spec and OCR of the
+bundled mockups/ images. Inputs come from benchmarks/synthetic.py.
+
+Each benchmark reports the best of --repeat runs (setup such as copying the
+master CSV is not timed). With a baseline file (default
+benchmarks/baseline.json), a benchmark that is more than --threshold slower
+than its baseline is flagged and the exit status is 1. Baselines are machine
+specific: record them with --save-baseline on the machine that runs the
+comparison. Benchmarks whose optional dependencies are missing are skipped.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import synthetic  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+NOISE_FLOOR_S = 0.002  # differences below this are never regressions
+
+SIZES = {
+    "quick": {"reqs": [200, 2000], "ocr_lines": [200, 2000], "cases": [1_000, 10_000],
+              "csv_rows": [1_000, 10_000], "spec_sections": [100, 1_000]},
+    "full": {"reqs": [200, 2000, 10_000], "ocr_lines": [200, 2000, 20_000], "cases": [1_000, 10_000, 100_000],
+             "csv_rows": [1_000, 10_000, 100_000, 1_000_000], "spec_sections": [100, 1_000, 10_000]},
+}
+
+# A benchmark: name -> prepare(workdir) returning (setup_each, run); setup_each may be None.
+Prepared = Tuple[Optional[Callable[[], None]], Callable[[], object]]
+
+
+def _label(n: int) -> str:
+    return f"{n // 1_000_000}M" if n >= 1_000_000 and n % 1_000_000 == 0 else (
+        f"{n // 1000}k" if n >= 1000 and n % 1000 == 0 else str(n))
+
+
+def build_suite(scale: str) -> Dict[str, Callable[[Path], Prepared]]:
+    sizes = SIZES[scale]
+    suite: Dict[str, Callable[[Path], Prepared]] = {}
+
+    for n in sizes["reqs"]:
+        def extract(work, n=n):
+            from danacvtTestsSpecsGenerator.parsers.docs_loader import extract_requirements
+            doc = synthetic.requirement_doc(n)
+            return None, lambda: extract_requirements(doc)
+
+        def generate(work, n=n):
+            from danacvtTestsSpecsGenerator.generators.doc_tests import generate_test_cases_from_text
+            doc = synthetic.requirement_doc(n)
+            return None, lambda: generate_test_cases_from_text(doc, scope="Scene Members", tags=["bench"], max_per_req=10)
+
+        suite[f"extract_requirements[{_label(n)}]"] = extract
+        suite[f"generate_test_cases_from_text[{_label(n)}]"] = generate
+
+    for n in sizes["ocr_lines"]:
+        def parse(work, n=n):
+            from danacvtTestsSpecsGenerator.parsers.ui_ocr_parser import parse_ui_from_ocr
+            lines = synthetic.ocr_dump(n)
+            return None, lambda: parse_ui_from_ocr(lines)
+
+        suite[f"parse_ui_from_ocr[{_label(n)}]"] = parse
+
+    for n in sizes["cases"]:
+        def csv_export(work, n=n):
+            from danacvtTestsSpecsGenerator.exporters.csv_exporter import export_csv
+            cases = synthetic.make_cases(n)
+            return None, lambda: export_csv(cases, str(work / "out.csv"))
+
+        def feature_export(work, n=n):
+            from danacvtTestsSpecsGenerator.exporters.feature_exporter import export_feature
+            cases = synthetic.make_cases(n)
+            return None, lambda: export_feature(cases, str(work / "out.feature"), feature_name="Scene Members")
+
+        suite[f"export_csv[{_label(n)}]"] = csv_export
+        suite[f"export_feature[{_label(n)}]"] = feature_export
+
+    for n in sizes["csv_rows"]:
+        def merge_csv(work, n=n):
+            from danacvtTestsSpecsGenerator.updaters.cvs_updater import merge_cases_into_csv
+            master = synthetic.write_master_csv(str(work / f"master_{n}.csv"), n)
+            target = work / "merge_target.csv"
+            # a typical re-run: 1k cases, half of them already in the master
+            incoming = synthetic.make_cases(1000, seed=9, title_offset=max(0, n - 500))
+            return (lambda: shutil.copyfile(master, target),
+                    lambda: merge_cases_into_csv(str(target), incoming, match_key="Title", prune=True))
+
+        suite[f"merge_cases_into_csv[{_label(n)} rows]"] = merge_csv
+
+    for n in sizes["spec_sections"]:
+        # (name, strategy, replace every k-th section): 10 sections, then 10% of them
+        for name, strategy, every in (("append", "append", 0),
+                                      ("replace_sections", "replace_sections", max(1, n // 10)),
+                                      ("replace_many", "replace_sections", 10)):
+            def merge_spec(work, n=n, strategy=strategy, every=every):
+                from danacvtTestsSpecsGenerator.updaters.ui_spec_updater import merge_ui_spec
+                existing = synthetic.spec_markdown(n)
+                incoming = synthetic.spec_markdown(max(1, n // 10), seed=6)
+                target = work / "spec.md"
+                replace = [f"Section {i}" for i in range(0, n, every)] if every else None
+                return (lambda: target.write_text(existing, encoding="utf-8"),
+                        lambda: merge_ui_spec(str(target), incoming, strategy=strategy,
+                                              replace_sections=replace, source_label="bench"))
+
+            suite[f"merge_ui_spec[{name},{_label(n)} sections]"] = merge_spec
+
+    def mockups_ocr(work):
+        from danacvtTestsSpecsGenerator.parsers.ocr import ocr_lines
+        images = sorted((ROOT / "mockups").glob("*.png"))
+        if not images:
+            raise RuntimeError("no images in mockups/")
+        return None, lambda: [ocr_lines(str(p)) for p in images]
+
+    suite["ocr[mockups]"] = mockups_ocr
+    return suite
+
+
+def run_one(prepare: Callable[[Path], Prepared], repeat: int) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="danacvt-bench-") as tmp:
+        setup_each, run = prepare(Path(tmp))
+        times: List[float] = []
+        for _ in range(repeat):
+            if setup_each:
+                setup_each()
+            t0 = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - t0)
+    return {"seconds": min(times), "median": statistics.median(times), "rounds": len(times)}
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Names of benchmarks slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base or "seconds" not in r:
+            continue
+        if r["seconds"] > base["seconds"] * (1 + threshold) and r["seconds"] - base["seconds"] > NOISE_FLOOR_S:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("bench_pipeline")
+    ap.add_argument("--scale", choices=sorted(SIZES), default="quick")
+    ap.add_argument("--only", default="", help="Comma-separated name prefixes, e.g. export_csv,merge_ui_spec")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    ap.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    ap.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--json", default=None, help="Also write results to this JSON file")
+    args = ap.parse_args()
+
+    only = [p.strip() for p in args.only.split(",") if p.strip()]
+    suite = {k: v for k, v in build_suite(args.scale).items() if not only or any(k.startswith(p) for p in only)}
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")).get("results", {}) if baseline_path.exists() else {}
+
+    results: Dict[str, Dict] = {}
+    print(f"{'benchmark':<46}{'best ms':>10}{'median ms':>11}{'baseline ms':>13}{'change':>9}")
+    for name, prepare in suite.items():
+        try:
+            r = run_one(prepare, args.repeat)
+        except Exception as e:  # missing optional dependency, tesseract, ...
+            results[name] = {"skipped": f"{type(e).__name__}: {e}"}
+            print(f"{name:<46}{'skipped':>10}  ({type(e).__name__}: {e})")
+            continue
+        results[name] = r
+        base = baseline.get(name, {}).get("seconds")
+        change = f"{(r['seconds'] / base - 1) * 100:+.0f}%" if base else "-"
+        base_ms = f"{base * 1000:.1f}" if base else "-"
+        print(f"{name:<46}{r['seconds'] * 1000:>10.1f}{r['median'] * 1000:>11.1f}{base_ms:>13}{change:>9}")
+
+    doc = {"python": platform.python_version(), "platform": platform.platform(), "scale": args.scale, "results": results}
+    if args.json:
+        Path(args.json).write_text(json.dumps(doc, indent=1), encoding="utf-8")
+    if args.save_baseline:
+        merged = dict(baseline)
+        merged.update({k: v for k, v in results.items() if "seconds" in v})
+        baseline_path.write_text(json.dumps(dict(doc, results=merged), indent=1, sort_keys=True), encoding="utf-8")
+        print(f"✅ Wrote baseline → {baseline_path}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name in regressions:
+        print(f"⚠️ Regression: {name} is more than {args.threshold:.0%} slower than baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Merge time of the SQLite store against the CSV merge, and their equivalence.
+
+    python benchmarks/bench_store.py --master 200000 --batch 20000
+
+Builds the same master twice, as a CSV (merge_cases_into_csv) and as a
+store (CaseStore.upsert), then merges one batch into each with prune=True.
+Master and batch both repeat titles, with different case and spacing: the
+CSV merge updates only the last master row with a title and appends every
+incoming case whose title is new, duplicates included. The store's
+export-csv must then be byte-identical to the merged CSV.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import filecmp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import synthetic  # noqa: E402
+from danacvtTestsSpecsGenerator.updaters.cvs_updater import merge_cases_into_csv  # noqa: E402
+from danacvtTestsSpecsGenerator.updaters.sqlite_store import CaseStore  # noqa: E402
+
+
+def _with_duplicates(cases, every: int, id_prefix: str):
+    """cases plus, for every `every`-th case, another one with the same title (other case and spacing)."""
+    out = list(cases)
+    for i, c in enumerate(cases[::every]):
+        out.append(dataclasses.replace(c, id=f"{id_prefix}-{i:08x}", title=f"  {c.title.upper()} ",
+                                       expected_result=f"Duplicate {i} of its title."))
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="SQLite store vs CSV merge: time and equivalence.")
+    ap.add_argument("--master", type=int, default=200_000)
+    ap.add_argument("--batch", type=int, default=20_000)
+    args = ap.parse_args()
+
+    master = _with_duplicates(synthetic.make_cases(args.master), 10, "TC-DUPM")
+    # half the batch matches master titles (some of them duplicated), half is new
+    half = args.batch // 2
+    fresh = synthetic.make_cases(half, seed=7, title_offset=args.master)
+    batch = _with_duplicates(synthetic.make_cases(half, seed=6, title_offset=args.master - half) + fresh,
+                             5, "TC-DUPB")
+    print(f"master {len(master):,} rows, batch {len(batch):,} cases (duplicate titles in both)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "master.csv")
+        db_path = os.path.join(tmp, "cases.db")
+        export_path = os.path.join(tmp, "export.csv")
+        merge_cases_into_csv(csv_path, master)
+        with CaseStore(db_path) as store:
+            store.upsert(master)
+
+            t0 = time.perf_counter()
+            merge_cases_into_csv(csv_path, batch, prune=True)
+            t1 = time.perf_counter()
+            counts = store.upsert(batch, prune=True)
+            t2 = time.perf_counter()
+            store.export_csv(export_path)
+
+        same = filecmp.cmp(csv_path, export_path, shallow=False)
+        print(f"{'merge':<8} {'s':>8}")
+        print(f"{'csv':<8} {t1 - t0:>8.2f}")
+        print(f"{'sqlite':<8} {t2 - t1:>8.2f}  {counts}")
+        print(f"export-csv identical to the CSV merge: {same}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
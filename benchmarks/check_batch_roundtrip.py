@@ -0,0 +1,93 @@
+"""
+The offline batch round trip (write → results → ingest), checked against a
+results fixture, without network.
+
+    python benchmarks/check_batch_roundtrip.py
+    python benchmarks/check_batch_roundtrip.py --write-fixture   # after a prompt change
+
+1. write: a run with llm_batch_out writes the booster requests for the
+   example spec, and its custom_ids must be the ones in the fixture (they
+   are derived from the request, so a prompt change shows up here);
+2. ingest: a run with llm_batch_results=<fixture> defers nothing and adds
+   the LLM cases from it, which also fills the in-process memo;
+3. the next run, without batch files, is answered from the memo. It runs in
+   replay mode against an empty fixtures directory, so a request reaching
+   the backend would fail; every ledger entry of the run must be a memo hit.
+
+The fixture is a Batch API results file written by `danacvt-batch simulate`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from danacvtTestsSpecsGenerator.llm import backend as llm_backend  # noqa: E402
+from danacvtTestsSpecsGenerator.llm import batch as llm_batch  # noqa: E402
+from danacvtTestsSpecsGenerator.llm.ledger import read_entries  # noqa: E402
+from danacvtTestsSpecsGenerator.session import Generator  # noqa: E402
+
+SPEC = ROOT / "login_spect_example.txt"
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "login_batch_results.jsonl"
+
+
+def _custom_ids(path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return sorted(json.loads(line)["custom_id"] for line in f if line.strip())
+
+
+def _llm_cases(cases) -> list:
+    return [c for c in cases if "llm" in c.tags]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Offline batch round trip against a results fixture.")
+    ap.add_argument("--write-fixture", action="store_true", help="Regenerate the fixture from this tree's requests")
+    args = ap.parse_args()
+
+    failures = []
+
+    def check(ok: bool, what: str) -> None:
+        print(f"{'✅' if ok else '❌'} {what}")
+        if not ok:
+            failures.append(what)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DANACVT_LLM_MODE"] = "replay"
+        os.environ["DANACVT_LLM_FIXTURES"] = os.path.join(tmp, "no_fixtures")
+        llm_backend.enable_memo()
+        requests = os.path.join(tmp, "batch_in.jsonl")
+
+        with Generator(scope="Login", use_llm=True) as g:
+            g.from_document(str(SPEC), llm_batch_out=requests, llm_ledger=os.path.join(tmp, "ledger1.jsonl"))
+            if args.write_fixture:
+                FIXTURE.parent.mkdir(parents=True, exist_ok=True)
+                n = llm_batch.simulate(requests, str(FIXTURE))
+                print(f"✅ Wrote {n} simulated results → {FIXTURE}")
+            check(_custom_ids(requests) == _custom_ids(FIXTURE), "write: custom_ids match the fixture")
+
+            ledger2 = os.path.join(tmp, "ledger2.jsonl")
+            result = g.run(file=str(SPEC), out=None, llm_batch_results=str(FIXTURE), llm_ledger=ledger2)
+            ingested = _llm_cases(result.cases)
+            check(result.llm_deferred == 0, "ingest: no request deferred")
+            check(bool(ingested), f"ingest: {len(ingested)} LLM cases from the results")
+            check(all(e.get("mode") == "batch" for e in read_entries(ledger2)), "ingest: answered from the results only")
+
+            ledger3 = os.path.join(tmp, "ledger3.jsonl")
+            cases = g.from_document(str(SPEC), llm_ledger=ledger3)
+            entries = list(read_entries(ledger3))
+            check(bool(entries) and all(e.get("mode") == "memo" for e in entries),
+                  f"next run: {len(entries)} requests, all answered from the memo")
+            check([c.title for c in _llm_cases(cases)] == [c.title for c in ingested], "next run: same LLM cases")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Synthetic corpora for the benchmarks: requirement documents, OCR line dumps,
+test case lists, master CSVs and Markdown specs. Everything is derived from a
+seed, so two runs of the same size produce the same input.
+"""
+from __future__ import annotations
+
+import csv
+import random
+import sys
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from danacvtTestsSpecsGenerator.models import TestCase, TestStep  # noqa: E402
+
+CSV_COLUMNS = ["ID", "Title", "Description", "Preconditions", "Steps", "Expected Result",
+               "Priority", "Type", "Tags", "Trace To", "Status"]
+
+_SUBJECTS = ["The user", "The admin", "The system", "A standard user", "The scene owner"]
+_VERBS = ["shall be able to", "must", "should", "needs to", "is required to"]
+_ACTIONS = [
+    "add up to {n} members to a scene",
+    "rename a scene with at most {n} characters",
+    "search devices by name",
+    "remove a member from the scene",
+    "reset the password after {n} failed attempts",
+    "apply changes within {n} seconds",
+    "see at most {n} devices per page",
+    "delete a scene only with admin permission",
+]
+_PROSE = [
+    "This section describes the scene management screens.",
+    "Background: scenes group devices that are switched together.",
+    "Note that the layout follows the design system.",
+    "",
+]
+
+_OCR_TITLES = ["Scene Members", "Devices", "Groups", "Settings", "Profile"]
+_OCR_ROWS = ["Living Room Lamp", "Kitchen Ceiling Light", "Bedroom Reading Light With A Long Name",
+             "Garage Door Sensor", "Hallway Motion Detector", "Patio String Lights"]
+_OCR_CHROME = ["9:41", "Back", "Save", "Cancel", "Search devices", "Members | {n}", "Available devices | {n}"]
+
+
+def requirement_doc(n_reqs: int, seed: int = 1) -> str:
+    """A plain-text spec with about n_reqs requirement lines plus prose and continuations."""
+    rng = random.Random(seed)
+    lines: List[str] = [f"# Scene management — {n_reqs} requirements", ""]
+    for i in range(n_reqs):
+        action = rng.choice(_ACTIONS).format(n=rng.randint(1, 500))
+        style = rng.random()
+        if style < 0.6:
+            lines.append(f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {action} (case {i}).")
+        elif style < 0.8:
+            lines.append(f"- {action.capitalize()} (item {i})")
+        else:
+            lines.append(f"{i + 1}. {action.capitalize()}")
+        if rng.random() < 0.15:
+            lines.append("  Applies to both the mobile and the web client.")
+        if rng.random() < 0.3:
+            lines.append(rng.choice(_PROSE))
+    return "\n".join(lines) + "\n"
+
+
+def ocr_dump(n_lines: int, seed: int = 2) -> List[str]:
+    """OCR lines of a list-heavy mockup screen."""
+    rng = random.Random(seed)
+    lines = [rng.choice(_OCR_TITLES)]
+    while len(lines) < n_lines:
+        r = rng.random()
+        if r < 0.5:
+            lines.append(f"{rng.choice(_OCR_ROWS)} {len(lines)}")
+        elif r < 0.7:
+            lines.append(rng.choice(_OCR_CHROME).format(n=rng.randint(0, 99)))
+        elif r < 0.85:
+            lines.append(f"[ ] {rng.choice(_OCR_ROWS)} toggle {rng.choice(['On', 'Off'])}")
+        else:
+            lines.append(rng.choice(["~", "| |", "ee", "A"]))
+    return lines
+
+
+def make_cases(n: int, seed: int = 3, title_offset: int = 0) -> List[TestCase]:
+    """n generated-looking test cases; titles are unique per index (+ title_offset)."""
+    rng = random.Random(seed)
+    cases = []
+    for i in range(n):
+        k = i + title_offset
+        req = f"REQ-{k // 5 + 1:03d}"
+        steps = [TestStep(1, "Launch the application"), TestStep(2, "Navigate to: Scene Members"),
+                 TestStep(3, f"Perform action implied by: \"{rng.choice(_ACTIONS).format(n=k % 97)}\""),
+                 TestStep(4, "Observe system behavior")]
+        cases.append(TestCase(
+            id=f"TC-{k:08x}",
+            title=f"Verify {req}: case {k}",
+            description=f"Positive path for {req}.",
+            preconditions=["Test environment available", "Valid account if required"],
+            steps=steps,
+            expected_result="System satisfies the requirement.",
+            priority=rng.choice(["P0", "P1", "P2", "P3"]),
+            type=rng.choice(["functional", "negative", "boundary", "permissions"]),
+            tags=["scene", "members"],
+            trace_to=req,
+        ))
+    return cases
+
+
+def write_master_csv(path: str, n_rows: int, seed: int = 4) -> str:
+    """A master test case CSV (as produced by export_csv / merge) with n_rows rows."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        w.writeheader()
+        chunk = 10_000
+        for start in range(0, n_rows, chunk):
+            for c in make_cases(min(chunk, n_rows - start), seed=seed + start, title_offset=start):
+                w.writerow(dict(c.to_row(), Status=""))
+    return path
+
+
+def spec_markdown(n_sections: int, seed: int = 5) -> str:
+    """A UI spec with n_sections second-level sections of a few paragraphs each."""
+    rng = random.Random(seed)
+    parts = ["# UI Spec — Scene Members", ""]
+    for i in range(n_sections):
+        parts.append(f"## Section {i}")
+        parts.append("")
+        for _ in range(rng.randint(1, 4)):
+            parts.append(f"- {rng.choice(_OCR_ROWS)} is shown with a {rng.choice(['toggle', 'checkbox', 'button'])}.")
+        parts.append("")
+    return "\n".join(parts)
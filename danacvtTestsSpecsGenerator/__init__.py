@@ -0,0 +1,17 @@
+"""
+Test case and UI spec generation from requirement docs and mockups.
+
+    from danacvtTestsSpecsGenerator import Generator
+
+The session API lives in .session and is loaded on first access, so importing
+a submodule (e.g. the ledger or batch tools) does not pull in the pipeline.
+"""
+
+__all__ = ["Generator", "Options", "RunResult"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import session
+        return getattr(session, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,8 +2,19 @@ from pathlib import Path
 import os
 
 # Default output paths
-DEFAULT_OUT_DIR = Path("outputs")
-DEFAULT_OUT_DIR.mkdir(exist_ok=True)
+DEFAULT_OUT_DIR = Path("outputs")  # created on first write, not at import
+
+# On-disk cache for LLM intermediate results (e.g. per-screen flow summaries)
+CACHE_DIR = Path(os.getenv("DANACVT_CACHE_DIR", ".danacvt_cache"))
+
+# LLM stage defaults (kept here so the CLI can show them without importing llm/)
+DEFAULT_CHUNK_TOKENS = 6000      # booster context chunk size
+DEFAULT_CONCURRENCY = 4          # parallel LLM requests per stage
+DEFAULT_MAX_BOOSTED = 50         # boosted cases kept per run, however many chunks
+HIERARCHICAL_MIN_SCREENS = 20    # flow specs above this many screens use map-reduce
+
+# Append-only LLM usage ledger (override with DANACVT_LEDGER, "off" disables)
+LEDGER_PATH = DEFAULT_OUT_DIR / "llm_ledger.jsonl"
 
 # Supported file types
 SUPPORTED_DOCS = [".txt", ".md", ".docx", ".pdf"]
@@ -1,14 +1,26 @@
 import csv
-import pandas as pd
-from typing import List
+from typing import Iterable
 from danacvtTestsSpecsGenerator.models import TestCase
+from danacvtTestsSpecsGenerator.fsutil import atomic_path
 
-def export_csv(cases: List[TestCase], out_path: str) -> None:
-    rows = [c.to_row() for c in cases]
-    cols = list(rows[0].keys()) if rows else ["ID","Title","Description","Preconditions","Steps","Expected Result","Priority","Type","Tags","Trace To"]
-    if pd is None:
-        with open(out_path, "w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=cols); w.writeheader()
-            for r in rows: w.writerow(r)
-    else:
-        pd.DataFrame(rows, columns=cols).to_csv(out_path, index=False, encoding="utf-8")
\ No newline at end of file
+CSV_HEADERS = ["ID","Title","Description","Preconditions","Steps","Expected Result","Priority","Type","Tags","Trace To"]
+
+# The layout pandas' to_csv produced (this module used it when installed): "\n" line ends, minimal quoting.
+CSV_WRITE_OPTS = dict(lineterminator="\n", quoting=csv.QUOTE_MINIMAL)
+
+BUFFER_SIZE = 1 << 16
+
+def export_csv(cases: Iterable[TestCase], out_path: str) -> int:
+    """
+    Write cases as CSV, one row at a time (any iterable, e.g. a generator);
+    memory stays constant however many cases there are. Returns the row count.
+    """
+    n = 0
+    with atomic_path(out_path) as tmp, open(tmp, "w", newline="", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+        w = csv.writer(f, **CSV_WRITE_OPTS)
+        w.writerow(CSV_HEADERS)
+        for c in cases:
+            row = c.to_row()
+            w.writerow([row[h] for h in CSV_HEADERS])
+            n += 1
+    return n
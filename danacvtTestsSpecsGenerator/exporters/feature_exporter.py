@@ -1,14 +1,144 @@
-from typing import List
+import re
+from itertools import groupby
+from typing import Iterable, List, Tuple
 from danacvtTestsSpecsGenerator.models import TestCase
+from danacvtTestsSpecsGenerator.fsutil import atomic_path
 
-def export_feature(cases: List[TestCase], feature_path: str, feature_name: str) -> None:
-    lines = [f"Feature: {feature_name} auto-generated tests",""]
-    for c in cases:
-        lines.append(f"  @auto @{c.type} @priority_{c.priority.lower()}")
-        lines.append(f"  Scenario: {c.title}")
-        lines.append("    Given the system/screen is ready")
-        for s in c.steps:
-            lines.append(f"    When {s.action}" if s.number == 1 else f"    And {s.action}")
-        lines.append(f"    Then {c.expected_result}")
-        lines.append("")
-    Path(feature_path).write_text("\n".join(lines), encoding="utf-8")
\ No newline at end of file
+BUFFER_SIZE = 1 << 16
+_BREAKS = frozenset(" \t\n:;,()")   # placeholders start and end on these
+_TOKEN_RE = re.compile(r"\w+|\s+|[^\w\s]")
+_MAX_SLOTS = 2                        # placeholders per text before falling back to one
+
+def _tags_line(c: TestCase) -> str:
+    return f"  @auto @{c.type} @priority_{c.priority.lower()}"
+
+def _scenario(c: TestCase) -> List[str]:
+    lines = ["", _tags_line(c), f"  Scenario: {c.title}", "    Given the system/screen is ready"]
+    for s in c.steps:
+        lines.append(f"    When {s.action}" if s.number == 1 else f"    And {s.action}")
+    lines.append(f"    Then {c.expected_result}")
+    return lines
+
+def _outline_key(c: TestCase) -> Tuple:
+    """Cases with the same key differ only in their texts (e.g. the below/at/above boundary cases)."""
+    return c.type, c.priority, c.tags, c.trace_to, tuple(s.number for s in c.steps)
+
+def _common_len(a: str, b: str) -> int:
+    """Length of the common prefix of a and b, by bisection on slices."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def _balanced(text: str) -> bool:
+    depth = 0
+    for ch in text:
+        depth += (ch == "(") - (ch == ")")
+        if depth < 0:
+            return False
+    return depth == 0
+
+def _slots(texts: List[str]) -> Tuple[List[str], List[List[str]]]:
+    """Word-by-word template of texts with the same tokens, or ([], []) if they differ in shape."""
+    tokens = [_TOKEN_RE.findall(t) for t in texts]
+    if len({len(t) for t in tokens}) != 1:
+        return [], []
+    runs: List[List[int]] = []   # [start, end) token ranges that differ; only whitespace between merges
+    for j, column in enumerate(zip(*tokens)):
+        if len(set(column)) == 1:
+            continue
+        if runs and all(tokens[0][k].isspace() for k in range(runs[-1][1], j)):
+            runs[-1][1] = j + 1
+        else:
+            runs.append([j, j + 1])
+    parts, slots, at = [], [], 0
+    for a, b in runs:
+        parts.append("".join(tokens[0][at:a]))
+        slots.append(["".join(t[a:b]) for t in tokens])
+        at = b
+    parts.append("".join(tokens[0][at:]))
+    return parts, slots
+
+def _template(texts: List[str]) -> Tuple[List[str], List[List[str]]]:
+    """
+    (literal parts, per-placeholder values): text i is parts[0] + slots[0][i] + parts[1] + ...
+    Texts with the same words get a placeholder per differing run (at most _MAX_SLOTS);
+    otherwise one placeholder between the common prefix and suffix, cut on whole words
+    and punctuation. No value cuts through a bracketed group; if no cut keeps the
+    brackets balanced, the whole text is the value.
+    """
+    parts, slots = _slots(texts)
+    if 0 < len(slots) <= _MAX_SLOTS and all(_balanced(v) for values in slots for v in values):
+        return parts, slots
+    first = texts[0]
+    p = _common_len(min(texts), max(texts))   # the extremes bound the prefix shared by all
+    reverse = [t[::-1] for t in texts]
+    s0 = _common_len(min(reverse), max(reverse))
+    for p in range(p, -1, -1):
+        if p and first[p - 1] not in _BREAKS and not all(p == len(t) or t[p] in _BREAKS for t in texts):
+            continue
+        for s in range(min(s0, min(map(len, texts)) - p), -1, -1):
+            if s and first[-s] not in _BREAKS and not all(s == len(t) or t[-s - 1] in _BREAKS for t in texts):
+                continue
+            middles = [t[p:len(t) - s] for t in texts]
+            if all(map(_balanced, middles)):
+                return [first[:p], first[len(first) - s:]], [middles]
+    return ["", ""], [list(texts)]
+
+def _cell(value: str) -> str:
+    if "|" not in value and "\\" not in value and "\n" not in value:
+        return value
+    return value.replace("\\", "\\\\").replace("|", "\\|").replace("\n", "\\n")
+
+def _outline(cases: List[TestCase]) -> List[str]:
+    """One Scenario Outline for a group of same-shape cases; an Examples row per case, with its ID."""
+    first = cases[0]
+    fields = [("variant", [c.title for c in cases])]
+    fields += [(f"step_{s.number}", [c.steps[i].action for c in cases]) for i, s in enumerate(first.steps)]
+    fields.append(("expected", [c.expected_result for c in cases]))
+
+    columns: List[Tuple[str, List[str]]] = [("id", [c.id for c in cases])]
+    texts = []
+    for name, values in fields:
+        if len(set(values)) == 1:
+            texts.append(values[0])
+            continue
+        parts, slots = _template(values)
+        text = parts[0]
+        for k, middles in enumerate(slots):
+            same = next((n for n, v in columns if v == middles), None)   # e.g. the role in title and step 2
+            if same is None:
+                same = name if k == 0 else f"{name}_{k + 1}"
+                columns.append((same, middles))
+            text += f"<{same}>{parts[k + 1]}"
+        texts.append(text)
+
+    lines = ["", _tags_line(first), f"  Scenario Outline: {texts[0]}", "    Given the system/screen is ready"]
+    for s, text in zip(first.steps, texts[1:-1]):
+        lines.append(f"    When {text}" if s.number == 1 else f"    And {text}")
+    lines += [f"    Then {texts[-1]}", "", "    Examples:"]
+    lines.append("      | " + " | ".join(name for name, _ in columns) + " |")
+    for row in zip(*(values for _, values in columns)):
+        lines.append("      | " + " | ".join(_cell(v) for v in row) + " |")
+    return lines
+
+def export_feature(cases: Iterable[TestCase], feature_path: str, feature_name: str, outline: bool = False) -> int:
+    """
+    Write cases as one Gherkin feature, scenario by scenario (any iterable). Returns the case count.
+    outline=True folds runs of consecutive cases that share a step template (boundary
+    values, permission roles) into a Scenario Outline with one Examples row per case.
+    """
+    n = 0
+    with atomic_path(feature_path) as tmp, open(tmp, "w", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+        f.write(f"Feature: {feature_name} auto-generated tests\n")
+        groups = groupby(cases, key=_outline_key) if outline else ((None, [c]) for c in cases)
+        for _, group in groups:
+            group = list(group)
+            lines = _outline(group) if len(group) > 1 else _scenario(group[0])
+            f.write("\n".join(lines) + "\n")
+            n += len(group)
+    return n
@@ -0,0 +1,27 @@
+"""
+Test cases as JSON Lines: one TestCase.to_dict() object per line, lossless
+(structured steps, lists kept as lists). A .gz / .zst / .zstd suffix compresses
+the file. Read it back with parsers.jsonl_loader.read_cases_jsonl; --file
+accepts it as input to the CSV / feature exports and the merges.
+"""
+import json
+from typing import Iterable
+from danacvtTestsSpecsGenerator.models import TestCase
+from danacvtTestsSpecsGenerator.fsutil import atomic_path, compression_of, open_text
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst", ".jsonl.zstd")
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+def is_jsonl(path: str) -> bool:
+    return path.lower().endswith(JSONL_SUFFIXES)
+
+def export_jsonl(cases: Iterable[TestCase], out_path: str) -> int:
+    """Write cases one line at a time (any iterable); returns the count."""
+    n = 0
+    with atomic_path(out_path) as tmp, open_text(tmp, "w", compression=compression_of(out_path)) as f:
+        for c in cases:
+            f.write(_encode(c.to_dict()))
+            f.write("\n")
+            n += 1
+    return n
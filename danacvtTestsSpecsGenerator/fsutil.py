@@ -0,0 +1,107 @@
+"""
+Atomic file replacement for outputs that other tools (or a --watch loop) may
+be reading while we write them: the new content goes to a temp file next to
+the target, which then replaces it with os.replace(). Readers see either the
+old file or the new one, never a half-written one. When the new content is
+byte-identical to the existing file, the file is left alone (mtime included),
+so watchers and caches downstream do not see a change that is not there.
+
+open_text() opens text files that may be gzip- or zstd-compressed.
+"""
+from __future__ import annotations
+
+import filecmp
+import gzip
+import io
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def _same_file_content(a: str, b: str) -> bool:
+    try:
+        return os.path.getsize(a) == os.path.getsize(b) and filecmp.cmp(a, b, shallow=False)
+    except OSError:
+        return False
+
+
+@contextmanager
+def atomic_path(path: PathLike, skip_unchanged: bool = True) -> Iterator[str]:
+    """
+    Yield a temp path to write instead of `path`. If the block succeeds, the
+    temp file replaces `path` (keeping its permissions), unless it has the same
+    bytes as `path` and skip_unchanged is set; otherwise it is removed.
+    """
+    path = os.fspath(path)
+    tmp = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        yield tmp
+        if os.path.exists(path):
+            if skip_unchanged and _same_file_content(path, tmp):
+                os.unlink(tmp)
+                return
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def atomic_write_text(path: PathLike, text: str, encoding: str = "utf-8") -> None:
+    with atomic_path(path) as tmp:
+        Path(tmp).write_text(text, encoding=encoding)
+
+
+class _GzipWriter(gzip.GzipFile):
+    """gzip output without a file name or timestamp in the header: same text, same bytes."""
+
+    def __init__(self, path: str, compresslevel: int = 6):
+        self._raw = open(path, "wb")
+        super().__init__(filename="", mode="wb", compresslevel=compresslevel, fileobj=self._raw, mtime=0)
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+def compression_of(path: PathLike) -> Optional[str]:
+    """"gzip" for .gz, "zstd" for .zst/.zstd, else None."""
+    suffix = Path(os.fspath(path)).suffix.lower()
+    return {".gz": "gzip", ".zst": "zstd", ".zstd": "zstd"}.get(suffix)
+
+
+def open_text(path: PathLike, mode: str = "r", compression: Optional[str] = "auto",
+              encoding: str = "utf-8", buffering: int = 1 << 16) -> IO[str]:
+    """
+    Open a text file for "r" or "w", compressed by its suffix (compression="auto")
+    or as given ("gzip", "zstd", None); pass it explicitly for atomic_path temp
+    names. zstd uses compression.zstd (Python 3.14+) or the zstandard package.
+    """
+    if compression == "auto":
+        compression = compression_of(path)
+    path = os.fspath(path)
+    if compression is None:
+        return open(path, mode, encoding=encoding, newline="", buffering=buffering)
+    if compression == "gzip":
+        raw = _GzipWriter(path) if "w" in mode else gzip.open(path, mode + "b")
+    elif compression == "zstd":
+        try:
+            from compression import zstd   # Python 3.14+
+            raw = zstd.open(path, mode + "b")
+        except ImportError:
+            try:
+                import zstandard
+            except Exception:
+                raise RuntimeError("zstandard not installed (pip install zstandard) — needed for .zst files.")
+            raw = zstandard.open(path, mode + "b")
+    else:
+        raise ValueError(f"Unknown compression: {compression!r}")
+    return io.TextIOWrapper(raw, encoding=encoding, newline="")
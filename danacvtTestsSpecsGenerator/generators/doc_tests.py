@@ -1,6 +1,7 @@
 import re
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
-from danacvtTestsSpecsGenerator.models import TestCase, TestStep, mk_id, truncate
+from danacvtTestsSpecsGenerator.models import TestCase, TestStep, assign_ids, mk_id, truncate
 from ..parsers.docs_loader import extract_requirements
 from datetime import datetime
 
@@ -24,15 +25,26 @@ def detect_permissions(text: str) -> bool:
 def find_numeric_bounds(text: str) -> List[int]:
     return [int(m.group(1)) for m in re.finditer(BOUNDARY_NUM_PAT, text)]
 
-def base_steps_for_requirement(req: str, scope: str) -> List[TestStep]:
-    return [
-        TestStep(1, "Launch the application"),
-        TestStep(2, f"Navigate to: {scope}"),
+LAUNCH_STEP = TestStep(1, "Launch the application")
+
+@lru_cache(maxsize=64)
+def _navigate_step(scope: str) -> TestStep:
+    return TestStep(2, f"Navigate to: {scope}")
+
+@lru_cache(maxsize=256)
+def base_steps_for_requirement(req: str, scope: str) -> Tuple[TestStep, ...]:
+    # cached: every case of a requirement shares these (immutable) step objects
+    return (
+        LAUNCH_STEP,
+        _navigate_step(scope),
         TestStep(3, f"Perform action implied by: \"{truncate(req, 100)}\""),
-    ]
+    )
+
+OBSERVE_STEP = TestStep(4, "Observe system behavior")
+INVALID_INPUT_STEP = TestStep(4, "Provide invalid/forbidden inputs")
 
 def gen_functional(req_id: str, req_text: str, scope: str, tags: List[str]) -> TestCase:
-    steps = base_steps_for_requirement(req_text, scope) + [TestStep(4, "Observe system behavior")]
+    steps = base_steps_for_requirement(req_text, scope) + (OBSERVE_STEP,)
     return TestCase(
         id=mk_id(),
         title=f"Verify {req_id}: {truncate(req_text, 60)}",
@@ -49,7 +61,7 @@ def gen_functional(req_id: str, req_text: str, scope: str, tags: List[str]) -> T
 def gen_negative(req_id: str, req_text: str, scope: str, tags: List[str]) -> Optional[TestCase]:
     lower = req_text.lower()
     if any(w in lower for w in ["must","shall","should"," not ","prevent","deny","unauthorized","invalid"]):
-        steps = base_steps_for_requirement(req_text, scope) + [TestStep(4, "Provide invalid/forbidden inputs")]
+        steps = base_steps_for_requirement(req_text, scope) + (INVALID_INPUT_STEP,)
         return TestCase(
             id=mk_id(),
             title=f"Negative: {truncate(req_text, 60)}",
@@ -70,9 +82,9 @@ def gen_boundaries(req_id: str, req_text: str, scope: str, tags: List[str]) -> L
         for delta, label in [(-1,"below"),(0,"at"),(1,"above")]:
             if n+delta < 0: 
                 continue
-            steps = base_steps_for_requirement(req_text, scope) + [
-                TestStep(4, f"Use boundary value {n+delta} (one {label} {n})")
-            ]
+            steps = base_steps_for_requirement(req_text, scope) + (
+                TestStep(4, f"Use boundary value {n+delta} (one {label} {n})"),
+            )
             out.append(TestCase(
                 id=mk_id(),
                 title=f"Boundary {label} {n}: {truncate(req_text, 50)}",
@@ -91,15 +103,15 @@ def gen_permissions(req_id: str, req_text: str, scope: str, tags: List[str]) ->
     if not detect_permissions(req_text):
         return []
     out: List[TestCase] = []
+    # steps are immutable: the role step goes in at 2, the rest shift by one
+    base = base_steps_for_requirement(req_text, scope)
+    shifted = tuple(TestStep(s.number + 1, s.action, s.data) for s in base[1:])
     for role, expect in [
         ("Admin user","Operation succeeds for admin"),
         ("Standard user","Operation blocked/limited for standard user (if restricted)"),
         ("Unauthenticated user","Operation denied with proper error"),
     ]:
-        steps = base_steps_for_requirement(req_text, scope)
-        steps.insert(1, TestStep(2, f"Authenticate as {role}"))
-        for i, s in enumerate(steps, start=1):
-            s.number = i
+        steps = (base[0], TestStep(2, f"Authenticate as {role}")) + shifted
         out.append(TestCase(
             id=mk_id(),
             title=f"Permissions: {role} — {truncate(req_text, 45)}",
@@ -114,34 +126,30 @@ def gen_permissions(req_id: str, req_text: str, scope: str, tags: List[str]) ->
         ))
     return out
 
+def generate_cases_for_requirement(
+    req_id: str,
+    req_text: str,
+    scope: str,
+    tags: Optional[List[str]] = None,
+    max_per_req: int = 10
+) -> List[TestCase]:
+    """Cases for one requirement, capped at max_per_req (IDs are placeholders until assign_ids)."""
+    tags = tags or []
+    cases: List[TestCase] = [gen_functional(req_id, req_text, scope, tags)]
+    neg = gen_negative(req_id, req_text, scope, tags)
+    if neg:
+        cases.append(neg)
+    cases.extend(gen_boundaries(req_id, req_text, scope, tags))
+    cases.extend(gen_permissions(req_id, req_text, scope, tags))
+    return cases[:max_per_req] if max_per_req else cases
+
 def generate_test_cases_from_text(
     raw_text: str,
     scope: str,
     tags: Optional[List[str]] = None,
     max_per_req: int = 10
 ) -> List[TestCase]:
-    tags = tags or []
     cases: List[TestCase] = []
-
     for req_id, req_text in extract_requirements(raw_text):
-        cases.append(gen_functional(req_id, req_text, scope, tags))
-        neg = gen_negative(req_id, req_text, scope, tags)
-        if neg:
-            cases.append(neg)
-        cases.extend(gen_boundaries(req_id, req_text, scope, tags))
-        cases.extend(gen_permissions(req_id, req_text, scope, tags))
-
-        if max_per_req:
-            # cap per requirement
-            per_req = [c for c in cases if c.trace_to == req_id]
-            if len(per_req) > max_per_req:
-                keep, seen = [], 0
-                for c in cases:
-                    if c.trace_to == req_id:
-                        if seen < max_per_req:
-                            keep.append(c); seen += 1
-                    else:
-                        keep.append(c)
-                cases = keep
-
-    return cases
\ No newline at end of file
+        cases.extend(generate_cases_for_requirement(req_id, req_text, scope, tags, max_per_req))
+    return assign_ids(cases, scope)
@@ -0,0 +1,266 @@
+"""
+Pluggable LLM backend. Every chat completion in llm/ goes through chat_completion().
+
+Mode is chosen with DANACVT_LLM_MODE:
+- live    (default) OpenAI SDK client; honours OPENAI_BASE_URL / OPENAI_API_KEY
+- record  like live, and every response is saved to the fixture directory
+- replay  answers from the fixture directory only; no SDK, key or network needed
+- http    minimal urllib client for any OpenAI-compatible server at OPENAI_BASE_URL
+          (e.g. llm/stub_server.py), so the SDK is not needed either
+
+Live/record/http calls run under the deadline and hedging policy of
+llm.latency and are timed per stage; every call is logged to llm.ledger.
+
+Independently of the mode, llm.batch can take over: requests are then written
+to / answered from Batch API JSONL files (see llm/batch.py).
+
+enable_memo() adds an in-process memo on top of any mode: a repeated identical
+request is answered from memory (used by --watch, where most prompts repeat
+between re-runs and only the ones built from changed inputs differ).
+
+Fixtures live in DANACVT_LLM_FIXTURES (default: llm_fixtures/), one JSON file per
+request, named by a hash of the request body, so replays are deterministic.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from . import batch, ledger
+from .. import profiling
+from .latency import run_with_policy
+
+MODES = ("live", "record", "replay", "http")
+DEFAULT_FIXTURES_DIR = "llm_fixtures"
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+_memo: Optional["OrderedDict[str, Any]"] = None  # request key → response, when enabled
+_memo_size = 0
+_memo_lock = threading.Lock()
+
+
+class FixtureMissing(RuntimeError):
+    pass
+
+
+def llm_mode() -> str:
+    mode = os.getenv("DANACVT_LLM_MODE", "live").strip().lower() or "live"
+    if mode not in MODES:
+        raise RuntimeError(f"DANACVT_LLM_MODE must be one of {', '.join(MODES)} (got {mode!r})")
+    return mode
+
+
+def fixtures_dir() -> Path:
+    return Path(os.getenv("DANACVT_LLM_FIXTURES", DEFAULT_FIXTURES_DIR))
+
+
+def _openai_class():
+    """The SDK client class, imported on first use (it is slow to import); None if not installed."""
+    try:
+        from openai import OpenAI
+    except Exception:
+        return None
+    return OpenAI
+
+
+def unavailable_reason() -> Optional[str]:
+    """Why LLM calls cannot run in the current mode, or None if they can."""
+    mode = llm_mode()
+    if mode == "replay" or batch.active():
+        return None
+    if mode == "http":
+        return None if os.getenv("OPENAI_BASE_URL") else "OPENAI_BASE_URL not set (required in http mode)"
+    if _openai_class() is None:
+        return "openai package not installed. pip install openai"
+    if not os.getenv("OPENAI_API_KEY"):
+        return "OPENAI_API_KEY not set"
+    return None
+
+
+def require_llm() -> None:
+    reason = unavailable_reason()
+    if reason:
+        raise RuntimeError(reason)
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Stable hash of a chat.completions request body."""
+    blob = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _to_ns(value: Any) -> Any:
+    """JSON → attribute access, so replayed responses look like SDK objects."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_ns(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_ns(v) for v in value]
+    return value
+
+
+def _to_dict(resp: Any) -> Dict[str, Any]:
+    for attr in ("model_dump", "to_dict", "dict"):
+        fn = getattr(resp, attr, None)
+        if callable(fn):
+            return fn()
+    raise TypeError(f"Cannot serialize response of type {type(resp).__name__}")
+
+
+def _redact(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of the request with inline images replaced by their hash (keeps fixtures small)."""
+    def walk(v):
+        if isinstance(v, dict):
+            return {k: walk(x) for k, x in v.items()}
+        if isinstance(v, list):
+            return [walk(x) for x in v]
+        if isinstance(v, str) and v.startswith("data:") and ";base64," in v:
+            return f"{v.split(';', 1)[0]};sha256={hashlib.sha256(v.encode()).hexdigest()}"
+        return v
+    return walk(request)
+
+
+class _HttpClient:
+    """Just enough of the OpenAI client surface for chat.completions.create over urllib."""
+
+    def __init__(self, base_url: str, api_key: str, timeout: Optional[float] = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **request):
+        import urllib.error
+        import urllib.request
+
+        timeout = request.pop("timeout", None) or self.timeout
+        req = urllib.request.Request(
+            f"{self.base_url}/chat/completions",
+            data=json.dumps(request).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as r:
+                return _to_ns(json.loads(r.read().decode("utf-8")))
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"LLM HTTP {e.code}: {e.read()[:200]!r}") from e
+
+
+def get_client(mode: Optional[str] = None):
+    """Shared client for the mode (created once per process)."""
+    mode = mode or llm_mode()
+    kind = "http" if mode == "http" else "sdk"
+    with _clients_lock:
+        client = _clients.get(kind)
+        if client is None:
+            require_llm()
+            if kind == "http":
+                client = _HttpClient(os.environ["OPENAI_BASE_URL"], os.getenv("OPENAI_API_KEY", "stub"))
+            else:
+                client = _openai_class()()
+            _clients[kind] = client
+        return client
+
+
+def enable_memo(max_entries: int = 1024) -> None:
+    """Answer repeated identical requests from memory (LRU of max_entries; 0 disables)."""
+    global _memo, _memo_size
+    with _memo_lock:
+        _memo = OrderedDict() if max_entries > 0 else None
+        _memo_size = max_entries
+
+
+def _memo_get(key: str):
+    with _memo_lock:
+        if _memo is None or key not in _memo:
+            return None
+        _memo.move_to_end(key)
+        return _memo[key]
+
+
+def _memo_put(key: str, resp: Any) -> None:
+    with _memo_lock:
+        if _memo is None:
+            return
+        _memo[key] = resp
+        while len(_memo) > _memo_size:
+            _memo.popitem(last=False)
+
+
+def _replay(key: str):
+    p = fixtures_dir() / f"{key}.json"
+    if not p.exists():
+        raise FixtureMissing(f"No LLM fixture for request {key[:12]}… in {fixtures_dir()} (record it first)")
+    return _to_ns(json.loads(p.read_text(encoding="utf-8"))["response"])
+
+
+def _record(key: str, stage: str, request: Dict[str, Any], resp: Any) -> None:
+    d = fixtures_dir()
+    d.mkdir(parents=True, exist_ok=True)
+    payload = {"stage": stage, "request": _redact(request), "response": _to_dict(resp)}
+    tmp = d / f"{key}.json.tmp{os.getpid()}.{threading.get_ident()}"
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, d / f"{key}.json")
+
+
+def chat_completion(stage: str = "llm", scope: str = "", **request):
+    """
+    Run one chat.completions request through the configured backend.
+    `stage` names the calling pipeline step (booster, ui_spec, flow_spec, ...);
+    `stage` and `scope` label the call in the usage ledger and the profile trace.
+    """
+    with profiling.stage(f"llm:{stage}", scope=scope):
+        return _chat_completion(stage, scope, request)
+
+
+def _chat_completion(stage: str, scope: str, request: Dict[str, Any]):
+    mode = llm_mode()
+    key = request_key(request)
+    model = request.get("model", "")
+    if batch.active():
+        cid = batch.custom_id(stage, key)
+        body = batch.lookup(cid)
+        if body is None:
+            ledger.record(stage, scope, model, key, 0.0, mode="batch", status="deferred")
+            batch.defer(cid, request)
+        resp = _to_ns(body)
+        _memo_put(key, resp)   # later runs in this process (e.g. --watch) need no batch round
+        ledger.record(stage, scope, model, key, 0.0, resp, cache="hit", mode="batch")
+        return resp
+
+    resp = _memo_get(key)
+    if resp is not None:
+        ledger.record(stage, scope, model, key, 0.0, resp, cache="hit", mode="memo")
+        return resp
+
+    start = time.perf_counter()
+    try:
+        if mode == "replay":
+            resp = _replay(key)
+        else:
+            client = get_client(mode)
+
+            def attempt(timeout: Optional[float]):
+                if timeout is None:
+                    return client.chat.completions.create(**request)
+                return client.chat.completions.create(**request, timeout=timeout)
+
+            resp = run_with_policy(stage, attempt)
+    except Exception:
+        ledger.record(stage, scope, model, key, time.perf_counter() - start, mode=mode, status="error")
+        raise
+    ledger.record(stage, scope, model, key, time.perf_counter() - start, resp,
+                  cache="hit" if mode == "replay" else "miss", mode=mode)
+    if mode == "record":
+        _record(key, stage, request, resp)
+    _memo_put(key, resp)
+    return resp
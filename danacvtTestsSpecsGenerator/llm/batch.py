@@ -0,0 +1,142 @@
+"""
+Offline batch jobs for the LLM stages.
+
+Write half: with an output file configured, every LLM request is appended as an
+OpenAI Batch API line instead of being sent,
+
+    {"custom_id": "<stage>-<request hash>", "method": "POST",
+     "url": "/v1/chat/completions", "body": {...}}
+
+and the stage is skipped for this run (BatchDeferred). custom_id is derived
+from the request body, so it is stable across runs.
+
+Ingest half: with a results file configured (Batch API output JSONL), requests
+are answered from it by custom_id, and the pipeline writes the same CSV /
+Markdown outputs as the live path. Requests that have no result yet are
+deferred to the output file when one is set. This lets multi-round stages
+(e.g. hierarchical flow specs: per-screen summaries first, then the reduce)
+finish over several submit/ingest rounds.
+
+    danacvt-gen ... --llm-batch-out batch_in.jsonl
+    # submit batch_in.jsonl, download results
+    danacvt-gen ... --llm-batch-results batch_out.jsonl [--llm-batch-out round2.jsonl]
+
+For local testing without network, `simulate` answers a request file with
+the stub server's canned replies:
+
+    python -m danacvtTestsSpecsGenerator.llm.batch simulate batch_in.jsonl batch_out.jsonl
+
+benchmarks/check_batch_roundtrip.py runs both halves against a results fixture.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+BATCH_URL = "/v1/chat/completions"
+
+_lock = threading.Lock()
+_out_path: Optional[Path] = None
+_written: Set[str] = set()
+_results: Optional[Dict[str, Dict[str, Any]]] = None
+deferred_count = 0
+
+
+class BatchDeferred(RuntimeError):
+    pass
+
+
+def configure(out_path: Optional[str] = None, results_path: Optional[str] = None) -> None:
+    global _out_path, _results, deferred_count
+    _out_path = Path(out_path) if out_path else None
+    _results = load_results(results_path) if results_path else None
+    _written.clear()
+    deferred_count = 0
+    if _out_path and _out_path.exists():
+        # appending to an existing request file: don't repeat its custom_ids
+        with _out_path.open("r", encoding="utf-8") as f:
+            _written.update(json.loads(line)["custom_id"] for line in f if line.strip())
+
+
+def active() -> bool:
+    return _out_path is not None or _results is not None
+
+
+def custom_id(stage: str, key: str) -> str:
+    return f"{stage}-{key[:32]}"
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """custom_id → output line, from a Batch API results JSONL."""
+    out: Dict[str, Dict[str, Any]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                out[item["custom_id"]] = item
+    return out
+
+
+def lookup(cid: str) -> Optional[Dict[str, Any]]:
+    """Response body for custom_id, None if there is no result yet; raises for failed requests."""
+    if _results is None or cid not in _results:
+        return None
+    item = _results[cid]
+    response = item.get("response") or {}
+    if item.get("error") or response.get("status_code", 200) >= 400:
+        raise RuntimeError(f"Batch request {cid} failed: {item.get('error') or response.get('body')}")
+    return response.get("body")
+
+
+def defer(cid: str, request: Dict[str, Any]) -> None:
+    """Queue the request in the batch file (once) and raise BatchDeferred."""
+    global deferred_count
+    if _out_path is None:
+        raise RuntimeError(f"No batch result for {cid} and no --llm-batch-out to defer it to")
+    with _lock:
+        if cid not in _written:
+            _out_path.parent.mkdir(parents=True, exist_ok=True)
+            line = {"custom_id": cid, "method": "POST", "url": BATCH_URL, "body": request}
+            with _out_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            _written.add(cid)
+            deferred_count += 1
+    raise BatchDeferred(f"deferred to batch file {_out_path} as {cid}")
+
+
+def simulate(requests_path: str, results_path: str) -> int:
+    """Answer a batch request file with canned stub replies (local testing)."""
+    from .stub_server import _completion, canned_reply
+
+    n = 0
+    with open(requests_path, "r", encoding="utf-8") as src, open(results_path, "w", encoding="utf-8") as dst:
+        for line in src:
+            if not line.strip():
+                continue
+            req = json.loads(line)
+            body = _completion(req["body"], canned_reply(req["body"]))
+            dst.write(json.dumps({"id": f"batch_req_{n}", "custom_id": req["custom_id"],
+                                  "response": {"status_code": 200, "request_id": f"req_{n}", "body": body},
+                                  "error": None}) + "\n")
+            n += 1
+    return n
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser("danacvt-batch")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sim = sub.add_parser("simulate", help="Write canned results for a batch request file")
+    sim.add_argument("requests")
+    sim.add_argument("results")
+    args = ap.parse_args(argv)
+    n = simulate(args.requests, args.results)
+    print(f"✅ Wrote {n} simulated results → {args.results}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Map-reduce wrapper around llm_boosted_cases for contexts larger than one prompt.
+
+- split: the context is cut on screen markers ("[Screen N]") or requirement
+  boundaries (blank lines, headings, bullets, numbered items) and packed into
+  chunks under a token budget
+- map: each chunk is boosted concurrently
+- reduce: ideas are merged, near-duplicate titles are dropped, and every case
+  keeps trace_to pointing at the chunk(s) it came from
+"""
+from __future__ import annotations
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from ..config import DEFAULT_CHUNK_TOKENS, DEFAULT_CONCURRENCY, DEFAULT_MAX_BOOSTED
+from ..models import TestCase
+from .booster import llm_boosted_cases
+from .tokens import estimate_tokens
+
+SCREEN_MARK_RE = re.compile(r"^\[Screen (\d+)\]\s*$", re.M)
+REQ_BOUNDARY_RE = re.compile(r"^\s*(#{1,6}\s|[-*•]\s|\d+[.)]\s|REQ-\d+)")
+
+
+def _screen_units(text: str) -> List[Tuple[str, str]]:
+    """[Screen N] blocks → (label, text). Text before the first marker is a preamble unit."""
+    marks = list(SCREEN_MARK_RE.finditer(text))
+    units = []
+    head = text[:marks[0].start()].strip()
+    if head:
+        units.append(("preamble", head))
+    for i, m in enumerate(marks):
+        end = marks[i + 1].start() if i + 1 < len(marks) else len(text)
+        units.append((f"Screen {m.group(1)}", text[m.start():end].strip()))
+    return units
+
+
+def _requirement_units(text: str) -> List[Tuple[str, str]]:
+    """Paragraph / heading / bullet blocks → ("lines a-b", text)."""
+    units = []
+    buf: List[str] = []
+    start = 1
+    for ln, line in enumerate(text.splitlines(), start=1):
+        boundary = not line.strip() or REQ_BOUNDARY_RE.match(line)
+        if boundary and buf:
+            units.append((f"lines {start}-{ln - 1}", "\n".join(buf)))
+            buf = []
+        if line.strip():
+            if not buf:
+                start = ln
+            buf.append(line)
+    if buf:
+        units.append((f"lines {start}-{start + len(buf) - 1}", "\n".join(buf)))
+    return units
+
+
+def _hard_split(label: str, text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """Split one oversized unit on lines (then characters) so no piece exceeds the budget."""
+    pieces, buf, used = [], [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line)
+        if cost > max_tokens:
+            step = max(1, len(line) * max_tokens // cost)
+            parts = [line[i:i + step] for i in range(0, len(line), step)]
+        else:
+            parts = [line]
+        for part in parts:
+            cost = estimate_tokens(part)
+            if buf and used + cost > max_tokens:
+                pieces.append("\n".join(buf))
+                buf, used = [], 0
+            buf.append(part)
+            used += cost
+    if buf:
+        pieces.append("\n".join(buf))
+    if len(pieces) == 1:
+        return [(label, pieces[0])]
+    return [(f"{label} part {i + 1}", p) for i, p in enumerate(pieces)]
+
+
+def split_context(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[Tuple[str, str]]:
+    """
+    Pack the context into (label, chunk_text) pieces of at most ~max_tokens each.
+    Labels name the screens or source line ranges a chunk covers.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    units = _screen_units(text) if SCREEN_MARK_RE.search(text) else _requirement_units(text)
+
+    chunks: List[Tuple[str, str]] = []
+    labels: List[str] = []
+    buf: List[str] = []
+    used = 0
+
+    def flush():
+        if buf:
+            chunks.append((_join_labels(labels), "\n\n".join(buf)))
+            labels.clear()
+            buf.clear()
+
+    for label, unit in units:
+        cost = estimate_tokens(unit)
+        if cost > max_tokens:
+            flush()
+            used = 0
+            chunks.extend(_hard_split(label, unit, max_tokens))
+            continue
+        if buf and used + cost > max_tokens:
+            flush()
+            used = 0
+        buf.append(unit)
+        labels.append(label)
+        used += cost
+    flush()
+    return chunks
+
+
+def _join_labels(labels: List[str]) -> str:
+    if len(labels) == 1:
+        return labels[0]
+    first, last = labels[0], labels[-1]
+    if first.startswith("lines ") and last.startswith("lines "):
+        return f"lines {first.split(' ', 1)[1].split('-')[0]}-{last.rsplit('-', 1)[1]}"
+    if first.startswith("Screen ") and last.startswith("Screen "):
+        return f"Screens {first.split(' ', 1)[1]}-{last.split(' ', 1)[1]}"
+    return f"{first} … {last}"
+
+
+def _title_key(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", title.casefold()).strip()
+
+
+def _similar(a: str, b: str, threshold: float = 0.8) -> bool:
+    wa, wb = set(a.split()), set(b.split())
+    if not wa or not wb:
+        return a == b
+    return len(wa & wb) / len(wa | wb) >= threshold
+
+
+def reduce_ideas(batches: List[List[TestCase]], max_total: Optional[int] = None) -> List[TestCase]:
+    """
+    Merge per-chunk results in chunk order. A case whose title matches (or nearly
+    matches) an earlier one is dropped and its chunk is added to the survivor's trace_to.
+    max_total caps the result round-robin over the chunks (each chunk's first
+    ideas before any chunk's later ones), so every part of the context is covered.
+    """
+    merged: List[TestCase] = []
+    keys: List[str] = []
+    rank: List[tuple] = []   # (position among its chunk's survivors, chunk)
+    for b, batch in enumerate(batches):
+        n = 0
+        for case in batch:
+            key = _title_key(case.title)
+            dup = next((i for i, k in enumerate(keys) if k == key or _similar(k, key)), None)
+            if dup is None:
+                merged.append(case)
+                keys.append(key)
+                rank.append((n, b))
+                n += 1
+                continue
+            kept = merged[dup]
+            if case.trace_to and case.trace_to not in (kept.trace_to or "").split("; "):
+                kept.trace_to = f"{kept.trace_to}; {case.trace_to}" if kept.trace_to else case.trace_to
+    if not max_total or len(merged) <= max_total:
+        return merged
+    keep = set(sorted(range(len(merged)), key=rank.__getitem__)[:max_total])
+    return [c for i, c in enumerate(merged) if i in keep]
+
+
+def llm_boosted_cases_chunked(
+    scope: str,
+    context_text: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    max_ideas: int = 6,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    instructions: str = "",
+    max_total: int = DEFAULT_MAX_BOOSTED,
+) -> List[TestCase]:
+    """
+    Boost a context of any size. Contexts that fit in one chunk take the plain
+    single-request path; larger ones are boosted chunk by chunk in parallel
+    (up to `concurrency` requests in flight) and reduced into one list.
+    `instructions` is prepended to every chunk (e.g. the multi-screen flow preamble).
+    `max_ideas` applies per chunk; `max_total` caps the reduced list (0 = no cap).
+    """
+    prefix = f"{instructions.strip()}\n\n" if instructions.strip() else ""
+    chunks = split_context(context_text, chunk_tokens) if chunk_tokens else []
+    if len(chunks) <= 1:
+        return llm_boosted_cases(
+            scope=scope,
+            context_text=prefix + context_text,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            max_ideas=max_ideas,
+        )
+
+    print(f"[LLM] Booster context split into {len(chunks)} chunks (≤{chunk_tokens} tokens, {concurrency} concurrent).")
+
+    def run(chunk: Tuple[str, str]) -> List[TestCase]:
+        label, text = chunk
+        return llm_boosted_cases(
+            scope=scope,
+            context_text=f"{prefix}[Context part: {label}]\n{text}",
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            max_ideas=max_ideas,
+            trace_to=f"{scope} — {label}",
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        batches = list(pool.map(run, chunks))
+
+    merged = reduce_ideas(batches, max_total)
+    print(f"[LLM] Reduced {sum(len(b) for b in batches)} chunk ideas → {len(merged)} unique cases.")
+    return merged
+
+
+def llm_boosted_units(
+    scope: str,
+    units: List[Tuple[str, str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    max_ideas: int = 6,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    instructions: str = "",
+    trace_labels: bool = True,
+) -> List[Tuple[List[str], List[TestCase]]]:
+    """
+    Boost independent units (key, label, text), e.g. requirements or screens,
+    packed in order into chunks of ≤chunk_tokens. Returns (unit keys, cases)
+    per chunk and does not reduce, so callers can cache results per chunk
+    (see manifest.RunManifest). A unit larger than a chunk is boosted on its
+    own through llm_boosted_cases_chunked. trace_labels=False keeps trace_to
+    at the scope (for labels that are positions and may shift between runs).
+    """
+    prefix = f"{instructions.strip()}\n\n" if instructions.strip() else ""
+    groups: List[List[Tuple[str, str, str]]] = []
+    used = 0
+    for unit in units:
+        cost = estimate_tokens(unit[2])
+        if not groups or not chunk_tokens or used + cost > chunk_tokens:
+            groups.append([])
+            used = 0
+        groups[-1].append(unit)
+        used += cost
+
+    def run(group: List[Tuple[str, str, str]]) -> Tuple[List[str], List[TestCase]]:
+        keys = [k for k, _, _ in group]
+        text = "\n\n".join(t for _, _, t in group)
+        if chunk_tokens and estimate_tokens(text) > chunk_tokens:
+            return keys, llm_boosted_cases_chunked(
+                scope=scope, context_text=text, model=model, temperature=temperature, max_tokens=max_tokens,
+                max_ideas=max_ideas, chunk_tokens=chunk_tokens, concurrency=1, instructions=instructions,
+                max_total=0,   # the caller reduces (and caps) all chunks together
+            )
+        label = _join_labels([l for _, l, _ in group])
+        return keys, llm_boosted_cases(
+            scope=scope,
+            context_text=f"{prefix}[Context part: {label}]\n{text}",
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            max_ideas=max_ideas,
+            trace_to=f"{scope} — {label}" if trace_labels else None,
+        )
+
+    if not groups:
+        return []
+    if len(groups) > 1:
+        print(f"[LLM] Boosting {len(units)} units in {len(groups)} chunks (≤{chunk_tokens} tokens, {concurrency} concurrent).")
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(groups)))) as pool:
+        return list(pool.map(run, groups))
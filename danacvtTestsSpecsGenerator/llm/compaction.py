@@ -0,0 +1,139 @@
+"""
+Prompt context compaction for OCR-derived text.
+
+OCR of a multi-screen flow repeats the same status bar, navigation bar and
+headers on every screen, plus noise lines. Before building a prompt:
+- noise lines (no real words) are dropped,
+- lines that repeat across screens are moved into one "common chrome" block,
+- the remaining per-screen text is fitted into a token budget, sharing the
+  budget fairly between screens.
+Low-confidence words are dropped earlier, at OCR time (parsers.ocr min_conf).
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .tokens import estimate_tokens
+
+# A line is chrome when it appears on at least this share of the screens (and on 2+ screens).
+CHROME_MIN_SHARE = 0.5
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]{2,}")
+
+
+@dataclass
+class CompactedContext:
+    screens: List[str]
+    common_chrome: List[str] = field(default_factory=list)
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    def render(self) -> str:
+        """Prompt text: the shared chrome block (if any) followed by [Screen N] blocks."""
+        parts = []
+        if self.common_chrome:
+            parts.append("[Common chrome — present on most screens]\n" + "\n".join(self.common_chrome))
+        if len(self.screens) == 1 and not self.common_chrome:
+            parts.append(self.screens[0])
+        else:
+            parts.extend(f"[Screen {i+1}]\n{txt}" for i, txt in enumerate(self.screens))
+        return "\n\n".join(parts)
+
+    def report(self) -> str:
+        saved = self.tokens_before - self.tokens_after
+        pct = (100.0 * saved / self.tokens_before) if self.tokens_before else 0.0
+        return (f"[LLM] Context compaction: {self.tokens_before} → {self.tokens_after} tokens "
+                f"(-{pct:.0f}%, {len(self.common_chrome)} chrome lines)")
+
+
+def _norm(line: str) -> str:
+    return re.sub(r"\s+", " ", line).strip().casefold()
+
+
+def _is_noise(line: str) -> bool:
+    return not _WORD_RE.search(line)
+
+
+def _fit(lines: List[str], budget: int) -> List[str]:
+    """Keep leading lines that fit in `budget` tokens; note how many were cut."""
+    kept, used = [], 0
+    for i, line in enumerate(lines):
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            kept.append(f"…({len(lines) - i} more lines truncated)")
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def _screen_lines(text: str) -> List[str]:
+    """The screen's lines without blanks, noise and repeats."""
+    seen = set()
+    lines = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        key = _norm(line)
+        if not line or _is_noise(line) or key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return lines
+
+
+def clean_screen(text: str, token_budget: Optional[int] = None) -> str:
+    """
+    One screen's text with noise filtering only (chrome stays), fitted into
+    token_budget on its own. Unlike compact_screens, the result does not depend
+    on the other screens, so it can key per-screen caches.
+    """
+    lines = _screen_lines(text)
+    if token_budget and estimate_tokens("\n".join(lines)) > token_budget:
+        lines = _fit(lines, max(0, token_budget - 8))
+    return "\n".join(lines)
+
+
+def compact_screens(texts: List[str], token_budget: Optional[int] = None) -> CompactedContext:
+    """
+    Compact per-screen OCR texts (one string per screen, lines separated by newlines).
+    token_budget caps the rendered size; None or 0 means no cap.
+    """
+    tokens_before = estimate_tokens("\n\n".join(f"[Screen {i+1}]\n{t}" for i, t in enumerate(texts)))
+
+    screens: List[List[str]] = [_screen_lines(txt) for txt in texts]
+
+    chrome: List[str] = []
+    if len(screens) > 1:
+        counts = {}
+        first_seen = {}
+        for lines in screens:
+            for line in lines:
+                key = _norm(line)
+                counts[key] = counts.get(key, 0) + 1
+                first_seen.setdefault(key, line)
+        threshold = max(2, math.ceil(CHROME_MIN_SHARE * len(screens)))
+        chrome_keys = {k for k, c in counts.items() if c >= threshold}
+        chrome = [first_seen[k] for k in first_seen if k in chrome_keys]
+        screens = [[l for l in lines if _norm(l) not in chrome_keys] for lines in screens]
+
+    if token_budget:
+        # screen headers + chrome are fixed costs; the rest is shared water-filling style
+        fixed = estimate_tokens("\n".join(chrome)) + 6 * (len(screens) + 1)
+        remaining = max(0, token_budget - fixed)
+        costs = [estimate_tokens("\n".join(lines)) for lines in screens]
+        order = sorted(range(len(screens)), key=lambda i: costs[i])
+        for n_left, i in enumerate(order):
+            share = remaining // (len(order) - n_left)
+            if costs[i] > share:
+                screens[i] = _fit(screens[i], max(0, share - 8))  # room for the truncation note
+                remaining -= estimate_tokens("\n".join(screens[i]))
+            else:
+                remaining -= costs[i]
+
+    out = CompactedContext(screens=["\n".join(lines) for lines in screens], common_chrome=chrome,
+                           tokens_before=tokens_before)
+    out.tokens_after = estimate_tokens(out.render())
+    return out
@@ -0,0 +1,189 @@
+"""
+Hierarchical flow specs for folders with many screens.
+
+Instead of one request carrying every image (or all OCR text), each screen is
+summarized on its own — in parallel, cached on disk by a hash of the screen
+content, model and prompt — and the summaries are reduced into the unified
+flow spec. Editing one screen only re-runs that screen's summary and the reduce.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from ..config import CACHE_DIR, HIERARCHICAL_MIN_SCREENS  # noqa: F401 (re-exported)
+from . import ledger
+from .backend import chat_completion, require_llm
+from .ui_spec_vision import _b64_image
+
+
+# Bump when the prompts change so stale summaries are not reused.
+PROMPT_VERSION = "1"
+
+SCREEN_SUMMARY_PROMPT = """
+You are a senior QA/UX specialist documenting screen {index} of the flow "{scope}".
+Summarize ONLY this screen as concise Markdown bullet points:
+- Purpose of the screen
+- Components (inputs, lists, toggles, buttons, key labels/states)
+- Navigation: how the user likely arrives and where each action leads
+- Validation, empty/error states and edge cases visible or implied
+No code fences. Start with the line "### [Screen {index}] <short name>".
+""".strip()
+
+REDUCE_PROMPT = """
+You are a senior QA/UX specialist. Below are per-screen summaries of the flow "{scope}", in flow order.
+Generate ONE unified Markdown UI specification with sections:
+
+- Overview — purpose and goals
+- Flow Overview (screen order with purpose)
+- Per-screen Components
+- Interaction Flow across screens
+- Validation & Edge Cases
+- Accessibility
+- General Data & Validation
+- Telemetry/Analytics
+- Open Questions / Assumptions
+
+Be concise but specific. Use bullet points. No code fences.
+Keep screen references like [Screen 1], [Screen 2] to match order.
+
+{chrome}Screen summaries:
+{summaries}
+""".strip()
+
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(hashlib.sha256(p).digest())
+    return h.hexdigest()
+
+
+def _strip_fences(md: str) -> str:
+    md = (md or "").strip()
+    if md.startswith("```"):
+        md = md.strip("`").split("\n", 1)[-1]
+    return md
+
+
+class _SummaryCache:
+    """One Markdown file per key under <cache_dir>/flow_summaries/."""
+
+    def __init__(self, cache_dir: Optional[str]):
+        self.dir = Path(cache_dir) / "flow_summaries" if cache_dir else None
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.dir:
+            return None
+        p = self.dir / f"{key}.md"
+        return p.read_text(encoding="utf-8") if p.exists() else None
+
+    def put(self, key: str, md: str) -> None:
+        if not self.dir:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.dir / f"{key}.md.tmp{os.getpid()}"
+        tmp.write_text(md, encoding="utf-8")
+        os.replace(tmp, self.dir / f"{key}.md")
+
+
+def _summarize_screen(index: int, scope: str, image_path: Optional[str], ocr_text: Optional[str],
+                      model: str, temperature: float, max_tokens: int) -> str:
+    instruction = SCREEN_SUMMARY_PROMPT.format(index=index, scope=scope)
+    if image_path:
+        mime = "image/png" if image_path.lower().endswith(".png") else "image/jpeg"
+        content = [
+            {"type": "text", "text": instruction},
+            {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{_b64_image(image_path)}"}},
+        ]
+    else:
+        content = f"{instruction}\n\nOCR (may be partial/noisy):\n---\n{ocr_text}\n---"
+    resp = chat_completion(
+        stage="flow_screen_summary",
+        scope=scope,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        messages=[{"role": "user", "content": content}],
+    )
+    return _strip_fences(resp.choices[0].message.content)
+
+
+def llm_flow_spec_hierarchical(
+    scope: str,
+    image_paths: Optional[List[str]] = None,
+    ocr_texts: Optional[List[str]] = None,
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.2,
+    max_tokens: int = 4000,
+    summary_max_tokens: int = 800,
+    concurrency: int = 4,
+    cache_dir: Optional[str] = str(CACHE_DIR),
+    modes: Optional[List[str]] = None,
+    common_chrome: Optional[List[str]] = None,
+) -> str:
+    """
+    Build ONE flow spec from per-screen summaries.
+    Pass image_paths (vision summaries) or ocr_texts (text summaries); order is flow order.
+    Each OCR text should depend on its own screen only (see compaction.clean_screen), as
+    it keys that screen's cached summary. `common_chrome` (lines shared by most screens,
+    see compaction.compact_screens) goes into the reduce prompt.
+    With both lists, `modes` ("vision"/"ocr" per screen, see llm.mode_select) picks per screen.
+    Summaries and the final reduce are cached under cache_dir (None disables caching).
+    """
+    require_llm()
+    if not image_paths and not ocr_texts:
+        raise ValueError("image_paths or ocr_texts is required")
+
+    cache = _SummaryCache(cache_dir)
+    count = len(image_paths or ocr_texts)
+    if modes is None:
+        modes = ["vision" if image_paths else "ocr"] * count
+    head = f"{PROMPT_VERSION}|{model}|{temperature}|{summary_max_tokens}|{scope}".encode()
+
+    def summarize(i: int) -> str:
+        vision = modes[i] == "vision"
+        src = Path(image_paths[i]).read_bytes() if vision else ocr_texts[i].encode("utf-8")
+        key = _digest(head, modes[i].encode(), str(i + 1).encode(), src)
+        md = cache.get(key)
+        if md is not None:
+            ledger.record("flow_screen_summary", scope, model, key, 0.0, cache="hit")
+            return md
+        md = _summarize_screen(
+            i + 1, scope,
+            image_path=image_paths[i] if vision else None,
+            ocr_text=None if vision else ocr_texts[i],
+            model=model, temperature=temperature, max_tokens=summary_max_tokens,
+        )
+        cache.put(key, md)
+        return md
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        summaries = list(pool.map(summarize, range(count)))
+
+    joined = "\n\n".join(summaries)
+    chrome = "\n".join(common_chrome or [])
+    chrome_block = f"Common chrome (navigation, headers present on most screens):\n{chrome}\n\n" if chrome else ""
+    reduce_key = _digest(head, b"reduce", str(max_tokens).encode(), joined.encode("utf-8"), chrome.encode("utf-8"))
+    md = cache.get(reduce_key)
+    if md is not None:
+        ledger.record("flow_spec", scope, model, reduce_key, 0.0, cache="hit")
+    else:
+        resp = chat_completion(
+            stage="flow_spec",
+            scope=scope,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": REDUCE_PROMPT.format(scope=scope, chrome=chrome_block, summaries=joined)}],
+        )
+        md = _strip_fences(resp.choices[0].message.content)
+        cache.put(reduce_key, md)
+
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M")
+    header = f"# Flow Spec — {scope}\n\n_Generated: {ts}_\n\n"
+    return header + md
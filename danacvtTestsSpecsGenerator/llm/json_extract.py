@@ -0,0 +1,192 @@
+"""
+Tolerant JSON extraction for LLM outputs.
+
+LLM replies often wrap JSON in prose or code fences, use “smart” quotes as
+string delimiters, leave trailing commas, or get cut off by max_tokens.
+`extract_json_values` finds every JSON value in such text with a single
+left-to-right scan: bracket depth is tracked with a stack, smart quotes and
+trailing commas are repaired while the candidate is copied, and each balanced
+candidate is decoded once with `json.JSONDecoder.raw_decode`. Well-formed
+values are decoded in place and never go through the repair copy. Nesting too
+deep for the decoder is treated like any other undecodable candidate.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+_DECODER = json.JSONDecoder()
+
+# Characters that change scanner state (everything else is copied in bulk).
+_OPEN_RE = re.compile(r"[\[{]")
+_STRUCT_RE = re.compile(r'[\[\]{},"\\“”]')
+_STR_RE = re.compile(r'["\\]')
+_SMART_STR_RE = re.compile(r"[”\\]")
+_DQ_STRING_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+_CLOSER = {"{": "}", "[": "]"}
+
+
+def _decode(candidate: str) -> Tuple[bool, Any]:
+    try:
+        value, end = _DECODER.raw_decode(candidate)
+    except (ValueError, RecursionError):   # RecursionError: absurdly deep nesting
+        return False, None
+    if candidate[end:].strip():
+        return False, None
+    return True, value
+
+
+def _scan_container(text: str, start: int) -> Tuple[List[str], List[Tuple[int, int]], int]:
+    """
+    Copy the container opening at text[start] into a repaired token list.
+    Returns (tokens, child_spans, next_pos) where child_spans are
+    token-index spans of the direct children containers (used as a fallback
+    when the whole container cannot be decoded).
+    """
+    out: List[str] = [text[start]]
+    stack: List[Tuple[str, int]] = [(text[start], 0)]
+    children: List[Tuple[int, int]] = []
+    last_sig = 0  # index in `out` of the last significant token outside strings
+    pos = start + 1
+    n = len(text)
+
+    while pos < n:
+        m = _STRUCT_RE.search(text, pos)
+        if not m:
+            out.append(text[pos:])
+            pos = n
+            break
+        i = m.start()
+        if i > pos:
+            chunk = text[pos:i]
+            out.append(chunk)
+            if chunk.strip():
+                last_sig = len(out) - 1
+        ch = text[i]
+        pos = i + 1
+
+        if ch in "{[":
+            out.append(ch)
+            stack.append((ch, len(out) - 1))
+            last_sig = len(out) - 1
+        elif ch in "}]":
+            # pop to the matching opener; a stray closer with no opener is dropped
+            depth = len(stack) - 1
+            while depth >= 0 and _CLOSER[stack[depth][0]] != ch:
+                depth -= 1
+            if depth < 0:
+                continue
+            # close any openers the model forgot, then the matching one
+            while len(stack) > depth:
+                opener, opened_at = stack.pop()
+                if out[last_sig] == ",":
+                    out[last_sig] = ""  # trailing comma repair
+                out.append(_CLOSER[opener])
+                if len(stack) == 1:
+                    children.append((opened_at, len(out)))
+                last_sig = len(out) - 1
+            if not stack:
+                return out, children, pos
+        elif ch == ",":
+            out.append(ch)
+            last_sig = len(out) - 1
+        elif ch == "\\":
+            out.append(text[i:i + 2])  # stray escape outside a string; keep as-is
+            pos = i + 2
+        elif ch == '"' and (sm := _DQ_STRING_RE.match(text, i)):
+            # well-formed string literal: copy it in one piece
+            out.append(sm.group(0))
+            last_sig = len(out) - 1
+            pos = sm.end()
+        else:
+            # unterminated or smart-quoted string literal
+            smart = ch != '"'
+            end_re = _SMART_STR_RE if smart else _STR_RE
+            body: List[str] = []
+            while pos < n:
+                sm = end_re.search(text, pos)
+                if not sm:
+                    body.append(text[pos:])
+                    pos = n
+                    break
+                j = sm.start()
+                if j > pos:
+                    # a plain '"' inside a smart-quoted string must be escaped
+                    body.append(text[pos:j].replace('"', '\\"') if smart else text[pos:j])
+                if text[j] == "\\":
+                    body.append(text[j:j + 2])
+                    pos = j + 2
+                    continue
+                pos = j + 1
+                break
+            out.append('"' + "".join(body) + '"')
+            last_sig = len(out) - 1
+
+    # Truncated input: close whatever is still open so complete prefixes survive.
+    while stack:
+        opener, opened_at = stack.pop()
+        if out[last_sig] == ",":
+            out[last_sig] = ""
+        out.append(_CLOSER[opener])
+        if len(stack) == 1:
+            children.append((opened_at, len(out)))
+        last_sig = len(out) - 1
+    return out, children, pos
+
+
+def extract_json_values(text: str) -> List[Any]:
+    """
+    Return every top-level JSON object/array found in `text`, in order.
+    Containers that fail to decode even after repair fall back to their
+    direct child containers, so one malformed item does not lose the rest
+    (an array keeps its decodable items as a shorter array).
+    """
+    values: List[Any] = []
+    if not text:
+        return values
+    pos = 0
+    n = len(text)
+    while pos < n:
+        m = _OPEN_RE.search(text, pos)
+        if not m:
+            break
+        # well-formed values are taken straight from the source text
+        try:
+            value, end = _DECODER.raw_decode(text, m.start())
+        except (ValueError, RecursionError):
+            pass
+        else:
+            values.append(value)
+            pos = end
+            continue
+        tokens, children, pos = _scan_container(text, m.start())
+        ok, value = _decode("".join(tokens))
+        if ok:
+            values.append(value)
+            continue
+        salvaged = []
+        for s, e in children:
+            ok, value = _decode("".join(tokens[s:e]))
+            if ok:
+                salvaged.append(value)
+        if tokens[0] == "[" and salvaged:
+            values.append(salvaged)
+        else:
+            values.extend(salvaged)
+    return values
+
+
+def safe_json_parse(raw: str, expect: Optional[type] = None, default: Any = None) -> Any:
+    """
+    Best-effort parse of an LLM reply: the first extracted JSON value
+    (optionally the first one that is an instance of `expect`).
+    Returns `default` ([] if not given) when nothing usable is found.
+    """
+    if default is None:
+        default = []
+    for value in extract_json_values(raw or ""):
+        if expect is None or isinstance(value, expect):
+            return value
+    return default
@@ -0,0 +1,195 @@
+"""
+Deadlines, hedged requests and latency statistics for LLM calls.
+
+- deadline: a call that has not answered after N seconds (per stage) raises
+  LLMDeadlineExceeded; callers already treat LLM errors as "skip", so the run
+  falls back to the heuristic-only output for that stage.
+- hedging: when a call is slower than the stage's observed p<percentile>
+  latency (or `initial_s` until enough samples exist), an identical request is
+  sent and whichever answers first wins.
+- stats: wall-clock latency per stage, reported as p50/p95/p99.
+
+Abandoned attempts cannot be interrupted from Python. They are given a
+client-side timeout (the remaining deadline, or HEDGED_ATTEMPT_TIMEOUT_S
+without one) so they end on their own, and they run on daemon threads so a
+slow loser does not hold up interpreter exit.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+HEDGE_MIN_SAMPLES = 5
+HEDGED_ATTEMPT_TIMEOUT_S = 300.0   # client-side timeout of hedged attempts when the stage has no deadline
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    pass
+
+
+@dataclass
+class LatencyPolicy:
+    deadlines: Dict[str, float] = field(default_factory=dict)  # stage → seconds; "default" applies to the rest
+    hedge: bool = False
+    hedge_percentile: float = 95.0
+    hedge_initial_s: float = 10.0
+
+    def deadline_for(self, stage: str) -> Optional[float]:
+        return self.deadlines.get(stage, self.deadlines.get("default"))
+
+
+def parse_deadlines(spec: str) -> Dict[str, float]:
+    """'45' → {'default': 45}; 'booster=30,ui_spec=90' → per-stage seconds."""
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        stage, _, secs = part.rpartition("=")
+        out[stage.strip() or "default"] = float(secs)
+    return out
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0-100)."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, math.ceil(p / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+class LatencyStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = {}
+        self.hedges_sent: Dict[str, int] = {}
+        self.hedges_won: Dict[str, int] = {}
+        self.deadline_misses: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+
+    def bump(self, counter: Dict[str, int], stage: str) -> None:
+        with self._lock:
+            counter[stage] = counter.get(stage, 0) + 1
+
+    def samples(self, stage: str) -> List[float]:
+        with self._lock:
+            return list(self._samples.get(stage, []))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stages = {s: list(v) for s, v in self._samples.items()}
+        return {
+            s: {"n": len(v), "p50": percentile(v, 50), "p95": percentile(v, 95), "p99": percentile(v, 99),
+                "hedges": self.hedges_sent.get(s, 0), "hedge_wins": self.hedges_won.get(s, 0),
+                "deadline_misses": self.deadline_misses.get(s, 0)}
+            for s, v in sorted(stages.items())
+        }
+
+    def report(self) -> str:
+        rows = self.summary()
+        if not rows and not self.deadline_misses:
+            return ""
+        lines = [f"{'stage':<22}{'n':>5}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'hedged':>8}{'won':>6}{'missed':>8}"]
+        for stage in sorted(set(rows) | set(self.deadline_misses)):
+            r = rows.get(stage, {"n": 0, "p50": float("nan"), "p95": float("nan"), "p99": float("nan")})
+            lines.append(f"{stage:<22}{r['n']:>5}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}"
+                         f"{self.hedges_sent.get(stage, 0):>8}{self.hedges_won.get(stage, 0):>6}"
+                         f"{self.deadline_misses.get(stage, 0):>8}")
+        return "\n".join(lines)
+
+
+# process-wide state, configured once by the CLI
+policy = LatencyPolicy()
+stats = LatencyStats()
+
+
+def _submit(fn: Callable, *args) -> Future:
+    """Run fn(*args) on a daemon thread (an executor's workers would be joined at exit)."""
+    fut: Future = Future()
+
+    def run() -> None:
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=run, name="llm-attempt", daemon=True).start()
+    return fut
+
+
+def configure(deadlines: Optional[Dict[str, float]] = None, hedge: bool = False,
+              hedge_percentile: float = 95.0, hedge_initial_s: float = 10.0) -> None:
+    global policy
+    policy = LatencyPolicy(dict(deadlines or {}), hedge, hedge_percentile, hedge_initial_s)
+
+
+def _hedge_delay(stage: str) -> float:
+    samples = stats.samples(stage)
+    if len(samples) >= HEDGE_MIN_SAMPLES:
+        return percentile(samples, policy.hedge_percentile)
+    return policy.hedge_initial_s
+
+
+def run_with_policy(stage: str, call: Callable[[Optional[float]], object]):
+    """
+    Run `call(timeout_s)` under the stage's deadline/hedging policy and record its latency.
+    `timeout_s` is the client-side timeout the attempt should use (None = no deadline).
+    """
+    deadline = policy.deadline_for(stage)
+    start = time.perf_counter()
+    if deadline is None and not policy.hedge:
+        result = call(None)
+        stats.add(stage, time.perf_counter() - start)
+        return result
+
+    def remaining() -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - (time.perf_counter() - start))
+
+    def attempt_timeout() -> float:
+        return HEDGED_ATTEMPT_TIMEOUT_S if deadline is None else remaining()
+
+    first = _submit(call, attempt_timeout())
+    pending = {first}
+    hedge = None
+    errors = []
+
+    if policy.hedge:
+        delay = _hedge_delay(stage)
+        if deadline is not None:
+            delay = min(delay, deadline)
+        done, _ = wait(pending, timeout=delay)
+        if not done and (deadline is None or remaining() > 0):
+            hedge = _submit(call, attempt_timeout())
+            pending.add(hedge)
+            stats.bump(stats.hedges_sent, stage)
+
+    while pending:
+        done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for fut in done:
+            if fut.exception() is None:
+                for other in pending:
+                    other.cancel()
+                if fut is hedge:
+                    stats.bump(stats.hedges_won, stage)
+                stats.add(stage, time.perf_counter() - start)
+                return fut.result()
+            errors.append(fut.exception())
+
+    if errors and not pending:
+        raise errors[0]
+    for fut in pending:
+        fut.cancel()
+    stats.bump(stats.deadline_misses, stage)
+    raise LLMDeadlineExceeded(f"LLM stage '{stage}' exceeded its {deadline:.0f}s deadline")
@@ -0,0 +1,145 @@
+"""
+Append-only usage ledger for LLM calls.
+
+Every call made through llm.backend (and every LLM cache hit) appends one JSON
+line: time, stage, scope, model, prompt/completion tokens, latency, cache
+hit/miss, backend mode, status and the request hash. The file survives across
+runs, so nightly batches can be summarized per scope, day, model or stage.
+Requests deferred to a batch file are counted apart from calls and errors:
+
+    python -m danacvtTestsSpecsGenerator.llm.ledger --by day
+    python -m danacvtTestsSpecsGenerator.llm.ledger --by scope,model --ledger outputs/llm_ledger.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..config import LEDGER_PATH
+from .latency import percentile
+
+_lock = threading.Lock()
+_path: Optional[Path] = None
+
+GROUP_KEYS = ("scope", "day", "model", "stage", "mode")
+
+
+def configure(path: Optional[str]) -> None:
+    """Set the ledger file; None or "off" disables recording."""
+    global _path
+    _path = None if not path or path == "off" else Path(path)
+
+
+configure(os.getenv("DANACVT_LEDGER", str(LEDGER_PATH)))
+
+
+def _usage(resp: Any) -> Dict[str, Optional[int]]:
+    u = getattr(resp, "usage", None)
+    return {
+        "prompt_tokens": getattr(u, "prompt_tokens", None),
+        "completion_tokens": getattr(u, "completion_tokens", None),
+        "total_tokens": getattr(u, "total_tokens", None),
+    }
+
+
+def record(stage: str, scope: str, model: str, input_hash: str, latency_s: float,
+           resp: Any = None, cache: str = "miss", mode: str = "live", status: str = "ok") -> None:
+    if _path is None:
+        return
+    entry = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "stage": stage,
+        "scope": scope,
+        "model": model,
+        **_usage(resp),
+        "latency_s": round(latency_s, 4),
+        "cache": cache,
+        "mode": mode,
+        "status": status,
+        "input_hash": input_hash,
+    }
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with _lock:
+        _path.parent.mkdir(parents=True, exist_ok=True)
+        with open(_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def read_entries(path: str) -> Iterable[Dict[str, Any]]:
+    p = Path(path)
+    if not p.exists():
+        return
+    with p.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # partial line from an interrupted run
+
+
+def summarize(entries: Iterable[Dict[str, Any]], by: List[str]) -> List[Dict[str, Any]]:
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for e in entries:
+        e = dict(e, day=(e.get("ts") or "")[:10])
+        key = tuple(str(e.get(k) or "-") for k in by)
+        g = groups.setdefault(key, {"calls": 0, "cache_hits": 0, "errors": 0, "deferred": 0, "prompt_tokens": 0,
+                                    "completion_tokens": 0, "latencies": []})
+        if e.get("status") == "deferred":   # written to a batch file: neither a call nor an error
+            g["deferred"] += 1
+            continue
+        g["calls"] += 1
+        g["cache_hits"] += e.get("cache") == "hit"
+        g["errors"] += e.get("status") != "ok"
+        g["prompt_tokens"] += e.get("prompt_tokens") or 0
+        g["completion_tokens"] += e.get("completion_tokens") or 0
+        if e.get("cache") != "hit":
+            g["latencies"].append(float(e.get("latency_s") or 0.0))
+    rows = []
+    for key, g in sorted(groups.items()):
+        lat = g.pop("latencies")
+        rows.append({**dict(zip(by, key)), **g,
+                     "latency_total_s": round(sum(lat), 2),
+                     "latency_p50_s": round(percentile(lat, 50), 2) if lat else None,
+                     "latency_p95_s": round(percentile(lat, 95), 2) if lat else None})
+    return rows
+
+
+def format_summary(rows: List[Dict[str, Any]], by: List[str]) -> str:
+    cols = by + ["calls", "cache_hits", "errors", "deferred", "prompt_tokens", "completion_tokens",
+                 "latency_total_s", "latency_p50_s", "latency_p95_s"]
+    table = [cols] + [["-" if r[c] is None else str(r[c]) for c in cols] for r in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(cols))]
+    return "\n".join("  ".join(cell.ljust(w) for cell, w in zip(row, widths)) for row in table)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser("danacvt-ledger", description="Summarize the LLM usage ledger.")
+    ap.add_argument("--ledger", default=os.getenv("DANACVT_LEDGER", str(LEDGER_PATH)), help="Ledger JSONL file")
+    ap.add_argument("--by", default="day", help=f"Comma-separated grouping: {', '.join(GROUP_KEYS)}")
+    ap.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = ap.parse_args(argv)
+
+    by = [k.strip() for k in args.by.split(",") if k.strip()]
+    bad = [k for k in by if k not in GROUP_KEYS]
+    if bad:
+        print(f"[error] Unknown --by key(s): {', '.join(bad)}")
+        return 2
+    rows = summarize(read_entries(args.ledger), by)
+    if not rows:
+        print(f"ℹ️ No ledger entries in {args.ledger}")
+        return 0
+    print(json.dumps(rows, indent=2) if args.json else format_summary(rows, by))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Per-screen choice between the OCR-text and the vision LLM modes.
+
+Text-heavy screens with confident OCR are cheaper and just as good as text
+prompts; graphic-heavy screens (little text, low OCR confidence, text covering
+a small part of the image) need the image. Each decision carries the estimated
+prompt tokens and latency of both options so the choice can be reported.
+"""
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .tokens import estimate_tokens
+
+# Thresholds for "OCR text is good enough"
+MIN_WORDS = 15            # fewer words → mostly graphics/icons
+MIN_MEAN_CONF = 60.0      # tesseract confidence 0-100
+MAX_LOW_CONF_SHARE = 0.35 # share of words below LOW_CONF
+LOW_CONF = 40.0
+MIN_TEXT_COVERAGE = 0.02  # share of image area covered by word boxes
+
+# Rough latency model (seconds): fixed overhead + prompt prefill; vision adds image decode.
+LATENCY_BASE_S = 1.0
+PREFILL_S_PER_1K_TOKENS = 0.25
+VISION_OVERHEAD_S = 1.5
+# Tokens the text prompt adds around the OCR excerpt, and the answer we expect back.
+PROMPT_OVERHEAD_TOKENS = 150
+
+
+@dataclass
+class ScreenProfile:
+    path: str
+    width: int
+    height: int
+    words: int
+    mean_conf: float
+    low_conf_share: float
+    text_coverage: float
+    ocr_tokens: int
+
+
+@dataclass
+class ModeDecision:
+    path: str
+    mode: str                 # "ocr" | "vision"
+    reason: str
+    ocr_tokens: int
+    vision_tokens: int
+    ocr_latency_s: float
+    vision_latency_s: float
+
+
+def vision_image_tokens(width: int, height: int) -> int:
+    """OpenAI high-detail image token count: fit in 2048², short side to 768, 170/tile + 85."""
+    if width <= 0 or height <= 0:
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    w, h = width * scale, height * scale
+    scale = min(1.0, 768 / min(w, h))
+    w, h = w * scale, h * scale
+    return 170 * math.ceil(w / 512) * math.ceil(h / 512) + 85
+
+
+def profile_screen(path: str, entries: List[Dict], size: Tuple[int, int], ocr_text: str = "") -> ScreenProfile:
+    width, height = size
+    confs = [e["conf"] for e in entries if e.get("conf", -1) >= 0]
+    box_area = sum(e.get("width", 0) * e.get("height", 0) for e in entries)
+    area = max(1, width * height)
+    return ScreenProfile(
+        path=path,
+        width=width,
+        height=height,
+        words=len(entries),
+        mean_conf=sum(confs) / len(confs) if confs else 0.0,
+        low_conf_share=sum(1 for c in confs if c < LOW_CONF) / len(confs) if confs else 1.0,
+        text_coverage=min(1.0, box_area / area),
+        ocr_tokens=estimate_tokens(ocr_text or " ".join(e["text"] for e in entries)),
+    )
+
+
+def _latency(tokens: int, vision: bool) -> float:
+    return LATENCY_BASE_S + PREFILL_S_PER_1K_TOKENS * tokens / 1000 + (VISION_OVERHEAD_S if vision else 0.0)
+
+
+def choose_mode(p: ScreenProfile) -> ModeDecision:
+    ocr_tokens = p.ocr_tokens + PROMPT_OVERHEAD_TOKENS
+    vision_tokens = vision_image_tokens(p.width, p.height) + PROMPT_OVERHEAD_TOKENS
+    reasons = []
+    if p.words < MIN_WORDS:
+        reasons.append(f"only {p.words} words")
+    if p.mean_conf < MIN_MEAN_CONF:
+        reasons.append(f"mean OCR conf {p.mean_conf:.0f}")
+    if p.low_conf_share > MAX_LOW_CONF_SHARE:
+        reasons.append(f"{p.low_conf_share:.0%} low-conf words")
+    if p.text_coverage < MIN_TEXT_COVERAGE:
+        reasons.append(f"text covers {p.text_coverage:.1%} of image")
+    if reasons:
+        mode, reason = "vision", "graphic-heavy: " + ", ".join(reasons)
+    else:
+        mode, reason = "ocr", f"text-heavy: {p.words} words, conf {p.mean_conf:.0f}"
+    return ModeDecision(
+        path=p.path, mode=mode, reason=reason,
+        ocr_tokens=ocr_tokens, vision_tokens=vision_tokens,
+        ocr_latency_s=round(_latency(ocr_tokens, False), 2),
+        vision_latency_s=round(_latency(vision_tokens, True), 2),
+    )
+
+
+def format_decisions(decisions: List[ModeDecision]) -> str:
+    lines = [f"{'screen':<28}{'mode':<8}{'ocr tok':>9}{'vis tok':>9}{'ocr s':>7}{'vis s':>7}  reason"]
+    for d in decisions:
+        lines.append(f"{Path(d.path).name[:27]:<28}{d.mode:<8}{d.ocr_tokens:>9}{d.vision_tokens:>9}"
+                     f"{d.ocr_latency_s:>7.1f}{d.vision_latency_s:>7.1f}  {d.reason}")
+    chosen = sum(d.vision_tokens if d.mode == "vision" else d.ocr_tokens for d in decisions)
+    all_vision = sum(d.vision_tokens for d in decisions)
+    lines.append(f"estimated prompt tokens: {chosen} (all-vision: {all_vision}, "
+                 f"{sum(d.mode == 'vision' for d in decisions)}/{len(decisions)} screens use vision)")
+    return "\n".join(lines)
+
+
+def write_decisions(path: str, decisions: List[ModeDecision]) -> None:
+    Path(path).write_text(json.dumps([asdict(d) for d in decisions], indent=2), encoding="utf-8")
@@ -0,0 +1,163 @@
+"""
+Local OpenAI-compatible stub server for offline runs and benchmarks.
+
+    python -m danacvtTestsSpecsGenerator.llm.stub_server --port 8765 \
+        --latency-ms 300 --jitter-ms 100 --slow-rate 0.05 --slow-ms 5000 --error-rate 0.02
+
+    export DANACVT_LLM_MODE=http OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    # or keep the SDK: DANACVT_LLM_MODE=live OPENAI_BASE_URL=... OPENAI_API_KEY=stub
+
+POST /v1/chat/completions answers from a fixture directory (same files as the
+replay backend) when one matches, otherwise with a canned reply: a JSON array
+of test ideas when the prompt asks for JSON, a Markdown spec otherwise.
+Latency, jitter, slow-tail responses and HTTP errors are injected per request.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .backend import request_key
+from .tokens import estimate_tokens
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    slow_rate: float = 0.0       # share of requests that take slow_ms instead
+    slow_ms: float = 0.0
+    error_rate: float = 0.0      # share of requests answered with error_status
+    error_status: int = 500
+    fixtures: Optional[str] = None
+    seed: Optional[int] = None
+
+
+def _prompt_text(request: Dict[str, Any]) -> str:
+    parts = []
+    for msg in request.get("messages", []):
+        content = msg.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(c.get("text", "") for c in content if isinstance(c, dict))
+    return "\n".join(parts)
+
+
+def canned_reply(request: Dict[str, Any]) -> str:
+    prompt = _prompt_text(request)
+    if "JSON array" in prompt or "strict JSON" in prompt:
+        ideas = [{
+            "title": f"Stub idea {i + 1}",
+            "description": "Generated by the local stub server.",
+            "preconditions": ["Stub environment"],
+            "steps": ["Open the screen", f"Perform stub action {i + 1}"],
+            "expected_result": "Stub expectation holds.",
+            "type": "functional",
+            "priority": "P2",
+            "tags": ["stub"],
+        } for i in range(3)]
+        return json.dumps(ideas)
+    return "## Overview\n- Stub specification.\n\n## Open Questions\n- None (stub)."
+
+
+def _completion(request: Dict[str, Any], content: str) -> Dict[str, Any]:
+    prompt_tokens = estimate_tokens(_prompt_text(request))
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": f"chatcmpl-stub-{request_key(request)[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """Build (not start) a stub server; port=0 picks a free port (see server.server_address)."""
+    cfg = config or StubConfig()
+    rng = random.Random(cfg.seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):  # keep benchmark output clean
+            pass
+
+        def _send(self, status: int, body: Dict[str, Any]):
+            data = json.dumps(body).encode("utf-8")
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client gave up (deadline/hedge); nothing to report
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            with rng_lock:
+                slow = rng.random() < cfg.slow_rate
+                fail = rng.random() < cfg.error_rate
+                jitter = rng.uniform(-cfg.jitter_ms, cfg.jitter_ms) if cfg.jitter_ms else 0.0
+            delay = (cfg.slow_ms if slow else cfg.latency_ms) + jitter
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+            if fail:
+                self._send(cfg.error_status, {"error": {"message": "injected error", "type": "stub_error"}})
+                return
+
+            if cfg.fixtures:
+                p = Path(cfg.fixtures) / f"{request_key(request)}.json"
+                if p.exists():
+                    self._send(200, json.loads(p.read_text(encoding="utf-8"))["response"])
+                    return
+            self._send(200, _completion(request, canned_reply(request)))
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("danacvt-llm-stub")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Base latency per request")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform ± jitter added to the latency")
+    ap.add_argument("--slow-rate", type=float, default=0.0, help="Share of requests answered after --slow-ms")
+    ap.add_argument("--slow-ms", type=float, default=0.0, help="Latency of slow (tail) requests")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with --error-status")
+    ap.add_argument("--error-status", type=int, default=500)
+    ap.add_argument("--fixtures", default=None, help="Fixture directory to answer from (recorded responses)")
+    ap.add_argument("--seed", type=int, default=None, help="Seed for reproducible latency/error injection")
+    args = ap.parse_args()
+
+    cfg = StubConfig(args.latency_ms, args.jitter_ms, args.slow_rate, args.slow_ms,
+                     args.error_rate, args.error_status, args.fixtures, args.seed)
+    server = make_server(args.host, args.port, cfg)
+    host, port = server.server_address[:2]
+    print(f"LLM stub listening on http://{host}:{port}/v1 (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
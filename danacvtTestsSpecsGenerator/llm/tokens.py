@@ -0,0 +1,17 @@
+"""
+Local token estimation (no tokenizer download, no network).
+
+Close enough to BPE counts for budgeting prompts: every word costs one token
+plus one per extra 6 characters, every punctuation mark costs one.
+"""
+from __future__ import annotations
+
+import re
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return sum(1 + (len(p) - 1) // 6 for p in _PIECE_RE.findall(text))
@@ -1,15 +1,10 @@
 import os
 from typing import Dict, List, Tuple, Optional
 from danacvtTestsSpecsGenerator.models import TestCase
-from danacvtTestsSpecsGenerator.parsers.ocr import ocr_lines
+from danacvtTestsSpecsGenerator.parsers.ocr import ocr_lines, _ocr_libs
 from datetime import datetime
-import pytesseract
-from PIL import Image
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+from .backend import chat_completion, require_llm
 
 def build_llm_text_prompt(scope: str, ocr_text: str) -> str:
     return f"""
@@ -33,30 +28,25 @@ OCR excerpt (may be partial/noisy):
 ---
 """.strip()
 
-def llm_ui_spec_from_ocr(ocr_text: str, img_path: str, scope: str, model: str, temperature: float, max_tokens: int) -> Tuple[str, Dict]:
-    if OpenAI is None:
-        raise RuntimeError("openai package not installed. pip install openai")
-    if not os.getenv("OPENAI_API_KEY"):
-        raise RuntimeError("OPENAI_API_KEY not set.")
+def llm_ui_spec_from_ocr(ocr_text: str, img_path: str, scope: str, model: str, temperature: float, max_tokens: int) -> str:
+    require_llm()
 
-    if not (Image and pytesseract):
-        raise RuntimeError("Pillow + pytesseract required for OCR LLM mode.")
-
-    ocr_text = pytesseract.image_to_string(Image.open(img_path))
+    if not ocr_text or not ocr_text.strip():
+        Image, pytesseract = _ocr_libs()
+        if not (Image and pytesseract):
+            raise RuntimeError("Pillow + pytesseract required for OCR LLM mode.")
+        ocr_text = pytesseract.image_to_string(Image.open(img_path))
     prompt = build_llm_text_prompt(scope, ocr_text)
 
-    client = OpenAI()
-    resp = client.chat.completions.create(
+    resp = chat_completion(
+        stage="ui_spec",
+        scope=scope,
         model=model,
         messages=[{"role":"user", "content": prompt}],
         temperature=temperature,
         max_tokens=max_tokens,
     )
-    usage = {
-        "prompt_tokens": getattr(resp.usage, "prompt_tokens", None),
-        "completion_tokens": getattr(resp.usage, "completion_tokens", None),
-        "total_tokens": getattr(resp.usage, "total_tokens", None),
-    }
+    # token usage is recorded by the backend in the LLM ledger
     md = (resp.choices[0].message.content or "").strip()
     # normalize occasional code fences
     if md.startswith("```"):
@@ -71,17 +61,17 @@ def llm_flow_spec_from_ocr_texts(
     model: str = "gpt-4o-mini",
     temperature: float = 0.2,
     max_tokens: int = 2000,
+    common_chrome: Optional[List[str]] = None,
 ) -> str:
     """
     Combine OCR text from multiple images into ONE flow spec via text LLM.
+    common_chrome: lines shared by most screens (see llm.compaction), sent once.
     """
-    if OpenAI is None:
-        raise RuntimeError("openai package not installed")
-    if not os.getenv("OPENAI_API_KEY"):
-        raise RuntimeError("OPENAI_API_KEY not set")
+    require_llm()
 
-    client = OpenAI()
     joined = "\n\n".join(f"[Screen {i+1}]\n{txt}" for i, txt in enumerate(ocr_texts))
+    if common_chrome:
+        joined = "[Common chrome — present on most screens]\n" + "\n".join(common_chrome) + "\n\n" + joined
 
     prompt = f"""
 You are a senior QA/UX specialist. The following OCR texts come from multiple mockups of the flow "{scope}".
@@ -102,7 +92,9 @@ OCR:
 {joined}
 """.strip()
 
-    resp = client.chat.completions.create(
+    resp = chat_completion(
+        stage="flow_spec",
+        scope=scope,
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
@@ -4,19 +4,11 @@ import time
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 from danacvtTestsSpecsGenerator.models import TestCase
-import pytesseract
-from PIL import Image
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+from .backend import chat_completion, require_llm
 
-def llm_ui_spec_from_image(img_path: str, scope: str, model: str, temperature: float, max_tokens: int) -> Tuple[str, Dict]:
-    if OpenAI is None:
-        raise RuntimeError("openai package not installed. pip install openai")
-    if not os.getenv("OPENAI_API_KEY"):
-        raise RuntimeError("OPENAI_API_KEY not set.")
+def llm_ui_spec_from_image(img_path: str, scope: str, model: str, temperature: float, max_tokens: int) -> str:
+    require_llm()
 
     with open(img_path, "rb") as f:
         b64 = base64.b64encode(f.read()).decode("utf-8")
@@ -31,8 +23,9 @@ Include sections: Overview, Layout & Major Components, Interaction Flows, States
 Infer sensible details (inputs/buttons/save/edit/add/remove/toggles/search/lists/long-text/ counts) where visually clear.
 """.strip()
 
-    client = OpenAI()
-    resp = client.chat.completions.create(
+    resp = chat_completion(
+        stage="ui_spec",
+        scope=scope,
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
@@ -44,12 +37,8 @@ Infer sensible details (inputs/buttons/save/edit/add/remove/toggles/search/lists
             ],
         }],
     )
-    usage = {
-        "prompt_tokens": getattr(resp.usage, "prompt_tokens", None),
-        "completion_tokens": getattr(resp.usage, "completion_tokens", None),
-        "total_tokens": getattr(resp.usage, "total_tokens", None),
-    }
-    return resp.choices[0].message.content.strip(), usage
+    # token usage is recorded by the backend in the LLM ledger
+    return (resp.choices[0].message.content or "").strip()
 
 def _b64_image(path: str) -> str:
     with open(path, "rb") as f:
@@ -66,12 +55,8 @@ def llm_flow_spec_from_images(
     Combine multiple mockups into ONE Markdown flow spec.
     Order is the order of image_paths.
     """
-    if OpenAI is None:
-        raise RuntimeError("openai package not installed")
-    if not os.getenv("OPENAI_API_KEY"):
-        raise RuntimeError("OPENAI_API_KEY not set")
+    require_llm()
 
-    client = OpenAI()
     imgs = [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,{_b64_image(p)}"}} for p in image_paths]
 
     prompt = f"""
@@ -92,7 +77,9 @@ Generate ONE unified Markdown UI specification with sections:
 Be concise but specific. Use bullet points. No code fences.
 Include screen references like [Screen 1], [Screen 2] to match order.
 """.strip()
-    resp = client.chat.completions.create(
+    resp = chat_completion(
+        stage="flow_spec",
+        scope=scope,
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
@@ -0,0 +1,151 @@
+"""
+Run manifest for incremental regeneration (--manifest PATH).
+
+    danacvt-gen --file spec.md --scope "Checkout" --use-llm --manifest outputs/checkout.manifest.json --update-csv master.csv
+
+The manifest records a fingerprint for each unit of the input (a requirement
+of a document, or a screen of a folder) together with the cases generated
+from it, the LLM-boosted cases of each boost chunk with the units that chunk
+covered, and the match keys (Title, ID) of everything the run produced. The
+next run with the same manifest then does the following:
+- an unchanged unit reuses its cases, with no generation and no OCR for screens;
+- a changed or added unit is regenerated, and only those units are sent to the
+  booster. A boost chunk is kept as long as every unit it covered is unchanged;
+- cases that the previous run produced and this one does not (removed or
+  rewritten requirements) come out of obsolete_keys(), and the CSV / DB merges
+  mark them Status=obsolete.
+A run therefore costs in proportion to what changed. The settings fingerprint
+covers everything that changes every case (input, scope, tags, model, ...).
+When it differs, nothing is reused.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .fsutil import atomic_write_text
+from .models import TestCase, case_from_row, content_id, _norm_text
+
+MANIFEST_VERSION = 1
+
+
+def fingerprint(*parts: Any) -> str:
+    """Short stable hash of text parts (normalized for case and whitespace)."""
+    digest = hashlib.blake2b("\x1f".join(_norm_text(str(p)) for p in parts).encode("utf-8"), digest_size=8)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str, block: int = 1 << 20) -> str:
+    """Hash of a file's bytes (for screens: re-exported but identical images stay unchanged)."""
+    h = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RunManifest:
+    """The previous run's manifest (if any, with matching settings) and the one this run is building."""
+
+    def __init__(self, path: str, settings: str, scope: str = ""):
+        self.path, self.settings, self.scope = path, settings, scope
+        self._units: Dict[str, Dict[str, Any]] = {}   # previous run: unit key → {"fp", "cases", ...}
+        self._boosts: List[Dict[str, Any]] = []       # previous run: {"units": [fp], "cases": [row]}
+        self._keys: Dict[str, List[str]] = {}         # previous run: match key → values
+        self.units: Dict[str, Dict[str, Any]] = {}
+        self.boosts: List[Dict[str, Any]] = []
+        self.reused = self.regenerated = 0
+        self.boosts_kept = 0
+        self._lock = threading.Lock()   # screens are recorded from the fan-out pool
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(Path(self.path).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable manifest {self.path}: {e}")
+            return
+        if data.get("version") != MANIFEST_VERSION or data.get("settings") != self.settings:
+            print(f"ℹ️ Manifest {self.path} was written with other settings; regenerating everything.")
+            return
+        self._units = data.get("units") or {}
+        self._boosts = data.get("boosts") or []
+        self._keys = data.get("keys") or {}
+
+    # --- per-unit cases ---
+    def lookup(self, key: str, fp: str) -> Optional[Dict[str, Any]]:
+        """The previous entry for this unit if its fingerprint is unchanged (cases as TestCase), else None."""
+        entry = self._units.get(key)
+        with self._lock:
+            if entry is None or entry.get("fp") != fp:
+                self.regenerated += 1
+                return None
+            self.reused += 1
+            self.units[key] = entry
+        return dict(entry, cases=[case_from_row(row) for row in entry["cases"]])
+
+    def record(self, key: str, fp: str, cases: List[TestCase], **extra: Any) -> None:
+        """Remember a unit's cases (stored with content IDs, so the manifest is stable across runs)."""
+        entry = dict(extra, fp=fp, cases=self._rows(cases))
+        with self._lock:
+            self.units[key] = entry
+
+    def removed(self) -> List[str]:
+        """Units of the previous run that this run did not see."""
+        return [k for k in self._units if k not in self.units]
+
+    # --- boosts ---
+    def plan_boost(self, unit_fps: Iterable[str]) -> Tuple[List[TestCase], List[str]]:
+        """(cases of the previous boost chunks that are still valid, unit fingerprints to boost)."""
+        order = list(dict.fromkeys(unit_fps))
+        current, covered = set(order), set()
+        kept: List[TestCase] = []
+        for b in self._boosts:
+            if set(b["units"]) <= current:
+                self.boosts.append(b)
+                kept.extend(case_from_row(row) for row in b["cases"])
+                covered.update(b["units"])
+                self.boosts_kept += 1
+        return kept, [fp for fp in order if fp not in covered]
+
+    def record_boost(self, unit_fps: List[str], cases: List[TestCase]) -> None:
+        self.boosts.append({"units": list(unit_fps), "cases": self._rows(cases)})
+
+    # --- outputs ---
+    def obsolete_keys(self, cases: List[TestCase], match_key: str) -> List[str]:
+        """Match-key values the previous run produced and this run does not."""
+        current = {c.to_row().get(match_key) for c in cases}
+        return [k for k in self._keys.get(match_key, []) if k and k not in current]
+
+    def summary(self, unit: str = "requirements") -> str:
+        s = f"[INFO] Manifest: {self.regenerated} {unit} new or changed, {self.reused} unchanged"
+        removed = len(self.removed())
+        if removed:
+            s += f", {removed} removed"
+        if self.boosts_kept:
+            s += f"; {self.boosts_kept} boost chunk(s) reused"
+        return s + "."
+
+    def save(self, cases: List[TestCase]) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "settings": self.settings,
+            "units": self.units,
+            "boosts": self.boosts,
+            "keys": {"Title": [c.title for c in cases], "ID": [c.id for c in cases]},
+        }
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps(data, ensure_ascii=False, indent=1))
+
+    def _rows(self, cases: List[TestCase]) -> List[Dict[str, str]]:
+        rows = []
+        for c in cases:
+            row = c.to_row()
+            row["ID"] = content_id(c, self.scope)   # not the random placeholder
+            rows.append(row)
+        return rows
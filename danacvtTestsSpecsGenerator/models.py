@@ -1,26 +1,78 @@
-from dataclasses import dataclass, field
-from typing import List, Dict, Tuple, Optional
-import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+import hashlib
+import os
+import re
+import sys
 
-@dataclass
+# Slotted instances have no per-instance __dict__ (dataclass(slots=True) needs Python 3.10+).
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+T = TypeVar("T", bound=Hashable)
+
+# Pool for values that repeat across cases (preconditions, tags, priorities,
+# parsed steps): equal values share one object. When it is full it
+# starts over, which bounds it without stopping to share new common values.
+_SHARED: Dict[Hashable, Any] = {}
+_SHARED_MAX = 8192
+
+def share(value: T) -> T:
+    """The pooled object equal to value (value itself the first time it is seen)."""
+    pooled = _SHARED.get(value)
+    if pooled is None:
+        if len(_SHARED) >= _SHARED_MAX:
+            _SHARED.clear()
+        pooled = _SHARED[value] = value
+    return pooled
+
+def _shared_tuple(items: Iterable[T]) -> Tuple[T, ...]:
+    t = items if type(items) is tuple else tuple(items)
+    pooled = _SHARED.get(t)   # a pooled tuple already holds pooled items
+    return pooled if pooled is not None else share(tuple(map(share, t)))
+
+@dataclass(frozen=True, **_SLOTS)
 class TestStep:
+    # immutable, so cases of one requirement can share their common steps
     number: int
     action: str
     data: Optional[str] = None  # optional payload for the step
 
-@dataclass
+_STEPS: Dict[Tuple[int, str, Optional[str]], "TestStep"] = {}
+
+def step(number: int, action: str, data: Optional[str] = None) -> "TestStep":
+    """A pooled TestStep (for readers: equal parsed steps share one object)."""
+    key = (number, action, data)
+    s = _STEPS.get(key)
+    if s is None:
+        if len(_STEPS) >= _SHARED_MAX:
+            _STEPS.clear()
+        s = _STEPS[key] = TestStep(number, action, data)
+    return s
+
+@dataclass(**_SLOTS)
 class TestCase:
+    # preconditions, steps and tags may be given as lists; they are stored as
+    # tuples of pooled values (see share); generators share common TestStep objects themselves
     id: str
     title: str
     description: str
-    preconditions: List[str]
-    steps: List[TestStep]
+    preconditions: Tuple[str, ...]
+    steps: Tuple[TestStep, ...]
     expected_result: str
     priority: str           # e.g., P0/P1/P2/P3
     type: str               # e.g., functional/negative/boundary/permissions
-    tags: List[str] = field(default_factory=list)
+    tags: Tuple[str, ...] = ()
     trace_to: Optional[str] = None
 
+    def __post_init__(self):
+        self.preconditions = _shared_tuple(self.preconditions)
+        self.steps = tuple(self.steps)
+        self.tags = _shared_tuple(self.tags)
+        self.priority, self.type = share(self.priority), share(self.type)
+        self.expected_result = share(self.expected_result)
+        if self.trace_to:
+            self.trace_to = share(self.trace_to)
+
     def to_row(self) -> Dict[str, str]:
         return {
             "ID": self.id,
@@ -38,8 +90,94 @@ class TestCase:
             "Trace To": self.trace_to or "",
         }
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Lossless JSON-ready form with structured steps (the JSONL format; see case_from_dict)."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "preconditions": self.preconditions,
+            "steps": [
+                {"number": s.number, "action": s.action} if s.data is None
+                else {"number": s.number, "action": s.action, "data": s.data}
+                for s in self.steps
+            ],
+            "expected_result": self.expected_result,
+            "priority": self.priority,
+            "type": self.type,
+            "tags": self.tags,
+            "trace_to": self.trace_to,
+        }
+
+_STEP_RE = re.compile(r"^(\d+)\.\s?(.*?)(?: \[data: (.*)\])?$")
+
+def case_from_row(row: Dict[str, str]) -> TestCase:
+    """Inverse of TestCase.to_row (extra columns such as Status are ignored)."""
+    steps = []
+    for i, line in enumerate(l for l in (row.get("Steps") or "").splitlines() if l.strip()):
+        m = _STEP_RE.match(line)
+        steps.append(step(int(m.group(1)), m.group(2), m.group(3)) if m else step(i + 1, line))
+    return TestCase(
+        id=row.get("ID") or "",
+        title=row.get("Title") or "",
+        description=row.get("Description") or "",
+        preconditions=[p for p in (row.get("Preconditions") or "").splitlines() if p],
+        steps=steps,
+        expected_result=row.get("Expected Result") or "",
+        priority=row.get("Priority") or "",
+        type=row.get("Type") or "",
+        tags=[t for t in (row.get("Tags") or "").split(",") if t],
+        trace_to=row.get("Trace To") or None,
+    )
+
+def case_from_dict(d: Dict[str, Any]) -> TestCase:
+    """Inverse of TestCase.to_dict."""
+    return TestCase(
+        id=d.get("id") or "",
+        title=d.get("title") or "",
+        description=d.get("description") or "",
+        preconditions=d.get("preconditions") or (),
+        steps=[step(s["number"], s["action"], s.get("data")) for s in d.get("steps") or ()],
+        expected_result=d.get("expected_result") or "",
+        priority=d.get("priority") or "",
+        type=d.get("type") or "",
+        tags=d.get("tags") or (),
+        trace_to=d.get("trace_to"),
+    )
+
 def mk_id(prefix: str = "TC") -> str:
-    return f"{prefix}-{str(uuid.uuid4())[:8].upper()}"
+    # 8 random hex digits, same shape as uuid4()[:8] without importing uuid.
+    # Generated cases get content IDs from assign_ids(); this is the placeholder until then.
+    return f"{prefix}-{os.urandom(4).hex().upper()}"
+
+def _norm_text(s: Optional[str]) -> str:
+    return " ".join((s or "").casefold().split())
+
+def content_id(case: TestCase, scope: str = "", prefix: Optional[str] = None) -> str:
+    """
+    Deterministic ID from (scope, trace_to, type, title, step actions), normalized
+    for case and whitespace: the same case always gets the same ID. The prefix
+    defaults to the one already on case.id (TC, LLM, ...). 12 hex digits keep
+    accidental collisions unlikely (~0.2% across a million cases).
+    """
+    if prefix is None:
+        prefix = case.id.split("-", 1)[0] if case.id and "-" in case.id else "TC"
+    parts = [scope, case.trace_to, case.type, case.title] + [s.action for s in case.steps]
+    digest = hashlib.blake2b("\x1f".join(_norm_text(p) for p in parts).encode("utf-8"), digest_size=6)
+    return f"{prefix}-{digest.hexdigest().upper()}"
+
+def assign_ids(cases: List[TestCase], scope: str = "") -> List[TestCase]:
+    """
+    Give every case its content_id, in place. Repeats in the list (identical
+    content, or a hash collision) get -2, -3, ... suffixes in list order, so
+    IDs are unique and stable for the same input.
+    """
+    seen: Dict[str, int] = {}
+    for c in cases:
+        base = content_id(c, scope)
+        n = seen[base] = seen.get(base, 0) + 1
+        c.id = base if n == 1 else f"{base}-{n}"
+    return cases
 
 def truncate(s: str, n: int) -> str:
     return s if len(s) <= n else s[:n-1] + "…"
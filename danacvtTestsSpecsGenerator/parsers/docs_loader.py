@@ -2,10 +2,8 @@ import re
 import os
 from pathlib import Path
 from typing import Union
-import docx   # for .docx
 from typing import List, Dict, Tuple, Optional
 from ..models import TestStep, TestCase
-import pypandoc  # for conversion to markdown/plaintext
 
 
 REQ_PATTERNS = [
@@ -23,11 +21,13 @@ def load_text(path: str) -> str:
     if ext in [".txt",".md",".markdown",".csv",".log"]:
         return Path(path).read_text(encoding="utf-8", errors="ignore")
     if ext == ".docx":
-        if not docx: raise RuntimeError("python-docx not installed.")
+        try: import docx
+        except Exception: raise RuntimeError("python-docx not installed.")
         d = docx.Document(path)
         return "\n".join(p.text for p in d.paragraphs)
     if ext == ".pdf":
-        if not PyPDF2: raise RuntimeError("PyPDF2 not installed.")
+        try: import PyPDF2
+        except Exception: raise RuntimeError("PyPDF2 not installed.")
         text = []
         with open(path, "rb") as f:
             reader = PyPDF2.PdfReader(f)
@@ -108,9 +108,8 @@ def gen_permissions(req_id: str, req_text: str, scope: str, tags: List[str]) ->
     for role, expect in [("Admin user","Operation succeeds for admin"),
                          ("Standard user","Operation blocked/limited for standard user (if restricted)"),
                          ("Unauthenticated user","Operation denied with proper error")]:
-        steps = base_steps_for_requirement(req_text, scope)
-        steps.insert(1, TestStep(2, f"Authenticate as {role}"))
-        for i,s in enumerate(steps, start=1): s.number = i
+        base = base_steps_for_requirement(req_text, scope)
+        steps = [base[0], TestStep(2, f"Authenticate as {role}")] + [TestStep(s.number + 1, s.action, s.data) for s in base[1:]]
         out.append(TestCase(mk_id(), f"Permissions: {role} — {truncate(req_text, 45)}",
                             f"Role-based access for {req_id}.", [f"Accounts exist for role '{role}'"],
                             steps, expect, choose_priority(req_text), "permissions", ["permissions"]+tags, req_id))
@@ -0,0 +1,16 @@
+import json
+from typing import Iterator
+from ..models import TestCase, case_from_dict
+from ..fsutil import open_text
+
+def read_cases_jsonl(path: str) -> Iterator[TestCase]:
+    """Stream TestCase objects from a JSONL file written by export_jsonl (.gz / .zst by suffix)."""
+    decode = json.JSONDecoder().raw_decode   # one object per line; no whitespace scan around it
+    with open_text(path, "r") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield case_from_dict(decode(line)[0])
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"{path}:{n}: not a test case record ({e})") from None
@@ -1,10 +1,18 @@
-from typing import List
-from PIL import Image
-import pytesseract
-import cv2
+from typing import Dict, List, Optional, Tuple
 import re
 
-def ocr_lines(image_path: str) -> List[str]:
+def _ocr_libs():
+    """(PIL.Image, pytesseract), imported on first use so non-image runs never load them."""
+    try:
+        from PIL import Image
+        import pytesseract
+    except Exception:
+        return None, None
+    return Image, pytesseract
+
+def ocr_entries(image_path: str) -> List[Dict]:
+    """Word boxes from tesseract image_to_data, in reading order, with their confidence."""
+    Image, pytesseract = _ocr_libs()
     if not (Image and pytesseract):
         raise RuntimeError("Pillow + pytesseract required for mockup OCR.")
     img = Image.open(image_path)
@@ -14,8 +22,24 @@ def ocr_lines(image_path: str) -> List[str]:
         txt = (data["text"][i] or "").strip()
         if not txt: continue
         entries.append({"page": data["page_num"][i], "para": data["par_num"][i], "line": data["line_num"][i],
-                        "left": data["left"][i], "top": data["top"][i], "text": txt})
+                        "left": data["left"][i], "top": data["top"][i],
+                        "width": data["width"][i], "height": data["height"][i], "text": txt,
+                        "conf": float(data["conf"][i])})
     entries.sort(key=lambda e: (e["page"], e["para"], e["line"], e["left"]))
+    return entries
+
+def image_size(image_path: str) -> Tuple[int, int]:
+    """(width, height) without decoding the pixels."""
+    Image, _ = _ocr_libs()
+    if Image is None:
+        raise RuntimeError("Pillow required to read image sizes.")
+    with Image.open(image_path) as img:
+        return img.size
+
+def lines_from_entries(entries: List[Dict], min_conf: Optional[float] = None) -> List[str]:
+    """Join word entries into lines; words below min_conf (0-100) are dropped."""
+    if min_conf is not None:
+        entries = [e for e in entries if e["conf"] >= min_conf]
     joined, buf = [], []
     if entries:
         cur = (entries[0]["page"], entries[0]["para"], entries[0]["line"])
@@ -25,3 +49,6 @@ def ocr_lines(image_path: str) -> List[str]:
             buf.append(e["text"])
         if buf: joined.append(" ".join(buf))
     return [re.sub(r"\s+"," ", l).strip() for l in joined if l.strip()]
+
+def ocr_lines(image_path: str, min_conf: Optional[float] = None) -> List[str]:
+    return lines_from_entries(ocr_entries(image_path), min_conf=min_conf)
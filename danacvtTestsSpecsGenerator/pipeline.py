@@ -0,0 +1,188 @@
+"""
+Stage-graph executor for the generation pipeline.
+
+A run is a DAG of stages. Each stage declares the artifacts it requires and
+the ones it provides; it is called with a read-only mapping of the artifacts
+produced so far and returns a dict with the ones it provides:
+
+    g = Pipeline()
+    g.add("load", load_fn, provides=("raw",), pool="io")
+    g.add("generate", gen_fn, requires=("raw",), provides=("text_cases",))
+    g.add("booster", boost_fn, requires=("raw",), provides=("boosted",), pool="llm")
+    artifacts = g.run()
+
+A stage starts as soon as its inputs exist, so independent stages (e.g. the
+LLM UI spec and the booster) run concurrently. Stages run on named thread
+pools ("cpu", "io", "llm"). Threads are enough here because the heavy work
+already releases the GIL: tesseract runs as a subprocess, and the LLM calls
+wait on the network. Each stage is timed by profiling.stage().
+
+If a stage raises, stages that need its outputs are skipped and the first
+error is re-raised once the running stages finish.
+
+Pools are created per run unless the caller passes its own (`pools=`), as
+the Generator session does to keep its workers warm between runs; those are
+left running.
+
+`bounded_map` covers fan-out inside a stage (OCR of a folder of screens): at
+most `max_pending` items are in flight, and results come back in input order.
+That keeps memory bounded when the consumer is slower than the producers.
+"""
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from . import profiling
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+POOLS = ("cpu", "io", "llm")
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Mapping[str, Any]], Optional[Dict[str, Any]]]
+    requires: Tuple[str, ...] = ()
+    provides: Tuple[str, ...] = ()
+    pool: str = "cpu"
+
+
+class PipelineError(RuntimeError):
+    pass
+
+
+class Pipeline:
+    def __init__(self, workers: Optional[Dict[str, int]] = None, artifacts: Optional[Dict[str, Any]] = None,
+                 pools: Optional[Dict[str, Executor]] = None):
+        self.workers = {p: DEFAULT_WORKERS for p in POOLS}
+        self.workers.update(workers or {})
+        self.pools = pools
+        self.stages: Dict[str, Stage] = {}
+        self.initial: Dict[str, Any] = dict(artifacts or {})
+
+    def add(self, name: str, fn, requires: Iterable[str] = (), provides: Iterable[str] = (), pool: str = "cpu") -> Stage:
+        if name in self.stages:
+            raise PipelineError(f"Duplicate stage: {name}")
+        if pool not in POOLS:
+            raise PipelineError(f"Unknown pool {pool!r} for stage {name} (use one of {', '.join(POOLS)})")
+        stage = Stage(name, fn, tuple(requires), tuple(provides), pool)
+        self.stages[name] = stage
+        return stage
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.stages
+
+    def producers(self) -> Dict[str, str]:
+        """artifact → stage that provides it."""
+        out: Dict[str, str] = {}
+        for s in self.stages.values():
+            for a in s.provides:
+                if a in out or a in self.initial:
+                    raise PipelineError(f"Artifact {a!r} provided twice ({out.get(a, 'initial')}, {s.name})")
+                out[a] = s.name
+        return out
+
+    def order(self) -> List[Stage]:
+        """Stages in a valid sequential order; raises on missing inputs or cycles."""
+        producers = self.producers()
+        for s in self.stages.values():
+            missing = [a for a in s.requires if a not in producers and a not in self.initial]
+            if missing:
+                raise PipelineError(f"Stage {s.name} requires {', '.join(missing)}, which nothing provides")
+        done = set(self.initial)
+        ordered: List[Stage] = []
+        pending = list(self.stages.values())
+        while pending:
+            ready = [s for s in pending if all(a in done for a in s.requires)]
+            if not ready:
+                raise PipelineError("Cycle between stages: " + ", ".join(s.name for s in pending))
+            for s in ready:
+                ordered.append(s)
+                done.update(s.provides)
+                pending.remove(s)
+        return ordered
+
+    def describe(self) -> str:
+        lines = []
+        for s in self.order():
+            req = ", ".join(s.requires) or "-"
+            lines.append(f"  {s.name:<20} {'[' + s.pool + ']':<6} needs: {req}  →  {', '.join(s.provides) or '-'}")
+        return "\n".join(lines)
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage; returns all artifacts."""
+        self.order()  # validate before starting anything
+        artifacts: Dict[str, Any] = dict(self.initial)
+        failed: Dict[str, str] = {}  # artifact → stage that failed to produce it
+        errors: List[BaseException] = []
+        pending = dict(self.stages)
+        running: Dict[Future, Stage] = {}
+        own_pools = self.pools is None
+        pools = self.pools if not own_pools else {
+            p: ThreadPoolExecutor(max_workers=max(1, n), thread_name_prefix=f"danacvt-{p}")
+            for p, n in self.workers.items()}
+        try:
+            while pending or running:
+                for name, s in list(pending.items()):
+                    blocked = [a for a in s.requires if a in failed]
+                    if blocked:
+                        print(f"⚠️ Skipped {name}: {failed[blocked[0]]} failed")
+                        failed.update({a: name for a in s.provides})
+                        del pending[name]
+                    elif all(a in artifacts for a in s.requires):
+                        inputs = {a: artifacts[a] for a in s.requires}
+                        running[pools[s.pool].submit(self._call, s, inputs)] = s
+                        del pending[name]
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    s = running.pop(fut)
+                    try:
+                        out = fut.result() or {}
+                    except BaseException as e:
+                        errors.append(e)
+                        failed.update({a: s.name for a in s.provides})
+                        continue
+                    missing = [a for a in s.provides if a not in out]
+                    if missing:
+                        errors.append(PipelineError(f"Stage {s.name} did not provide {', '.join(missing)}"))
+                        failed.update({a: s.name for a in missing})
+                    artifacts.update({a: out[a] for a in s.provides if a in out})
+        finally:
+            if own_pools:
+                for p in pools.values():
+                    p.shutdown(wait=True)
+        if errors:
+            raise errors[0]
+        return artifacts
+
+    @staticmethod
+    def _call(stage: Stage, inputs: Dict[str, Any]):
+        with profiling.stage(stage.name):
+            return stage.fn(inputs)
+
+
+def bounded_map(fn: Callable[[Any], Any], items: Iterable[Any], workers: int = DEFAULT_WORKERS,
+                max_pending: Optional[int] = None, pool: Optional[Executor] = None) -> Iterator[Any]:
+    """fn over items on a thread pool (a new one unless given), yielding results in input order with at most max_pending in flight."""
+    max_pending = max_pending or 2 * workers
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="danacvt-map") as own:
+            yield from _bounded(fn, items, own, max_pending)
+    else:
+        yield from _bounded(fn, items, pool, max_pending)
+
+
+def _bounded(fn, items, pool: Executor, max_pending: int) -> Iterator[Any]:
+    window: deque = deque()
+    for item in items:
+        if len(window) >= max_pending:
+            yield window.popleft().result()
+        window.append(pool.submit(fn, item))
+    while window:
+        yield window.popleft().result()
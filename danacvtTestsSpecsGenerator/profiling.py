@@ -0,0 +1,162 @@
+"""
+Per-stage tracing for `danacvt-gen --profile`.
+
+    with profiling.stage("ocr", file=img):
+        ...
+
+When profiling is enabled, each stage records its wall time, its CPU time
+(the CPU time of the calling thread) and the tracemalloc peak of the process
+while it ran (stages that overlap in time share that peak). Stages may nest
+and may run on worker threads; LLM calls show up as "llm:<stage>" on the
+thread that made them. `finish()` writes a Chrome trace (trace.json; open it
+in chrome://tracing or https://ui.perfetto.dev) and prints a per-stage summary.
+One stage can also be run under cProfile and dumped to <stage>.prof.
+
+When profiling is disabled, `stage()` returns a shared no-op context manager
+(and cProfile/tracemalloc are never imported).
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_NOOP = nullcontext()
+
+_enabled = False
+_out_dir: Optional[Path] = None
+_cprofile_stage: Optional[str] = None
+_cprofiler = None  # the active cProfile.Profile, if any
+_events: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_active: List[Dict[str, int]] = []  # peak accumulators of the stages currently running
+_t0 = 0.0
+
+
+def configure(out_dir: Optional[str], cprofile_stage: Optional[str] = None) -> None:
+    """Enable profiling (out_dir=None disables it)."""
+    global _enabled, _out_dir, _cprofile_stage, _t0
+    _enabled = bool(out_dir)
+    _out_dir = Path(out_dir) if out_dir else None
+    _cprofile_stage = cprofile_stage or None
+    _events.clear()
+    if _enabled:
+        import tracemalloc
+
+        _t0 = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def stage(name: str, **args: Any):
+    """Context manager timing one pipeline stage (no-op unless configured)."""
+    if not _enabled:
+        return _NOOP
+    return _stage(name, args)
+
+
+@contextmanager
+def _stage(name: str, args: Dict[str, Any]):
+    global _cprofiler
+    import tracemalloc
+
+    frame = {"peak": 0}
+    with _lock:
+        _fold_peak(tracemalloc)
+        _active.append(frame)
+        profiler = None
+        if name == _cprofile_stage and _cprofiler is None:
+            import cProfile
+
+            profiler = _cprofiler = cProfile.Profile()
+    if profiler is not None:
+        profiler.enable()  # profiles the calling thread only
+
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        cpu = time.thread_time() - cpu_start
+        if profiler is not None:
+            profiler.disable()
+            _dump_cprofile(profiler, name)
+        event_args = dict(args, cpu_ms=round(cpu * 1000, 3))
+        with _lock:
+            if profiler is not None:
+                _cprofiler = None
+            _fold_peak(tracemalloc)
+            _active[:] = [f for f in _active if f is not frame]
+            event_args["peak_kb"] = round(frame["peak"] / 1024, 1)
+            _events.append({
+                "name": name,
+                "cat": name.split(":", 1)[0],
+                "ph": "X",
+                "ts": round((start - _t0) * 1e6, 1),
+                "dur": round(wall * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": event_args,
+            })
+
+
+def _fold_peak(tracemalloc) -> None:
+    """Credit the peak since the last fold to every running stage, then reset it (caller holds _lock)."""
+    peak = tracemalloc.get_traced_memory()[1]
+    for f in _active:
+        f["peak"] = max(f["peak"], peak)
+    tracemalloc.reset_peak()
+
+
+def _dump_cprofile(profiler, name: str) -> None:
+    _out_dir.mkdir(parents=True, exist_ok=True)
+    path = _out_dir / (name.replace(":", "_") + ".prof")
+    profiler.dump_stats(str(path))
+    print(f"✅ Wrote cProfile dump → {path} (python -m pstats {path})")
+
+
+def summarize(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Aggregate trace events (sorted by start time) by stage name."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for e in events:
+        row = rows.setdefault(e["name"], {"stage": e["name"], "calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_kb": 0.0})
+        row["calls"] += 1
+        row["wall_ms"] += e["dur"] / 1000
+        row["cpu_ms"] += e["args"]["cpu_ms"]
+        row["peak_kb"] = max(row["peak_kb"], e["args"]["peak_kb"])
+    return list(rows.values())
+
+
+def format_summary(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"  {'stage':<28} {'calls':>5} {'wall ms':>10} {'cpu ms':>10} {'peak KB':>10}"]
+    for r in rows:
+        peak = f"{r['peak_kb']:.1f}"
+        lines.append(f"  {r['stage']:<28} {r['calls']:>5} {r['wall_ms']:>10.1f} {r['cpu_ms']:>10.1f} {peak:>10}")
+    return "\n".join(lines)
+
+
+def finish() -> Optional[Path]:
+    """Write trace.json, print the per-stage summary and stop tracing."""
+    if not _enabled:
+        return None
+    _out_dir.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        events = sorted(_events, key=lambda e: e["ts"])
+    path = _out_dir / "trace.json"
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+    if events:
+        print("[PROFILE] Time and memory by stage:\n" + format_summary(summarize(events)))
+    print(f"✅ Wrote trace → {path} (open in https://ui.perfetto.dev or chrome://tracing)")
+    import tracemalloc
+
+    tracemalloc.stop()
+    return path
@@ -0,0 +1,1081 @@
+"""
+Embeddable session API.
+
+    from danacvtTestsSpecsGenerator import Generator
+
+    with Generator(scope="Login", tags="auth") as gen:
+        cases = gen.from_document("specs/login.md")
+        gen.export_csv(cases, "outputs/login.csv")
+        result = gen.run(file="mockups/login.png", ui_spec="login_spec.md", out="login_ui.csv")
+
+A Generator keeps its state warm between calls: the stage thread pools, OCR
+and per-screen caches (keyed by path, mtime and size, so only edited screens
+are redone), and the LLM clients and latency statistics, which are
+process-wide. Long-lived workers can therefore process many inputs without
+paying start-up costs on each one. `danacvt-gen` is a thin wrapper: argparse → Options → Generator.run.
+
+Options mirrors the CLI flags (same names as the argparse dests). Options
+given to Generator(...) are the session defaults, and keyword overrides on
+each call apply to that call only. Bad inputs raise ValueError or
+FileNotFoundError.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields, replace
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Parsers
+from .parsers.docs_loader import load_text, extract_requirements
+from .parsers.jsonl_loader import read_cases_jsonl
+from .parsers.ocr import ocr_entries, lines_from_entries, image_size
+from .parsers.ui_ocr_parser import parse_ui_from_ocr
+
+# Generators
+from .generators.doc_tests import generate_test_cases_from_text, generate_cases_for_requirement
+from .generators.ui_tests import generate_ui_cases
+from .generators.heuristic_ui_spec import write_heuristic_ui_spec
+
+# LLM: prompt compaction only; the LLM stages are imported when they run
+# (see the _st_* stage functions), so runs without LLM options never load them.
+from .llm.compaction import clean_screen, compact_screens, CompactedContext
+from .config import DEFAULT_CHUNK_TOKENS, DEFAULT_CONCURRENCY, DEFAULT_MAX_BOOSTED, HIERARCHICAL_MIN_SCREENS
+
+# Exporters
+from .exporters.csv_exporter import export_csv
+from .exporters.feature_exporter import export_feature
+from .exporters.jsonl_exporter import export_jsonl, is_jsonl, JSONL_SUFFIXES
+
+# Updaters (incremental merge)
+from .updaters.ui_spec_updater import merge_ui_spec
+from .updaters.cvs_updater import merge_cases_into_csv
+
+# Models
+from .models import TestCase, assign_ids
+
+from . import profiling
+from .fsutil import atomic_write_text
+from .manifest import RunManifest, fingerprint, file_fingerprint
+from .pipeline import Pipeline, bounded_map, DEFAULT_WORKERS
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+DOC_EXTS = {".txt", ".md", ".docx", ".pdf"}
+CACHE_SIZE = 512  # screens kept warm (OCR entries and per-screen results)
+
+
+# -----------------------------
+# helpers
+# -----------------------------
+def _is_image(path: str) -> bool:
+    return Path(path).suffix.lower() in IMAGE_EXTS
+
+def _is_doc(path: str) -> bool:
+    return Path(path).suffix.lower() in DOC_EXTS
+
+def _ensure_out_path(p: str) -> str:
+    """If user provided just a filename, write to outputs/<filename>."""
+    if not p:
+        return p
+    if os.path.dirname(p):
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        return p
+    os.makedirs("outputs", exist_ok=True)
+    return os.path.join("outputs", p)
+
+def _collect_images(folder: str) -> list[str]:
+    p = Path(folder)
+    if not p.is_dir():
+        raise FileNotFoundError(f"Not a folder: {folder}")
+    imgs = [str(f) for f in p.iterdir() if f.suffix.lower() in IMAGE_EXTS]
+    return _natural_sort(imgs)
+
+def _natural_sort(paths: list[str]) -> list[str]:
+    def key(s: str):
+        # split digits for natural ordering: "screen10" after "screen2"
+        return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", Path(s).name)]
+    return sorted(paths, key=key)
+
+def _as_list(value: Union[str, Iterable[str], None]) -> List[str]:
+    """'a, b' or ['a', 'b'] → ['a', 'b']."""
+    if not value:
+        return []
+    items = value.split(",") if isinstance(value, str) else value
+    return [s.strip() for s in items if s.strip()]
+
+
+def input_kind(file: Optional[str] = None, folder: Optional[str] = None) -> Tuple[str, List[str]]:
+    """("doc" | "image" | "folder" | "cases", screen images) for one input; raises ValueError on bad inputs."""
+    if bool(file) == bool(folder):
+        raise ValueError("You must pass exactly one of --file or --folder.")
+    if folder:
+        images = _collect_images(folder)
+        if not images:
+            raise ValueError(f"No images found in {folder}")
+        return "folder", images
+    if is_jsonl(file):
+        return "cases", []
+    if _is_doc(file):
+        return "doc", []
+    if _is_image(file):
+        return "image", [file]
+    raise ValueError(
+        f"Unsupported input type: {file}\n"
+        f"Supported docs: {', '.join(sorted(DOC_EXTS))}\n"
+        f"Supported images: {', '.join(sorted(IMAGE_EXTS))}\n"
+        f"Supported test case files: {', '.join(JSONL_SUFFIXES)}"
+    )
+
+
+# -----------------------------
+# options / results
+# -----------------------------
+@dataclass
+class Options:
+    """One run's settings; field names and defaults follow the danacvt-gen flags."""
+    file: Optional[str] = None
+    folder: Optional[str] = None
+    scope: str = ""
+    tags: Union[str, List[str]] = ""
+
+    # outputs (None = not written); bare file names go to outputs/
+    out: Optional[str] = None
+    feature: Optional[str] = None
+    feature_outline: bool = False
+    jsonl: Optional[str] = None
+    ui_spec: Optional[str] = None
+    ui_flow_spec: Optional[str] = None
+    llm_ui_spec: Optional[str] = None
+    llm_flow_spec: Optional[str] = None
+    flow_spec: bool = False
+    flow_mode: str = "auto"
+
+    # generation
+    max_per_req: int = 10
+
+    # LLM
+    use_llm: bool = False
+    llm_model: str = "gpt-4o-mini"
+    llm_vision: bool = False
+    llm_input_mode: Optional[str] = None
+    llm_mode_report: Optional[str] = None
+    llm_temperature: float = 0.2
+    llm_max_tokens: int = 4000
+    llm_deadline: str = ""
+    llm_hedge: bool = False
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_initial: float = 10.0
+    llm_batch_out: Optional[str] = None
+    llm_batch_results: Optional[str] = None
+    llm_ledger: Optional[str] = None
+    ocr_min_conf: float = 30.0
+    compact_context: bool = True
+    llm_token_budget: int = 0
+    llm_chunk_tokens: int = DEFAULT_CHUNK_TOKENS
+    llm_concurrency: int = DEFAULT_CONCURRENCY
+    llm_max_boosted: int = DEFAULT_MAX_BOOSTED
+
+    # incremental update / merge
+    update_ui_spec: Optional[str] = None
+    replace_sections: Union[str, List[str]] = ""
+    update_csv: Optional[str] = None
+    update_db: Optional[str] = None
+    merge_key: str = "Title"
+    prune: bool = False
+    manifest: Optional[str] = None              # run manifest for incremental regeneration (see manifest.py)
+
+    # execution
+    workers: int = DEFAULT_WORKERS
+
+    @classmethod
+    def from_namespace(cls, ns: Any) -> "Options":
+        """Options from an argparse namespace (attributes that are not options are ignored)."""
+        return cls(**{f.name: getattr(ns, f.name) for f in fields(cls) if hasattr(ns, f.name)})
+
+    def uses_llm(self) -> bool:
+        return bool(self.use_llm or self.llm_ui_spec or self.llm_flow_spec)
+
+
+@dataclass
+class RunResult:
+    kind: str                                   # "doc", "image" or "folder"
+    cases: List[TestCase]
+    artifacts: Dict[str, Any] = field(default_factory=dict)
+    llm_deferred: int = 0                       # requests written to the batch file (--llm-batch-out)
+
+
+@dataclass
+class _Outputs:
+    """Normalized output paths (bare file names go to outputs/)."""
+    csv: Optional[str] = None
+    feature: Optional[str] = None
+    jsonl: Optional[str] = None
+    ui_spec: Optional[str] = None
+    llm_ui_spec: Optional[str] = None
+    update_ui_spec: Optional[str] = None
+    update_csv: Optional[str] = None
+    update_db: Optional[str] = None
+    manifest: Optional[str] = None
+
+    @classmethod
+    def from_options(cls, opts: Options) -> "_Outputs":
+        return cls(
+            csv=_ensure_out_path(opts.out) if opts.out else None,
+            feature=_ensure_out_path(opts.feature) if opts.feature else None,
+            jsonl=_ensure_out_path(opts.jsonl) if opts.jsonl else None,
+            ui_spec=_ensure_out_path(opts.ui_spec) if opts.ui_spec else None,
+            llm_ui_spec=_ensure_out_path(opts.llm_ui_spec) if opts.llm_ui_spec else None,
+            update_ui_spec=_ensure_out_path(opts.update_ui_spec) if opts.update_ui_spec else None,
+            update_csv=_ensure_out_path(opts.update_csv) if opts.update_csv else None,
+            update_db=_ensure_out_path(opts.update_db) if opts.update_db else None,
+            manifest=_ensure_out_path(opts.manifest) if opts.manifest else None,
+        )
+
+
+@dataclass
+class _Run:
+    """What the stage functions see: the session, the options of this call and derived values."""
+    session: "Generator"
+    opts: Options
+    kind: str
+    images: List[str]
+    out: _Outputs
+    tags: List[str]
+
+
+# -----------------------------
+# session
+# -----------------------------
+class Generator:
+    """A long-lived generation session; see the module docstring."""
+
+    def __init__(self, options: Optional[Options] = None, cache_size: int = CACHE_SIZE, **overrides):
+        self.options = replace(options or Options(), **overrides)
+        self._pools: Optional[Dict[str, ThreadPoolExecutor]] = None
+        self._pools_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._llm_used = False
+
+    # --- lifecycle ---
+    def __enter__(self) -> "Generator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pools (a later call starts new ones)."""
+        with self._pools_lock:
+            pools, self._pools = self._pools, None
+        for p in (pools or {}).values():
+            p.shutdown(wait=True)
+
+    def _get_pools(self) -> Dict[str, ThreadPoolExecutor]:
+        """Stage pools plus "map" for fan-out inside a stage, sized from the session options."""
+        with self._pools_lock:
+            if self._pools is None:
+                sizes = {"cpu": self.options.workers, "io": self.options.workers,
+                         "llm": self.options.llm_concurrency, "map": self.options.workers}
+                self._pools = {p: ThreadPoolExecutor(max_workers=max(1, n), thread_name_prefix=f"danacvt-{p}")
+                               for p, n in sizes.items()}
+            return self._pools
+
+    # --- warm caches ---
+    def _cached(self, key: Tuple, compute):
+        """LRU lookup; compute() runs outside the lock (two threads may both compute a miss)."""
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = compute()
+        with self._cache_lock:
+            self._cache[key] = value
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    @staticmethod
+    def _file_key(path: str) -> Tuple[str, int, int]:
+        st = os.stat(path)
+        return (os.path.realpath(path), st.st_mtime_ns, st.st_size)
+
+    def ocr_entries(self, img_path: str) -> list:
+        """parsers.ocr.ocr_entries, cached per (path, mtime, size)."""
+        return self._cached(("ocr",) + self._file_key(img_path), lambda: ocr_entries(img_path))
+
+    def screen(self, img_path: str, scope: str, min_conf: float) -> Dict[str, Any]:
+        """One screen of a flow: OCR, parsed meta, UI cases and prompt text; cached like ocr_entries."""
+        def compute():
+            with profiling.stage("ocr", file=img_path):
+                entries = self.ocr_entries(img_path)
+            lines = lines_from_entries(entries)
+            with profiling.stage("parse", file=img_path):
+                meta = parse_ui_from_ocr(lines)   # scope not required here
+            with profiling.stage("generate", file=img_path):
+                cases = generate_ui_cases(meta, scope=scope)
+            return {
+                "path": img_path,
+                "entries": entries,
+                "text": "\n".join(lines),
+                "llm_text": "\n".join(lines_from_entries(entries, min_conf=min_conf)),
+                "cases": cases,
+            }
+        return self._cached(("screen", scope, min_conf) + self._file_key(img_path), compute)
+
+    def map(self, fn, items: Iterable[Any]) -> Iterator[Any]:
+        """bounded_map on the session's fan-out pool."""
+        pools = self._get_pools()
+        return bounded_map(fn, items, workers=self.options.workers, pool=pools["map"])
+
+    # --- runs ---
+    def _prepare(self, overrides: Dict[str, Any]) -> _Run:
+        opts = replace(self.options, **overrides)
+        kind, images = input_kind(opts.file, opts.folder)
+        if opts.uses_llm():
+            self._configure_llm(opts)
+        return _Run(self, opts, kind, images, _Outputs.from_options(opts), _as_list(opts.tags))
+
+    def _configure_llm(self, opts: Options) -> None:
+        from .llm import latency as llm_latency
+        from .llm import ledger as llm_ledger
+        from .llm import batch as llm_batch
+
+        llm_latency.configure(
+            deadlines=llm_latency.parse_deadlines(opts.llm_deadline),
+            hedge=opts.llm_hedge,
+            hedge_percentile=opts.llm_hedge_percentile,
+            hedge_initial_s=opts.llm_hedge_initial,
+        )
+        if opts.llm_ledger:
+            llm_ledger.configure(opts.llm_ledger)
+        if opts.llm_batch_out or opts.llm_batch_results:
+            if opts.llm_batch_results and not os.path.isfile(opts.llm_batch_results):
+                raise FileNotFoundError(f"--llm-batch-results not found: {opts.llm_batch_results}")
+            llm_batch.configure(out_path=opts.llm_batch_out, results_path=opts.llm_batch_results)
+        elif llm_batch.active():
+            llm_batch.configure()   # a previous run's batch files don't apply to this one
+        self._llm_used = True
+
+    def graph(self, **overrides) -> Pipeline:
+        """The stage graph a run with these options would execute (see Pipeline.describe)."""
+        return build_graph(self._prepare(overrides))
+
+    def run(self, **overrides) -> RunResult:
+        """One input (file= or folder=) through every stage its options ask for."""
+        r = self._prepare(overrides)
+        artifacts = build_graph(r).run()
+        deferred = 0
+        if r.opts.uses_llm():
+            from .llm import batch as llm_batch
+            deferred = llm_batch.deferred_count
+        return RunResult(r.kind, artifacts.get("cases", []), artifacts, deferred)
+
+    def _run_input(self, overrides: Dict[str, Any], **inputs) -> List[TestCase]:
+        """run() on one input; `inputs` (file=, folder=) win over the same keys in overrides."""
+        opts = {"out": None, **overrides}
+        opts.update(inputs)
+        return self.run(**opts).cases
+
+    def from_document(self, path: str, **overrides) -> List[TestCase]:
+        """Test cases for a .txt/.md/.docx/.pdf document (nothing written unless asked)."""
+        return self._run_input(overrides, file=path, folder=None)
+
+    def from_image(self, path: str, **overrides) -> List[TestCase]:
+        """Test cases for one mockup image."""
+        return self._run_input(overrides, file=path, folder=None)
+
+    def from_folder(self, folder: str, **overrides) -> List[TestCase]:
+        """Test cases for a folder of screens, treated as one flow."""
+        return self._run_input(overrides, file=None, folder=folder)
+
+    # --- exports / merges ---
+    def export_csv(self, cases: Iterable[TestCase], path: str) -> str:
+        """Write cases (any iterable; rows are streamed) as CSV."""
+        path = _ensure_out_path(path)
+        export_csv(cases, path)
+        return path
+
+    def export_jsonl(self, cases: Iterable[TestCase], path: str) -> str:
+        """Write cases as JSON Lines (.jsonl, .jsonl.gz, .jsonl.zst); see load_cases."""
+        path = _ensure_out_path(path)
+        export_jsonl(cases, path)
+        return path
+
+    def load_cases(self, path: str) -> Iterator[TestCase]:
+        """Stream the cases of a JSONL file (from export_jsonl or --jsonl)."""
+        return read_cases_jsonl(path)
+
+    def export_feature(self, cases: Iterable[TestCase], path: str, feature_name: Optional[str] = None,
+                       outline: Optional[bool] = None) -> str:
+        path = _ensure_out_path(path)
+        outline = self.options.feature_outline if outline is None else outline
+        export_feature(cases, path, feature_name=feature_name or self.options.scope, outline=outline)
+        return path
+
+    def merge_csv(self, path: str, cases: Iterable[TestCase], prune: Optional[bool] = None) -> int:
+        """Merge cases into a master CSV; returns the row count."""
+        prune = self.options.prune if prune is None else prune
+        return merge_cases_into_csv(_ensure_out_path(path), cases, match_key=self.options.merge_key, prune=prune)
+
+    def merge_db(self, path: str, cases: Iterable[TestCase], prune: Optional[bool] = None) -> Dict[str, int]:
+        """Merge cases into a SQLite store (see updaters.sqlite_store); returns the counts."""
+        from .updaters.sqlite_store import merge_cases_into_db
+
+        prune = self.options.prune if prune is None else prune
+        return merge_cases_into_db(_ensure_out_path(path), cases, match_key=self.options.merge_key, prune=prune)
+
+    def merge_spec(self, path: str, new_md: str, replace_sections: Union[str, List[str], None] = None,
+                   source_label: str = "New input") -> Optional[str]:
+        """
+        Append new_md to a Markdown spec, or replace the named sections. Returns the
+        merged Markdown, or None if it was already there (the file is then not written).
+        """
+        sections = _as_list(replace_sections)
+        return merge_ui_spec(
+            existing_md_path=_ensure_out_path(path),
+            new_md_text=new_md,
+            strategy="replace_sections" if sections else "append",
+            replace_sections=sections or None,
+            source_label=source_label,
+        )
+
+    def llm_report(self) -> str:
+        """Per-stage LLM latency seen by this process ("" if no LLM stage ran)."""
+        if not self._llm_used:
+            return ""
+        from .llm import latency as llm_latency
+        return llm_latency.stats.report()
+
+
+# -----------------------------
+# stage graph
+# -----------------------------
+def build_graph(r: _Run) -> Pipeline:
+    """
+    Map the options onto a stage graph. r.kind is "doc", "image", "folder" or
+    "cases" (a JSONL file of cases, which go straight to the exports / merges).
+    Artifacts: context (LLM prompt text), heuristic_cases / boosted /
+    vision_cases → cases, and one "*_written" marker per file written.
+    With --manifest, generate/screens also provide the manifest, the booster
+    works per unit and the merges mark what the previous run produced and
+    this one did not as obsolete.
+    """
+    g = Pipeline(pools=r.session._get_pools())
+    if r.kind == "cases":
+        g.add("load_cases", partial(_st_load_cases, r), provides=("cases",), pool="io")
+        _add_output_stages(g, r, incremental=False)
+        return g
+
+    opts, out = r.opts, r.out
+    llm_flow = bool(opts.use_llm or opts.llm_flow_spec)
+    case_sources = ["heuristic_cases"]
+    spec_markers = []
+    incremental = bool(out.manifest) and r.kind in ("doc", "folder")
+
+    if r.kind == "doc":
+        g.add("load", partial(_st_load, r), provides=("raw", "context"), pool="io")
+        if incremental:
+            g.add("generate", partial(_st_generate_doc_incremental, r), requires=("raw",),
+                  provides=("heuristic_cases", "units", "manifest"))
+        else:
+            g.add("generate", partial(_st_generate_doc, r), requires=("raw",), provides=("heuristic_cases",))
+    elif r.kind == "image":
+        g.add("ocr", partial(_st_ocr, r), provides=("entries", "meta", "ocr_text"), pool="io")
+        g.add("compact", partial(_st_compact_image, r), requires=("ocr_text",), provides=("context",))
+        g.add("generate", partial(_st_generate_ui, r), requires=("meta",), provides=("heuristic_cases",))
+        if out.ui_spec:
+            g.add("heuristic_ui_spec", partial(_st_heuristic_ui_spec, r), requires=("meta",),
+                  provides=("ui_spec_written",), pool="io")
+            spec_markers.append("ui_spec_written")
+        if out.llm_ui_spec:
+            g.add("mode_select", partial(_st_mode_select, r), requires=("entries", "ocr_text"),
+                  provides=("screen_modes",))
+    else:
+        g.add("screens", partial(_st_screens, r),
+              provides=("screens", "heuristic_cases") + (("manifest",) if incremental else ()), pool="io")
+        g.add("compact", partial(_st_compact_flow, r), requires=("screens",), provides=("llm_context",))
+        if llm_flow:
+            g.add("mode_select", partial(_st_mode_select, r), requires=("screens",), provides=("screen_modes",))
+        if opts.ui_flow_spec:
+            g.add("ui_flow_spec", partial(_st_ui_flow_spec, r), requires=("screens",), provides=("ui_flow_spec_written",), pool="io")
+        if opts.llm_flow_spec:
+            g.add("llm_flow_spec", partial(_st_llm_flow_spec, r), requires=("screens", "llm_context", "screen_modes"),
+                  provides=("llm_flow_spec_written",), pool="llm")
+        if opts.use_llm and incremental:
+            g.add("booster", partial(_st_booster_units, r), requires=("llm_context", "manifest"),
+                  provides=("boosted",), pool="llm")
+        elif opts.use_llm:
+            g.add("booster", partial(_st_booster_flow, r), requires=("llm_context",), provides=("boosted",), pool="llm")
+        if opts.use_llm:
+            g.add("flow_cases_vision", partial(_st_flow_cases_vision, r), requires=("screen_modes",),
+                  provides=("vision_cases",), pool="llm")
+            case_sources += ["boosted", "vision_cases"]
+
+    if r.kind != "folder":
+        if out.llm_ui_spec:
+            req = ("context", "screen_modes") if r.kind == "image" else ("context",)
+            g.add("llm_ui_spec", partial(_st_llm_ui_spec, r), requires=req,
+                  provides=("llm_ui_spec_written",), pool="llm")
+            spec_markers.append("llm_ui_spec_written")
+        if opts.use_llm and incremental:
+            g.add("booster", partial(_st_booster_units, r), requires=("units", "manifest"), provides=("boosted",), pool="llm")
+        elif opts.use_llm:
+            g.add("booster", partial(_st_booster, r), requires=("context",), provides=("boosted",), pool="llm")
+        if opts.use_llm:
+            case_sources.append("boosted")
+
+    if out.update_ui_spec:
+        g.add("merge_ui_spec", partial(_st_merge_ui_spec, r), requires=spec_markers,
+              provides=("ui_spec_merged",), pool="io")
+
+    g.add("cases", partial(_st_cases, r), requires=case_sources, provides=("cases",))
+    _add_output_stages(g, r, incremental)
+    return g
+
+
+def _add_output_stages(g: Pipeline, r: _Run, incremental: bool) -> None:
+    """Exports and merges of the "cases" artifact (and the manifest, last)."""
+    out = r.out
+    merge_req = ("cases", "manifest") if incremental else ("cases",)
+    merged = []
+    if out.feature:
+        g.add("export_feature", partial(_st_export_feature, r), requires=("cases",), provides=("feature_written",), pool="io")
+    if out.update_csv:
+        g.add("merge_csv", partial(_st_merge_csv, r), requires=merge_req, provides=("csv_written",), pool="io")
+        merged.append("csv_written")
+    elif out.csv:
+        g.add("export_csv", partial(_st_export_csv, r), requires=("cases",), provides=("csv_written",), pool="io")
+    if out.jsonl:
+        g.add("export_jsonl", partial(_st_export_jsonl, r), requires=("cases",), provides=("jsonl_written",), pool="io")
+    if out.update_db:
+        g.add("merge_db", partial(_st_merge_db, r), requires=merge_req, provides=("db_written",), pool="io")
+        merged.append("db_written")
+    if incremental:
+        # written last, so a failed merge is retried (with the same obsolete keys) on the next run
+        g.add("save_manifest", partial(_st_save_manifest, r), requires=["cases", "manifest"] + merged,
+              provides=("manifest_written",), pool="io")
+
+
+# --- inputs ---
+def _st_load(r: "_Run", a):
+    raw = load_text(r.opts.file)
+    return {"raw": raw, "context": raw}
+
+
+def _st_load_cases(r: "_Run", a):
+    """JSONL input: the cases as they were written (IDs included), no generation."""
+    cases = list(read_cases_jsonl(r.opts.file))
+    print(f"[INFO] Loaded {len(cases)} test cases from {r.opts.file}.")
+    return {"cases": cases}
+
+
+def _st_ocr(r: "_Run", a):
+    """Single image: OCR words → structured meta + prompt text (low-confidence words dropped)."""
+    entries = r.session.ocr_entries(r.opts.file)
+    lines = lines_from_entries(entries)
+    with profiling.stage("parse", file=r.opts.file):
+        meta = parse_ui_from_ocr(lines)
+    ocr_text = "\n".join(lines_from_entries(entries, min_conf=r.opts.ocr_min_conf))
+    return {"entries": entries, "meta": meta, "ocr_text": ocr_text}
+
+
+def _st_screens(r: "_Run", a):
+    """Folder: OCR, parse and generate UI cases per screen (bounded fan-out, results in order).
+
+    Screens are cached by the session, so a re-run only redoes the changed ones.
+    With --manifest, screens whose bytes are unchanged since the last run are
+    not OCR'd at all (their text, cases and, for --llm-input-mode auto, the
+    screen profile the mode choice is made from come from the manifest).
+    """
+    m = _open_manifest(r) if r.out.manifest else None
+    profiles = r.opts.llm_input_mode == "auto"
+
+    def one(img):
+        if m is None:
+            return r.session.screen(img, r.opts.scope, r.opts.ocr_min_conf)
+        key, fp = Path(img).name, file_fingerprint(img)
+        prev = m.lookup(key, fp)
+        # an entry written without a profile is redone once when auto mode needs one
+        if prev is not None and (prev.get("profile") or not profiles):
+            profile = dict(prev["profile"], path=img) if prev.get("profile") else None
+            return {"path": img, "entries": None, "text": prev["text"], "llm_text": prev["llm_text"],
+                    "cases": prev["cases"], "profile": profile}
+        s = r.session.screen(img, r.opts.scope, r.opts.ocr_min_conf)
+        extra = {}
+        if profiles:
+            from .llm.mode_select import profile_screen
+            extra["profile"] = asdict(profile_screen(img, s["entries"], image_size(img), s["llm_text"]))
+        m.record(key, fp, s["cases"], text=s["text"], llm_text=s["llm_text"], **extra)
+        return dict(s, **extra)
+
+    screens = list(r.session.map(one, r.images))
+    cases = [c for s in screens for c in s["cases"]]
+    if m is None:
+        return {"screens": screens, "heuristic_cases": cases}
+    print(m.summary("screens"))
+    return {"screens": screens, "heuristic_cases": cases, "manifest": m}
+
+
+def _st_compact_image(r: "_Run", a):
+    text = a["ocr_text"]
+    report = bool(r.opts.use_llm or r.out.llm_ui_spec)
+    if r.opts.compact_context:
+        compacted = compact_screens([text], token_budget=r.opts.llm_token_budget or None)
+        text = compacted.render()
+        if report:
+            print(compacted.report())
+    return {"context": text}
+
+
+def _st_compact_flow(r: "_Run", a):
+    llm_lines = [s["llm_text"] for s in a["screens"]]
+    report = bool(r.opts.use_llm or r.opts.llm_flow_spec)
+    if not r.opts.compact_context:
+        return {"llm_context": CompactedContext(screens=llm_lines)}
+    ctx = compact_screens(llm_lines, token_budget=r.opts.llm_token_budget or None)
+    if report:
+        print(ctx.report())
+    return {"llm_context": ctx}
+
+
+def _st_mode_select(r: "_Run", a):
+    """Per-screen "ocr"/"vision" choice; auto mode decides from OCR quality and image size."""
+    input_mode = r.opts.llm_input_mode or ("vision" if r.opts.llm_vision else "ocr")
+    if input_mode != "auto":
+        return {"screen_modes": [input_mode] * len(r.images)}
+    from .llm.mode_select import ScreenProfile, profile_screen, choose_mode, format_decisions, write_decisions
+
+    def profile(path, entries, text):
+        return profile_screen(path, entries, image_size(path), text)
+
+    if "screens" in a:
+        # screens reused from the manifest were not OCR'd; it stored their profiles
+        profiles = [ScreenProfile(**s["profile"]) if s.get("profile") else profile(s["path"], s["entries"], s["llm_text"])
+                    for s in a["screens"]]
+    else:
+        profiles = [profile(r.opts.file, a["entries"], a["ocr_text"])]
+    decisions = [choose_mode(p) for p in profiles]
+    print("[LLM] Input mode per screen:\n" + format_decisions(decisions))
+    if r.opts.llm_mode_report:
+        write_decisions(_ensure_out_path(r.opts.llm_mode_report), decisions)
+    return {"screen_modes": [d.mode for d in decisions]}
+
+
+# --- heuristic generation ---
+def _st_generate_doc(r: "_Run", a):
+    cases = generate_test_cases_from_text(a["raw"], scope=r.opts.scope, tags=r.tags, max_per_req=r.opts.max_per_req)
+    print(f"[INFO] Generated {len(cases)} text-based cases.")
+    return {"heuristic_cases": cases}
+
+
+def _open_manifest(r: "_Run") -> RunManifest:
+    """The run manifest; its settings cover every option that changes all cases, so a change starts over."""
+    o = r.opts
+    settings = fingerprint(
+        r.kind, os.path.realpath(o.file or o.folder), o.scope, ",".join(r.tags), o.max_per_req, o.ocr_min_conf,
+        o.compact_context, o.llm_token_budget, o.llm_model, o.llm_temperature, o.llm_max_tokens, o.llm_chunk_tokens,
+    )
+    return RunManifest(r.out.manifest, settings, scope=o.scope)
+
+
+def _st_generate_doc_incremental(r: "_Run", a):
+    """--manifest: generate cases only for requirements whose text changed; reuse the rest."""
+    m = _open_manifest(r)
+    cases: List[TestCase] = []
+    units = []   # (fingerprint, label, text) for the booster
+    for req_id, text in extract_requirements(a["raw"]):
+        fp = fingerprint(text)
+        prev = m.lookup(req_id, fp)
+        if prev is None:
+            req_cases = generate_cases_for_requirement(req_id, text, r.opts.scope, r.tags, r.opts.max_per_req)
+            m.record(req_id, fp, req_cases)
+        else:
+            req_cases = prev["cases"]
+        cases.extend(req_cases)
+        units.append((fp, req_id, text))
+    print(m.summary())
+    print(f"[INFO] Generated {len(cases)} text-based cases.")
+    return {"heuristic_cases": cases, "units": units, "manifest": m}
+
+
+def _st_generate_ui(r: "_Run", a):
+    cases = generate_ui_cases(a["meta"], scope=r.opts.scope)
+    print(f"[INFO] Generated {len(cases)} UI (OCR) cases.")
+    return {"heuristic_cases": cases}
+
+
+def _st_heuristic_ui_spec(r: "_Run", a):
+    write_heuristic_ui_spec(r.out.ui_spec, a["meta"], r.opts.scope)
+    print(f"✅ Wrote heuristic UI spec → {r.out.ui_spec}")
+    return {"ui_spec_written": True}
+
+
+def _st_ui_flow_spec(r: "_Run", a):
+    # simple stitched heuristic spec: the combined OCR text per screen
+    combined = "\n\n".join(f"### Screen {i+1}\n\n" + s["text"] for i, s in enumerate(a["screens"]))
+    outp = _ensure_out_path(r.opts.ui_flow_spec)
+    atomic_write_text(outp, f"# Heuristic Flow Spec — {r.opts.scope}\n\n{combined}\n")
+    print(f"✅ Wrote heuristic flow spec → {outp}")
+    return {"ui_flow_spec_written": True}
+
+
+# --- LLM ---
+def _st_llm_ui_spec(r: "_Run", a):
+    written = False
+    try:
+        from .llm.ui_spec_text import llm_ui_spec_from_ocr
+        from .llm.ui_spec_vision import llm_ui_spec_from_image
+
+        if r.kind == "image" and a["screen_modes"][0] == "vision":
+            md = llm_ui_spec_from_image(
+                img_path=r.opts.file,
+                scope=r.opts.scope,
+                model=r.opts.llm_model,
+                temperature=r.opts.llm_temperature,
+                max_tokens=r.opts.llm_max_tokens,
+            )
+        else:
+            # OCR text → LLM spec (works for images w/ OCR lines or docs)
+            md = llm_ui_spec_from_ocr(
+                ocr_text=a["context"] or load_text(r.opts.file),
+                img_path=r.opts.file,
+                scope=r.opts.scope,
+                model=r.opts.llm_model,
+                temperature=r.opts.llm_temperature,
+                max_tokens=r.opts.llm_max_tokens,
+            )
+        if md and md.strip():
+            atomic_write_text(r.out.llm_ui_spec, md)
+            print(f"✅ Wrote LLM UI spec → {r.out.llm_ui_spec}")
+            written = True
+        else:
+            print("⚠️ Skipped LLM UI spec: empty content returned.")
+    except Exception as e:
+        print(f"⚠️ Skipped LLM UI spec: {e}")
+    return {"llm_ui_spec_written": written}
+
+
+def _st_booster(r: "_Run", a):
+    from .llm.chunked_booster import llm_boosted_cases_chunked
+
+    boosted = llm_boosted_cases_chunked(
+        scope=r.opts.scope,
+        context_text=a["context"],
+        model=r.opts.llm_model,
+        temperature=r.opts.llm_temperature,
+        max_tokens=r.opts.llm_max_tokens,
+        max_ideas=10,
+        chunk_tokens=r.opts.llm_chunk_tokens,
+        concurrency=r.opts.llm_concurrency,
+        max_total=r.opts.llm_max_boosted,
+    )
+    if boosted:
+        print(f"✅ Added {len(boosted)} LLM-boosted cases.")
+    else:
+        print("ℹ️ No LLM-boosted ideas added (see [LLM] logs above).")
+    return {"boosted": boosted}
+
+
+FLOW_BOOST_INSTRUCTIONS = (
+    "You are generating TEST CASES for a multi-screen flow.\n"
+    "Focus on end-to-end transitions, validation across screens, guardrails, and error handling."
+)
+
+
+def _st_booster_flow(r: "_Run", a):
+    from .llm.chunked_booster import llm_boosted_cases_chunked
+
+    # Combine OCR into one flow context
+    boosted = llm_boosted_cases_chunked(
+        scope=r.opts.scope,
+        context_text=a["llm_context"].render(),
+        instructions=FLOW_BOOST_INSTRUCTIONS,
+        model=r.opts.llm_model,
+        temperature=r.opts.llm_temperature,
+        max_tokens=r.opts.llm_max_tokens,
+        max_ideas=15,  # a bit higher for flow coverage
+        chunk_tokens=r.opts.llm_chunk_tokens,
+        concurrency=r.opts.llm_concurrency,
+        max_total=r.opts.llm_max_boosted,
+    )
+    if boosted:
+        print(f"✅ Added {len(boosted)} LLM flow test cases (OCR).")
+    else:
+        print("ℹ️ No LLM flow test cases added (OCR).")
+    return {"boosted": boosted}
+
+
+def _st_booster_units(r: "_Run", a):
+    """
+    --manifest: boost only the requirements / screens not covered by a boost
+    chunk of the previous run that is still valid, and keep that chunk's cases.
+    Requirement labels are positions (REQ-nnn shift when one is inserted), so
+    requirements are fingerprinted by text and their boosted cases trace to the scope.
+    """
+    from .llm.chunked_booster import llm_boosted_units, reduce_ideas
+
+    m: RunManifest = a["manifest"]
+    flow = r.kind == "folder"
+    if flow:
+        ctx = a["llm_context"]
+        chrome = "\n".join(ctx.common_chrome)
+        instructions = FLOW_BOOST_INSTRUCTIONS
+        if chrome:
+            instructions += f"\n\n[Common chrome — present on most screens]\n{chrome}"
+        units = [(fingerprint(f"Screen {i+1}", chrome, t), f"Screen {i+1}", f"[Screen {i+1}]\n{t}")
+                 for i, t in enumerate(ctx.screens)]
+    else:
+        instructions, units = "", a["units"]
+
+    kept, todo = m.plan_boost(fp for fp, _, _ in units)
+    todo = set(todo)
+    batches = llm_boosted_units(
+        scope=r.opts.scope,
+        units=[u for u in units if u[0] in todo],
+        model=r.opts.llm_model,
+        temperature=r.opts.llm_temperature,
+        max_tokens=r.opts.llm_max_tokens,
+        max_ideas=15 if flow else 10,
+        chunk_tokens=r.opts.llm_chunk_tokens,
+        concurrency=r.opts.llm_concurrency,
+        instructions=instructions,
+        trace_labels=flow,
+    )
+    for keys, cases in batches:
+        if cases:   # an empty answer (error, deferred batch) is retried next run
+            m.record_boost(keys, cases)
+    boosted = reduce_ideas([kept] + [cases for _, cases in batches], r.opts.llm_max_boosted)
+    if kept:
+        print(f"ℹ️ Reused {len(kept)} LLM-boosted cases; boosted {len(todo)} changed unit(s).")
+    if boosted:
+        print(f"✅ Added {len(boosted)} LLM-boosted cases.")
+    else:
+        print("ℹ️ No LLM-boosted ideas added (see [LLM] logs above).")
+    return {"boosted": boosted}
+
+
+def _st_flow_cases_vision(r: "_Run", a):
+    vision_images = [img for img, m in zip(r.images, a["screen_modes"]) if m == "vision"]
+    vision_cases: List[TestCase] = []
+    if not vision_images:
+        return {"vision_cases": vision_cases}
+    try:
+        import base64
+        from .llm.backend import chat_completion, require_llm
+        from .llm.json_extract import safe_json_parse
+        from .models import TestStep, mk_id
+        require_llm()
+
+        # Build multi-image message content
+        def _b64(p):
+            with open(p, "rb") as f: return base64.b64encode(f.read()).decode("utf-8")
+        images_payload = [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,{_b64(p)}"}} for p in vision_images]
+
+        flow_prompt = f"""
+        You are a senior QA. Create a list of up to 6 concise, **high-signal TEST CASES** for the multi-screen flow "{r.opts.scope}".
+        Return strict JSON array: each item with title, description, preconditions[], steps[], expected_result, type, priority, tags[].
+        Emphasize inter-screen transitions, validation, error handling, toggles, long names, disabled states, and save/apply behavior.
+        """
+        resp = chat_completion(
+            stage="flow_cases_vision",
+            scope=r.opts.scope,
+            model=r.opts.llm_model,
+            temperature=r.opts.llm_temperature,
+            max_tokens=r.opts.llm_max_tokens,
+            messages=[{"role":"user","content":[{"type":"text","text":flow_prompt}] + images_payload}],
+        )
+        raw = (resp.choices[0].message.content or "").strip()
+        ideas = safe_json_parse(raw, expect=list)
+
+        def _strs(v):
+            # the model may return a string, or dicts/lists inside the array
+            return [str(x) for x in (v if isinstance(v, list) else [v]) if x]
+
+        for idea in ideas[:10]:
+            if not isinstance(idea, dict):
+                continue
+            steps = [TestStep(i+1, s) for i, s in enumerate(_strs(idea.get("steps", [])))]
+            vision_cases.append(TestCase(
+                id=mk_id(), title=idea.get("title","LLM Vision Case"),
+                description=idea.get("description",""),
+                preconditions=_strs(idea.get("preconditions",[])),
+                steps=steps,
+                expected_result=idea.get("expected_result",""),
+                priority=idea.get("priority","P2"),
+                type=idea.get("type","functional"),
+                tags=["llm","vision"] + _strs(idea.get("tags",[])),
+                trace_to=r.opts.scope
+            ))
+        if vision_cases:
+            print(f"✅ Added {len(vision_cases)} LLM flow test cases (Vision).")
+        else:
+            print("ℹ️ No LLM flow test cases added (Vision).")
+    except Exception as e:
+        print(f"⚠️ Skipped LLM flow test cases (Vision): {e}")
+    return {"vision_cases": vision_cases}
+
+
+def _st_llm_flow_spec(r: "_Run", a):
+    written = False
+    try:
+        from .llm.flow_hierarchical import llm_flow_spec_hierarchical
+        from .llm.ui_spec_text import llm_flow_spec_from_ocr_texts
+        from .llm.ui_spec_vision import llm_flow_spec_from_images
+
+        llm_context, screen_modes = a["llm_context"], a["screen_modes"]
+        n_vision = screen_modes.count("vision")
+        mixed = 0 < n_vision < len(r.images)
+        hierarchical = mixed or r.opts.flow_mode == "hierarchical" or (
+            r.opts.flow_mode == "auto" and len(r.images) > HIERARCHICAL_MIN_SCREENS
+        )
+        if hierarchical:
+            # per-screen summaries are cached by their input, so each gets its own screen's
+            # text; the compacted screens depend on every other screen (chrome, shared budget)
+            budget = r.opts.llm_token_budget or None
+            own_texts = [clean_screen(s["llm_text"], budget) if r.opts.compact_context else s["llm_text"]
+                         for s in a["screens"]]
+            md = llm_flow_spec_hierarchical(
+                scope=r.opts.scope,
+                image_paths=r.images,
+                ocr_texts=own_texts,
+                common_chrome=llm_context.common_chrome,
+                modes=screen_modes,
+                model=r.opts.llm_model,
+                temperature=r.opts.llm_temperature,
+                max_tokens=r.opts.llm_max_tokens,
+                concurrency=r.opts.llm_concurrency,
+            )
+        elif n_vision:
+            md = llm_flow_spec_from_images(
+                image_paths=r.images,
+                scope=r.opts.scope,
+                model=r.opts.llm_model,
+                temperature=r.opts.llm_temperature,
+                max_tokens=r.opts.llm_max_tokens,
+            )
+        else:
+            md = llm_flow_spec_from_ocr_texts(
+                ocr_texts=llm_context.screens,
+                common_chrome=llm_context.common_chrome,
+                scope=r.opts.scope,
+                model=r.opts.llm_model,
+                temperature=r.opts.llm_temperature,
+                max_tokens=r.opts.llm_max_tokens,
+            )
+        outp = _ensure_out_path(r.opts.llm_flow_spec)
+        atomic_write_text(outp, md)
+        print(f"✅ Wrote LLM flow spec → {outp}")
+        written = True
+    except Exception as e:
+        print(f"⚠️ Skipped LLM flow spec: {e}")
+    return {"llm_flow_spec_written": written}
+
+
+# --- merge / export ---
+def _st_merge_ui_spec(r: "_Run", a):
+    incoming_md = None
+    incoming_src = None
+    # Prefer LLM spec if produced this run, else heuristic if produced this run
+    if a.get("llm_ui_spec_written"):
+        incoming_md = Path(r.out.llm_ui_spec).read_text(encoding="utf-8")
+        incoming_src = f"LLM spec ({r.opts.llm_model})"
+    elif a.get("ui_spec_written"):
+        incoming_md = Path(r.out.ui_spec).read_text(encoding="utf-8")
+        incoming_src = "Heuristic spec"
+
+    if incoming_md:
+        replace_sections = _as_list(r.opts.replace_sections)
+        strategy = "replace_sections" if replace_sections else "append"
+        merged = merge_ui_spec(
+            existing_md_path=r.out.update_ui_spec,
+            new_md_text=incoming_md,
+            strategy=strategy,
+            replace_sections=replace_sections or None,
+            source_label=incoming_src or "New input"
+        )
+        if merged is None:
+            print(f"ℹ️ UI spec unchanged: {r.out.update_ui_spec} already has this content (strategy={strategy})")
+        else:
+            print(f"✅ Merged UI spec → {r.out.update_ui_spec} (strategy={strategy})")
+    else:
+        print("ℹ️ --update-ui-spec provided but no generated spec to merge (produce --ui-spec or --llm-ui-spec first).")
+    return {"ui_spec_merged": bool(incoming_md)}
+
+
+def _st_cases(r: "_Run", a):
+    """
+    Heuristic cases first, then LLM-boosted, then vision cases (same order as the
+    sequential CLI), with content-derived IDs. The cases are copied first because
+    per-screen cases are shared with the session cache.
+    """
+    cases: List[TestCase] = []
+    for k in ("heuristic_cases", "boosted", "vision_cases"):
+        cases.extend(replace(c) for c in a.get(k) or [])
+    assign_ids(cases, r.opts.scope)
+    if r.kind == "folder":
+        print(f"[INFO] Generated {len(cases)} UI cases across {len(r.images)} images.")
+    if not cases:
+        print("ℹ️ No test cases produced.")
+    return {"cases": cases}
+
+
+def _st_export_feature(r: "_Run", a):
+    if a["cases"]:
+        export_feature(a["cases"], r.out.feature, feature_name=r.opts.scope, outline=r.opts.feature_outline)
+        print(f"✅ Wrote feature file → {r.out.feature}")
+    return {"feature_written": bool(a["cases"])}
+
+
+def _obsolete(r: "_Run", a) -> List[str]:
+    return a["manifest"].obsolete_keys(a["cases"], r.opts.merge_key) if "manifest" in a else []
+
+
+def _st_merge_csv(r: "_Run", a):
+    obsolete = _obsolete(r, a)
+    if a["cases"] or obsolete:
+        total = merge_cases_into_csv(r.out.update_csv, a["cases"], match_key=r.opts.merge_key, prune=r.opts.prune,
+                                     obsolete=obsolete)
+        gone = f", {len(obsolete)} no longer generated" if obsolete else ""
+        print(f"✅ Merged {len(a['cases'])} cases into {r.out.update_csv} (total rows now: {total}{gone})")
+    return {"csv_written": bool(a["cases"] or obsolete)}
+
+
+def _st_merge_db(r: "_Run", a):
+    from .updaters.sqlite_store import merge_cases_into_db
+
+    obsolete = _obsolete(r, a)
+    if a["cases"] or obsolete:
+        c = merge_cases_into_db(r.out.update_db, a["cases"], match_key=r.opts.merge_key, prune=r.opts.prune,
+                                obsolete=obsolete)
+        print(f"✅ Merged {len(a['cases'])} cases into {r.out.update_db} "
+              f"({c['inserted']} new, {c['updated']} updated, {c['obsoleted']} obsolete; total rows now: {c['total']})")
+    return {"db_written": bool(a["cases"] or obsolete)}
+
+
+def _st_save_manifest(r: "_Run", a):
+    a["manifest"].save(a["cases"])
+    print(f"✅ Wrote manifest → {r.out.manifest}")
+    return {"manifest_written": True}
+
+
+def _st_export_jsonl(r: "_Run", a):
+    if a["cases"]:
+        export_jsonl(a["cases"], r.out.jsonl)
+        print(f"✅ Wrote {len(a['cases'])} test cases → {r.out.jsonl}")
+    return {"jsonl_written": bool(a["cases"])}
+
+
+def _st_export_csv(r: "_Run", a):
+    if a["cases"]:
+        export_csv(a["cases"], r.out.csv)
+        print(f"✅ Wrote {len(a['cases'])} test cases → {r.out.csv}")
+    return {"csv_written": bool(a["cases"])}
+
+
@@ -1,86 +1,112 @@
 from __future__ import annotations
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 import csv
 
-try:
-    import pandas as pd
-except Exception:
-    pd = None
-
 from ..models import TestCase
+from ..fsutil import atomic_path
+from ..exporters.csv_exporter import CSV_WRITE_OPTS as _WRITE_OPTS
 
 MERGE_KEY = "Title"   # default match key
+DEFAULT_HEADERS = ["ID","Title","Description","Preconditions","Steps","Expected Result","Priority","Type","Tags","Trace To","Status"]
+
+
+def _norm(key: Optional[str]) -> str:
+    return (key or "").strip().casefold()
 
-def _load_csv_dicts(path: str) -> List[Dict[str, str]]:
-    p = Path(path)
-    if not p.exists():
-        return []
-    if pd is not None:
-        df = pd.read_csv(p)
-        return df.to_dict(orient="records")
-    # stdlib fallback
-    with p.open("r", encoding="utf-8", newline="") as f:
-        r = csv.DictReader(f)
-        return list(r)
 
-def _write_csv_dicts(path: str, rows: List[Dict[str, str]]):
-    if pd is not None:
-        pd.DataFrame(rows).to_csv(path, index=False, encoding="utf-8")
-        return
-    if not rows:
-        # write empty with default headers
-        headers = ["ID","Title","Description","Preconditions","Steps","Expected Result","Priority","Type","Tags","Trace To","Status"]
-    else:
-        headers = list(rows[0].keys())
-        if "Status" not in headers:
-            headers.append("Status")
-            for r in rows:
-                r.setdefault("Status","active")
-    with open(path, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=headers)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+def _read_rows(path: str) -> Iterator[List[str]]:
+    """Stream the CSV as lists of cells (header first); utf-8-sig drops a BOM if present."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from csv.reader(f)
+
+
+def _index(path: str, match_key: str, wanted: Dict[str, dict]) -> Tuple[List[str], Dict[str, int]]:
+    """
+    (header, key → line number of its last row) for the keys in `wanted` only,
+    so the index stays as small as the incoming batch. The last row wins, as
+    it did when the whole file was loaded into a dict.
+    """
+    rows = _read_rows(path)
+    header = next(rows, [])
+    last: Dict[str, int] = {}
+    if match_key in header:
+        k = header.index(match_key)
+        for n, cells in enumerate(rows):
+            key = _norm(cells[k]) if k < len(cells) else ""
+            if key in wanted:
+                last[key] = n
+    return header, last
+
 
 def merge_cases_into_csv(
     csv_path: str,
-    new_cases: List[TestCase],
+    new_cases: Iterable[TestCase],
     match_key: str = MERGE_KEY,
-    prune: bool = False
+    prune: bool = False,
+    obsolete: Iterable[str] = ()
 ) -> int:
     """
-    Merge a list of TestCase into an existing CSV by 'match_key' (default Title).
+    Merge TestCases (any iterable, e.g. read_cases_jsonl) into an existing CSV by 'match_key' (default Title).
     - If match_key matches existing row → update fields but keep old ID.
     - If not found → append a new row (with new ID).
     - prune=True → mark rows missing in new set as Status='obsolete'.
+    - obsolete → match_key values to mark Status='obsolete' (cases a previous
+      run produced and this one did not; see manifest.RunManifest.obsolete_keys).
     Returns number of rows written.
-    """
-    existing = _load_csv_dicts(csv_path)
-    by_key = { (r.get(match_key,"") or "").strip().casefold(): (i, r) for i, r in enumerate(existing) }
 
-    new_title_keys = set()
+    The master is streamed, not loaded: one pass indexes the rows the incoming
+    cases match, a second copies every row to a temp file (updating matched
+    rows, marking pruned ones) and appends the new rows, and the temp file then
+    replaces the master. Memory grows with len(new_cases), not with the master,
+    and cells are copied as text (no NaN or float round-trips).
+    """
+    incoming: Dict[str, Dict[str, str]] = {}   # key → last incoming row with that key
+    ordered: List[Tuple[str, Dict[str, str]]] = []
     for case in new_cases:
         row = case.to_row()
         row.setdefault("Status","active")
-        key = (row.get(match_key,"") or "").strip().casefold()
-        new_title_keys.add(key)
-
-        if key in by_key:
-            idx, old = by_key[key]
-            # preserve old ID if present
-            row["ID"] = old.get("ID", row["ID"])
-            # merge/overwrite values
-            merged = { **old, **row }
-            existing[idx] = merged
-        else:
-            existing.append(row)
+        key = _norm(row.get(match_key,""))
+        incoming[key] = row
+        ordered.append((key, row))
+    gone = {_norm(k) for k in obsolete} - set(incoming)
 
-    if prune and existing:
-        for r in existing:
-            key = (r.get(match_key,"") or "").strip().casefold()
-            if key and key not in new_title_keys:
-                r["Status"] = "obsolete"
+    exists = Path(csv_path).exists()
+    header, last = _index(csv_path, match_key, incoming) if exists else ([], {})
+    if not header:
+        header = list(DEFAULT_HEADERS)
+    for col in DEFAULT_HEADERS:
+        if col not in header:
+            header.append(col)
+    k = header.index(match_key) if match_key in header else None
+    status = header.index("Status")
 
-    _write_csv_dicts(csv_path, existing)
-    return len(existing)
+    total = 0
+    with atomic_path(csv_path) as tmp, open(tmp, "w", encoding="utf-8", newline="") as out:
+        w = csv.writer(out, **_WRITE_OPTS)
+        w.writerow(header)
+        if exists:
+            rows = _read_rows(csv_path)
+            next(rows, None)
+            for n, cells in enumerate(rows):
+                if not cells:
+                    continue   # blank line
+                cells = (cells + [""] * len(header))[:len(header)]
+                key = _norm(cells[k]) if k is not None else ""
+                if key in last and last[key] == n:
+                    old = dict(zip(header, cells))
+                    row = dict(incoming[key])
+                    # preserve old ID if present
+                    row["ID"] = old.get("ID") or row["ID"]
+                    merged = { **old, **row }
+                    cells = [merged.get(c, "") for c in header]
+                elif (prune and key and key not in incoming) or key in gone:
+                    cells[status] = "obsolete"
+                w.writerow(cells)
+                total += 1
+        # new rows (every incoming case whose key is not in the master), in input order
+        for key, row in ordered:
+            if key not in last:
+                w.writerow([row.get(c, "") for c in header])
+                total += 1
+    return total
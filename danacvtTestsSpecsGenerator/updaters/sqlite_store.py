@@ -0,0 +1,293 @@
+"""
+SQLite master store for test cases, an alternative to a master CSV (--update-csv).
+
+    danacvt-gen --file login.md --scope "Login" --update-db outputs/cases.db --prune
+    danacvt-store import outputs/cases.db testcases_master.csv      # one-off migration
+    danacvt-store export-csv outputs/cases.db master.csv --status active
+    danacvt-store export-feature outputs/cases.db login.feature --name "Login"
+    danacvt-store stats outputs/cases.db
+
+Merges follow merge_cases_into_csv: cases are matched on the normalized
+title (or on ID), a match updates the latest row with that key (keeping its
+old ID), anything else is inserted (repeated new keys too), and prune marks
+the rows that were not in the batch as obsolete. A merge is one transaction
+of indexed lookups, so its cost grows with the batch rather than the store
+(prune additionally scans for rows to mark). Cells are stored as they appear in the CSV, so exports are
+byte-compatible with the CSV merge (benchmarks/bench_store.py checks this).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from ..models import TestCase, case_from_row
+from ..fsutil import atomic_path
+from .cvs_updater import DEFAULT_HEADERS, MERGE_KEY, _WRITE_OPTS, _norm
+from ..exporters.jsonl_exporter import is_jsonl
+from ..parsers.jsonl_loader import read_cases_jsonl
+
+# CSV header → column
+COLUMNS = {
+    "ID": "id", "Title": "title", "Description": "description", "Preconditions": "preconditions",
+    "Steps": "steps", "Expected Result": "expected_result", "Priority": "priority", "Type": "type",
+    "Tags": "tags", "Trace To": "trace_to", "Status": "status",
+}
+MATCH_COLUMNS = {"Title": "title_key", "ID": "id"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    seq             INTEGER PRIMARY KEY,
+    id              TEXT NOT NULL,
+    title           TEXT NOT NULL DEFAULT '',
+    title_key       TEXT NOT NULL DEFAULT '',
+    description     TEXT NOT NULL DEFAULT '',
+    preconditions   TEXT NOT NULL DEFAULT '',
+    steps           TEXT NOT NULL DEFAULT '',
+    expected_result TEXT NOT NULL DEFAULT '',
+    priority        TEXT NOT NULL DEFAULT '',
+    type            TEXT NOT NULL DEFAULT '',
+    tags            TEXT NOT NULL DEFAULT '',
+    trace_to        TEXT NOT NULL DEFAULT '',
+    status          TEXT NOT NULL DEFAULT '',
+    updated_at      TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS cases_id        ON cases(id);
+CREATE INDEX IF NOT EXISTS cases_title_key ON cases(title_key);
+CREATE INDEX IF NOT EXISTS cases_trace_to  ON cases(trace_to);
+CREATE INDEX IF NOT EXISTS cases_status    ON cases(status);
+"""
+
+_DATA_COLS = list(COLUMNS.values())
+_RECORD_COLS = _DATA_COLS + ["title_key", "updated_at"]
+_INSERT_SQL = f"INSERT INTO cases ({', '.join(_RECORD_COLS)}) VALUES ({', '.join(':' + c for c in _RECORD_COLS)})"
+
+
+def _record(row: Dict[str, str], now: str) -> Dict[str, str]:
+    rec = {col: row.get(h) or "" for h, col in COLUMNS.items()}
+    rec["title_key"] = _norm(rec["title"])
+    rec["updated_at"] = now
+    return rec
+
+
+class CaseStore:
+    """A test case store in one SQLite file (created on first use)."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "CaseStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # --- writes ---
+    def upsert(self, cases: Iterable[TestCase], match_key: str = MERGE_KEY, prune: bool = False,
+               obsolete: Iterable[str] = ()) -> Dict[str, int]:
+        """Merge cases like merge_cases_into_csv, in one transaction; returns inserted/updated/obsoleted counts."""
+        rows = []
+        for c in cases:
+            row = c.to_row()
+            row.setdefault("Status", "active")
+            rows.append(row)
+        return self.upsert_rows(rows, match_key=match_key, prune=prune, obsolete=obsolete)
+
+    def upsert_rows(self, rows: Iterable[Dict[str, str]], match_key: str = MERGE_KEY, prune: bool = False,
+                    obsolete: Iterable[str] = (), before_seq: Optional[int] = None) -> Dict[str, int]:
+        """
+        Merge CSV-shaped rows (header → cell); `obsolete` match-key values are marked obsolete.
+        Like the CSV merge, a row updates only the latest stored row with its key, and
+        only rows stored before this merge (seq ≤ before_seq, default: now) can match,
+        so incoming duplicates of a new key are all inserted.
+        """
+        if match_key not in MATCH_COLUMNS:
+            raise ValueError(f"match_key must be one of {', '.join(MATCH_COLUMNS)} (got {match_key!r})")
+        key_col = MATCH_COLUMNS[match_key]
+        now = datetime.now().isoformat(timespec="seconds")
+        if before_seq is None:
+            before_seq = self.last_seq()
+        # a match keeps its ID (unless it had none) and, when matching on ID, its key
+        set_cols = [c for c in _RECORD_COLS if c not in ("id", key_col)]
+        update_sql = (f"UPDATE cases SET {', '.join(f'{c} = :{c}' for c in set_cols)}, "
+                      f"id = CASE WHEN id = '' THEN :id ELSE id END WHERE seq = :seq")
+        latest_sql = f"SELECT MAX(seq) FROM cases WHERE {key_col} = ? AND seq <= ?"
+
+        counts = {"inserted": 0, "updated": 0, "obsoleted": 0}
+        keys = set()
+        with self.conn:
+            cur = self.conn.cursor()
+            for row in rows:
+                rec = _record(row, now)
+                keys.add(rec[key_col])
+                rec["seq"] = cur.execute(latest_sql, (rec[key_col], before_seq)).fetchone()[0]
+                if rec["seq"] is not None:
+                    cur.execute(update_sql, rec)
+                    counts["updated"] += 1
+                else:
+                    cur.execute(_INSERT_SQL, rec)
+                    counts["inserted"] += 1
+            if prune:
+                cur.execute("CREATE TEMP TABLE IF NOT EXISTS incoming_keys (key TEXT PRIMARY KEY)")
+                cur.execute("DELETE FROM incoming_keys")
+                cur.executemany("INSERT OR IGNORE INTO incoming_keys VALUES (?)", ((k,) for k in keys))
+                counts["obsoleted"] = cur.execute(
+                    f"UPDATE cases SET status = 'obsolete', updated_at = ? WHERE {key_col} != '' "
+                    f"AND status != 'obsolete' AND {key_col} NOT IN (SELECT key FROM incoming_keys)", (now,)
+                ).rowcount
+            gone = {_norm(k) if key_col == "title_key" else k for k in obsolete} - keys
+            for k in gone:
+                counts["obsoleted"] += cur.execute(
+                    f"UPDATE cases SET status = 'obsolete', updated_at = ? WHERE {key_col} = ? AND status != 'obsolete'",
+                    (now, k),
+                ).rowcount
+        return counts
+
+    def import_csv(self, csv_path: str, match_key: str = MERGE_KEY, batch: int = 10_000) -> Dict[str, int]:
+        """
+        Stream a master CSV into the store. Into an empty store the rows are
+        bulk-inserted as they are (duplicates included, like the CSV);
+        otherwise each row is merged on match_key.
+        """
+        totals = {"inserted": 0, "updated": 0, "obsoleted": 0}
+        bulk = self.count() == 0
+        before_seq = self.last_seq()   # the whole file is one merge, however it is chunked
+        now = datetime.now().isoformat(timespec="seconds")
+
+        def flush(chunk: List[Dict[str, str]]) -> None:
+            if bulk:
+                with self.conn:
+                    self.conn.executemany(_INSERT_SQL, (_record(r, now) for r in chunk))
+                totals["inserted"] += len(chunk)
+            else:
+                for k, v in self.upsert_rows(chunk, match_key, before_seq=before_seq).items():
+                    totals[k] += v
+
+        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+            chunk: List[Dict[str, str]] = []
+            for row in csv.DictReader(f):
+                chunk.append(row)
+                if len(chunk) >= batch:
+                    flush(chunk)
+                    chunk = []
+            flush(chunk)
+        return totals
+
+    # --- reads ---
+    def last_seq(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM cases").fetchone()[0]
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status is None:
+            return self.conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM cases WHERE status = ?", (status,)).fetchone()[0]
+
+    def status_counts(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM cases GROUP BY status ORDER BY status"))
+
+    def rows(self, status: Optional[str] = None, trace_to: Optional[str] = None) -> Iterator[Dict[str, str]]:
+        """CSV-shaped rows in insertion order, optionally filtered."""
+        where, params = [], []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if trace_to is not None:
+            where.append("trace_to = ?")
+            params.append(trace_to)
+        sql = f"SELECT {', '.join(_DATA_COLS)} FROM cases"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        headers = list(COLUMNS)
+        for values in self.conn.execute(sql + " ORDER BY seq", params):
+            yield dict(zip(headers, values))
+
+    def cases(self, status: Optional[str] = None, trace_to: Optional[str] = None) -> Iterator[TestCase]:
+        for row in self.rows(status, trace_to):
+            yield case_from_row(row)
+
+    # --- exports ---
+    def export_csv(self, out_path: str, status: Optional[str] = None) -> int:
+        """Write the store as a master CSV (same layout as the CSV merge); returns the row count."""
+        n = 0
+        with atomic_path(out_path) as tmp, open(tmp, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f, **_WRITE_OPTS)
+            w.writerow(DEFAULT_HEADERS)
+            for row in self.rows(status):
+                w.writerow([row[h] for h in DEFAULT_HEADERS])
+                n += 1
+        return n
+
+    def export_feature(self, out_path: str, feature_name: str, status: Optional[str] = "active",
+                       outline: bool = False) -> int:
+        from ..exporters.feature_exporter import export_feature
+
+        return export_feature(self.cases(status), out_path, feature_name=feature_name, outline=outline)
+
+
+def merge_cases_into_db(db_path: str, new_cases: Iterable[TestCase], match_key: str = MERGE_KEY, prune: bool = False,
+                        obsolete: Iterable[str] = ()) -> Dict[str, int]:
+    """merge_cases_into_csv for a SQLite store; returns inserted/updated/obsoleted and total rows."""
+    with CaseStore(db_path) as store:
+        counts = store.upsert(new_cases, match_key=match_key, prune=prune, obsolete=obsolete)
+        counts["total"] = store.count()
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser("danacvt-store", description="Manage a SQLite test case store.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="Import (merge) a master CSV or a JSONL case file into the store")
+    imp.add_argument("db")
+    imp.add_argument("csv", help="Master CSV, or a .jsonl / .jsonl.gz / .jsonl.zst case file")
+    imp.add_argument("--match-key", choices=sorted(MATCH_COLUMNS), default=MERGE_KEY)
+    exp = sub.add_parser("export-csv", help="Write the store as a master CSV")
+    exp.add_argument("db")
+    exp.add_argument("out")
+    exp.add_argument("--status", default=None, help="Only rows with this Status (e.g. active)")
+    feat = sub.add_parser("export-feature", help="Write the store as a Gherkin .feature file")
+    feat.add_argument("db")
+    feat.add_argument("out")
+    feat.add_argument("--name", required=True, help="Feature name")
+    feat.add_argument("--status", default="active", help="Only rows with this Status (default: active)")
+    feat.add_argument("--outline", action="store_true", help="Scenario Outlines for cases that share a step template")
+    st = sub.add_parser("stats", help="Row counts by Status")
+    st.add_argument("db")
+    args = ap.parse_args(argv)
+
+    if args.cmd != "import" and not Path(args.db).exists():
+        print(f"[error] Store not found: {args.db}")
+        return 2
+    with CaseStore(args.db) as store:
+        if args.cmd == "import":
+            if is_jsonl(args.csv):
+                c = store.upsert(read_cases_jsonl(args.csv), match_key=args.match_key)
+            else:
+                c = store.import_csv(args.csv, match_key=args.match_key)
+            print(f"✅ Imported {args.csv} → {args.db} ({c['inserted']} inserted, {c['updated']} updated)")
+        elif args.cmd == "export-csv":
+            n = store.export_csv(args.out, status=args.status)
+            print(f"✅ Wrote {n} test cases → {args.out}")
+        elif args.cmd == "export-feature":
+            n = store.export_feature(args.out, args.name, status=args.status or None, outline=args.outline)
+            print(f"✅ Wrote feature file ({n} cases) → {args.out}")
+        else:
+            for status, n in store.status_counts().items():
+                print(f"  {status or '-':<12} {n:>10}")
+            print(f"  {'total':<12} {store.count():>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
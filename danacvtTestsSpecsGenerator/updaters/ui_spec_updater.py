@@ -1,38 +1,173 @@
 from __future__ import annotations
+from bisect import bisect_left
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+import hashlib
+import json
 import re
 
+from ..fsutil import atomic_write_text
+
 SECTION_RE = re.compile(r"^(#{1,6})\s+(.*)$", re.M)
+CHANGE_LOG_RE = re.compile(r"^##\s*Change Log\s*$", re.M)
+ADDENDUM_PREFIX = "Addendum — "
+ADDENDUM_LOG_RE = re.compile(r"\n- \d{4}-\d\d-\d\d \d\d:\d\d: Added Addendum from ")
+LOG_TAIL_RE = re.compile(r"(?:^- \d{4}-\d\d-\d\d \d\d:\d\d: (?:Added|Replaced) .*\n?)+\Z", re.M)
+
+# spec.md → spec.md.hashes.json: hashes of the first and of the latest section body
+# of each title, and of the latest appended addendum
+HASHES_SUFFIX = ".hashes.json"
+HASHES_VERSION = 4
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+class Section(NamedTuple):
+    level: int
+    title: str
+    start: int        # heading line
+    body_start: int   # line after the heading
+    end: int          # next heading of any level, or end of document
+
+class SpecDocument:
+    """
+    A Markdown spec indexed once: every heading with its span. Edits are
+    collected and applied in one rebuild, so merging k sections into a
+    document of n characters costs O(n + k), not O(n * k).
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.sections: List[Section] = []
+        self._by_title: Dict[str, Section] = {}   # lower-cased title → first section with it
+        matches = list(SECTION_RE.finditer(text))
+        self._starts = starts = [m.start() for m in matches]
+        ends = starts[1:] + [len(text)]
+        for m, start, end in zip(matches, starts, ends):
+            marks, title = m.groups()
+            nl = text.find("\n", start, end)
+            sec = Section(len(marks), title.strip(), start, nl + 1 if nl != -1 else end, end)
+            self.sections.append(sec)
+            self._by_title.setdefault(sec.title.lower(), sec)
+
+    def find(self, title: str) -> Optional[Section]:
+        return self._by_title.get(title.lower())
+
+    def _blank_until_heading(self, pos: int) -> bool:
+        nxt = bisect_left(self._starts, pos)
+        end = self._starts[nxt] if nxt < len(self._starts) else len(self.text)
+        return not self.text[pos:end].strip()
+
+    def has_body(self, sec: Section, body: str) -> bool:
+        """True if sec's body already is `body` (surrounding whitespace aside), as section_hashes compares them."""
+        return self.text[sec.body_start:sec.end].strip() == body.strip()
+
+    def last_addendum_is(self, content: str) -> bool:
+        """True if the latest Addendum section holds exactly `content` (earlier ones may be reverted by it)."""
+        sec = next((s for s in reversed(self.sections) if s.title.startswith(ADDENDUM_PREFIX)), None)
+        block = "\n" + content.strip() + "\n"
+        if sec is None or not self.text.startswith(block, sec.body_start):
+            return False
+        after = sec.body_start + len(block)
+        return bool(ADDENDUM_LOG_RE.match(self.text, after)) or self._blank_until_heading(after)
+
+    def rebuild(self, replace: Optional[Mapping[str, str]] = None, addendum: str = "", log_entry: str = "") -> str:
+        """
+        The document with:
+        - each `replace` title's section body swapped for the new body (the
+          heading line is kept). Titles match the original headings, not
+          headings inside replacement bodies. Titles without a section are
+          appended as level-2 sections;
+        - a "## Change Log" heading, if there is none yet;
+        - `addendum` after it, then `log_entry`.
+        """
+        parts: List[str] = []
+        missing: List[str] = []
+        pos = 0
+        found = {}
+        for title, body in (replace or {}).items():
+            sec = self.find(title)
+            if sec is None:
+                missing.append(f"\n## {title}\n{body.rstrip()}\n")
+            else:
+                found.setdefault(sec.start, (sec, body))
+        for _, (sec, body) in sorted(found.items()):
+            head = self.text[pos:sec.body_start]
+            parts.append(head if head.endswith("\n") else head + "\n")
+            parts.append(body.rstrip() + "\n")
+            pos = sec.end
+        parts.append(self.text[pos:])
+
+        if missing:
+            extra = ""
+            for block in missing:
+                extra = extra.rstrip() + block + "\n"
+            _rstrip_parts(parts)
+            parts.append(extra)
+        if not any(CHANGE_LOG_RE.search(p) for p in parts):
+            _rstrip_parts(parts)
+            parts.append("\n\n## Change Log\n\n")
+        if addendum:
+            _rstrip_parts(parts)
+            parts.append(addendum)
+        parts.append(log_entry)
+        return "".join(parts)
+
+def _rstrip_parts(parts: List[str]) -> None:
+    """Strip trailing whitespace off the text the parts add up to, in place."""
+    while parts and not parts[-1].strip():
+        parts.pop()
+    if parts:
+        parts[-1] = parts[-1].rstrip()
+
+def _read_hashes(path: Path, spec_text: str) -> Dict[str, Any]:
+    """The sidecar, if it was written for this exact spec text (else {})."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != HASHES_VERSION or data.get("spec") != content_hash(spec_text):
+        return {}
+    return data
+
+def _split_sections(text: str) -> Tuple[str, List[Tuple[str, int, int, int]]]:
+    """(text before the first heading, [(lower-cased title, heading start, body start, end)])."""
+    matches = list(SECTION_RE.finditer(text))
+    ends = [m.start() for m in matches[1:]] + [len(text)]
+    spans = [(m.group(2).strip().lower(), m.start(), m.end(), end) for m, end in zip(matches, ends)]
+    return text[:matches[0].start()] if matches else text, spans
+
+def section_hashes(text: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Lower-cased title → hash of its stripped body, for the first section of each
+    title (as SpecDocument.find), and for the latest one where that differs (a
+    later Addendum). Latest bodies leave out the Change Log entries that follow
+    an appended Addendum.
+    """
+    first: Dict[str, str] = {}
+    latest: Dict[str, str] = {}
+    for title, _, start, end in _split_sections(text)[1]:
+        body = text[start:end].strip()
+        h = content_hash(body)
+        if title not in first:
+            first[title] = h
+        if ": Added " in body or ": Replaced " in body:
+            h = content_hash(LOG_TAIL_RE.sub("", body).strip())
+        if h != first[title] or title in latest:
+            latest[title] = h
+    return first, latest
 
-def _split_sections(md: str):
-    """Return list of (level, title, start_idx, end_idx) for all headings."""
-    matches = list(SECTION_RE.finditer(md))
-    sections = []
-    for i, m in enumerate(matches):
-        level = len(m.group(1))
-        title = m.group(2).strip()
-        start = m.start()
-        end = matches[i+1].start() if i+1 < len(matches) else len(md)
-        sections.append((level, title, start, end))
-    return sections
-
-def _replace_section(md: str, section_title: str, new_body: str) -> str:
-    secs = _split_sections(md)
-    for (level, title, start, end) in secs:
-        if title.lower() == section_title.lower():
-            # keep the heading line, replace body
-            head_line = md[start:md.find("\n", start)+1]
-            return md[:start] + head_line + new_body.rstrip() + "\n" + md[end:]
-    # If section not found, append as level-2
-    block = f"\n## {section_title}\n{new_body.rstrip()}\n"
-    return md.rstrip() + block + "\n"
-
-def _ensure_change_log(md: str) -> str:
-    if re.search(r"^##\s*Change Log\s*$", md, flags=re.M):
-        return md
-    return md.rstrip() + "\n\n## Change Log\n\n"  # ensure exists
+def _write_hashes(path: Path, spec_text: str, addendum: str) -> None:
+    first, latest = section_hashes(spec_text)
+    data = {
+        "version": HASHES_VERSION,
+        "spec": content_hash(spec_text),
+        "sections": first,
+        "latest": latest,       # only titles whose latest body differs from the first
+        "addendum": addendum,   # hash of the latest addendum, "" if unknown
+    }
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False))
 
 def merge_ui_spec(
     existing_md_path: str,
@@ -40,28 +175,82 @@ def merge_ui_spec(
     strategy: str = "append",           # "append" | "replace_sections"
     replace_sections: Optional[Iterable[str]] = None,
     source_label: str = "New input"
-) -> str:
+) -> Optional[str]:
     """
     Merge a new UI spec snippet into an existing Markdown spec.
-    - append: writes an Addendum and a Change Log entry
-    - replace_sections: replaces specified section bodies if present, else appends new sections
-    Returns the merged markdown string (also writes it to the same path).
+    - append: writes an Addendum and a Change Log entry. A snippet with headings
+      brings only the sections whose body differs from the latest section of
+      that title in the spec (new or changed ones), with its text before the
+      first heading; a snippet without headings is added unless the latest
+      Addendum has the same content
+    - replace_sections: replaces specified section bodies if present, else appends new sections;
+      sections that already have the new body are left out (and out of the Change Log), found
+      through the sidecar's section hashes when it is up to date
+    Returns the merged markdown string (also writes it to the same path, atomically),
+    or None if there was nothing to merge; the spec file is then not touched.
+    Section and addendum hashes are kept next to the spec (HASHES_SUFFIX) and
+    used instead of re-reading its sections while they match it.
     """
     p = Path(existing_md_path)
+    hp = Path(f"{p}{HASHES_SUFFIX}")
     old = p.read_text(encoding="utf-8") if p.exists() else "# UI Specification\n\n"
+    known = _read_hashes(hp, old) if p.exists() else {}
+    addendum = known.get("addendum", "")
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
-    if strategy == "replace_sections" and replace_sections:
-        merged = old
-        for sec in replace_sections:
-            merged = _replace_section(merged, sec, new_md_text)
-        merged = _ensure_change_log(merged)
-        merged += f"- {now}: Replaced sections {', '.join(replace_sections)} from **{source_label}**.\n"
+    sections = list(replace_sections or [])
+    if strategy == "replace_sections" and sections:
+        changed = []
+        if known:   # the sidecar matches this exact spec text: compare hashes, no need to index it
+            h = content_hash(new_md_text.strip())
+            changed = [t for t in dict.fromkeys(sections) if known["sections"].get(t.lower()) != h]
+            doc = None
+        else:
+            doc = SpecDocument(old)
+            for title in dict.fromkeys(sections):
+                sec = doc.find(title)
+                if sec is None or not doc.has_body(sec, new_md_text):
+                    changed.append(title)
+        if not changed:
+            if not known:
+                _write_hashes(hp, old, addendum)
+            return None
+        doc = doc or SpecDocument(old)
+        addendum = ""   # a replaced body may cut into the addendum; last_addendum_is() re-checks it
+        merged = doc.rebuild(
+            replace=dict.fromkeys(changed, new_md_text),
+            log_entry=f"- {now}: Replaced sections {', '.join(changed)} from **{source_label}**.\n",
+        )
     else:
         # default = append
-        merged = _ensure_change_log(old)
-        addendum = f"\n## Addendum — {source_label} ({now})\n\n" + new_md_text.strip() + "\n"
-        merged = merged.rstrip() + addendum + f"\n- {now}: Added Addendum from **{source_label}**.\n"
+        text = new_md_text.strip()
+        preamble, incoming = _split_sections(text)
+        note = ""
+        if incoming:
+            first, latest = (known["sections"], known["latest"]) if known else section_hashes(old)
+            blocks = [text[start:end].strip() for title, start, body, end in incoming
+                      if latest.get(title, first.get(title)) != content_hash(text[body:end].strip())]
+            if not blocks:
+                if not known:
+                    _write_hashes(hp, old, addendum)
+                return None
+            if len(blocks) < len(incoming):
+                note = f" ({len(blocks)} of {len(incoming)} sections new or changed)"
+            content = "\n\n".join(([preamble.strip()] if preamble.strip() else []) + blocks)
+        else:
+            content = text
+            if content_hash(content) == known.get("addendum"):   # the sidecar matches this exact spec text, so it ends with it
+                return None
+        addendum = content_hash(content)
+        doc = SpecDocument(old)
+        if not incoming and doc.last_addendum_is(content):
+            _write_hashes(hp, old, addendum)
+            return None
+        merged = doc.rebuild(
+            addendum=f"\n## Addendum — {source_label} ({now})\n\n{content}\n",
+            log_entry=f"\n- {now}: Added Addendum from **{source_label}**{note}.\n",
+        )
 
-    p.write_text(merged, encoding="utf-8")
-    return merged
\ No newline at end of file
+    atomic_write_text(p, merged)
+    _write_hashes(hp, merged, addendum)
+    return merged
@@ -0,0 +1,160 @@
+"""
+`danacvt-gen --watch`: keep one Generator session warm and re-run whenever the
+input document or a screen in the input folder changes.
+
+Changes come from watchdog (inotify on Linux, FSEvents / ReadDirectoryChangesW
+elsewhere) when it is installed, otherwise from polling the directory's
+mtimes and sizes. Bursts of events (an editor's save, a designer exporting
+ten screens) are debounced into one re-run.
+
+A re-run goes through the full stage graph, but only changed inputs cost
+anything:
+- OCR, parsing and UI cases are cached per screen by the session;
+- LLM requests are memoized in-process (llm.backend.enable_memo), so booster
+  chunks and prompts built from unchanged screens are answered from memory;
+- flow specs use the hierarchical strategy (unless --flow-mode says
+  otherwise), whose per-screen summaries are cached on disk, so one edited
+  screen means one summary plus the reduce;
+- CSV merges and specs are written atomically (fsutil), so tools reading the
+  outputs never see half-written files.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .session import IMAGE_EXTS, Generator, input_kind
+
+DEFAULT_DEBOUNCE_S = 1.0
+DEFAULT_POLL_S = 1.0
+
+
+class _Poller(threading.Thread):
+    """Polling fallback: diff (mtime, size) snapshots of one directory."""
+
+    def __init__(self, root: str, on_change: Callable[[str], None], interval: float):
+        super().__init__(name="danacvt-watch-poll", daemon=True)
+        self.root, self.on_change, self.interval = root, on_change, interval
+        self._stop_event = threading.Event()
+        self._snap = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snap = {}
+        with os.scandir(self.root) as it:
+            for e in it:
+                try:
+                    if e.is_file():
+                        st = e.stat()
+                        snap[e.path] = (st.st_mtime_ns, st.st_size)
+                except FileNotFoundError:
+                    pass  # removed while scanning
+        return snap
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            snap = self._snapshot()
+            for path in set(snap) | set(self._snap):
+                if snap.get(path) != self._snap.get(path):
+                    self.on_change(path)
+            self._snap = snap
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def _watchdog_observer(root: str, on_change: Callable[[str], None]):
+    """A started watchdog Observer, or None if watchdog is not installed."""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except Exception:
+        return None
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            on_change(event.src_path)
+            if getattr(event, "dest_path", None):
+                on_change(event.dest_path)   # editors save via rename
+
+    observer = Observer()
+    observer.schedule(_Handler(), root, recursive=False)
+    observer.start()
+    return observer
+
+
+def _watch_target(file: Optional[str], folder: Optional[str]) -> Tuple[str, Callable[[str], bool]]:
+    """(directory to watch, filter for the paths that matter)."""
+    if folder:
+        return folder, lambda p: Path(p).suffix.lower() in IMAGE_EXTS
+    target = os.path.realpath(file)
+    # watch the directory: editors often replace the file instead of writing it in place
+    return os.path.dirname(target) or ".", lambda p: os.path.realpath(p) == target
+
+
+def _run_once(gen: Generator, overrides: Dict) -> None:
+    t0 = time.perf_counter()
+    try:
+        result = gen.run(**overrides)
+    except Exception as e:   # e.g. a screen caught mid-export; the next change re-runs
+        print(f"⚠️ Re-run failed: {e}")
+        return
+    print(f"✅ Done in {time.perf_counter() - t0:.1f}s ({len(result.cases)} cases).")
+
+
+def watch(gen: Generator, debounce_s: float = DEFAULT_DEBOUNCE_S, poll_s: Optional[float] = None, **overrides) -> int:
+    """
+    Run once, then re-run on every (debounced) change until interrupted.
+    poll_s forces polling at that interval; by default watchdog is used when installed.
+    """
+    opts = gen.options
+    file, folder = overrides.get("file", opts.file), overrides.get("folder", opts.folder)
+    input_kind(file, folder)   # raises on bad inputs before we start watching
+    if overrides.get("flow_mode", opts.flow_mode) == "auto":
+        overrides["flow_mode"] = "hierarchical"
+    from .llm import backend as llm_backend
+    llm_backend.enable_memo()
+
+    root, relevant = _watch_target(file, folder)
+    changes: "queue.Queue[str]" = queue.Queue()
+
+    def on_change(path: str) -> None:
+        if relevant(path):
+            changes.put(path)
+
+    watcher = None if poll_s else _watchdog_observer(root, on_change)
+    how = "watchdog"
+    if watcher is None:
+        watcher = _Poller(root, on_change, poll_s or DEFAULT_POLL_S)
+        watcher.start()
+        how = f"polling every {watcher.interval:g}s"
+
+    _run_once(gen, overrides)
+    print(f"ℹ️ Watching {folder or file} ({how}); Ctrl+C to stop.")
+    try:
+        while True:
+            try:
+                changed: Set[str] = {changes.get(timeout=1.0)}
+            except queue.Empty:
+                continue
+            while True:   # debounce: wait for a quiet period
+                try:
+                    changed.add(changes.get(timeout=debounce_s))
+                except queue.Empty:
+                    break
+            names = sorted(Path(p).name for p in changed)
+            shown = ", ".join(names[:5]) + (f" (+{len(names) - 5} more)" if len(names) > 5 else "")
+            print(f"ℹ️ Changed: {shown} — re-running")
+            _run_once(gen, overrides)
+    except KeyboardInterrupt:
+        print("ℹ️ Watch stopped.")
+    finally:
+        watcher.stop()
+        if hasattr(watcher, "join"):
+            watcher.join(timeout=5)
+    return 0